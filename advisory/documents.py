@@ -0,0 +1,14 @@
+from common.pdf import DocumentTemplate, Gap, Text
+
+
+RISK_REPORT_PDF = DocumentTemplate(
+    Text("AI Risk Advisory Report", style="Title"),
+    Gap(20),
+    Text("User: {email}"),
+    Text("OP Score: {op_score}"),
+    Text("Risk Level: {risk_level}"),
+    Gap(20),
+    Text("AI Summary", style="Heading2"),
+    Gap(10),
+    Text("{ai_summary}"),
+)
@@ -1,11 +1,8 @@
 from groq import Groq
 from django.conf import settings
-from io import BytesIO
-
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+from django.db import models
 
+from .documents import RISK_REPORT_PDF
 from .models import RiskReport
 from gamification.models import OPHistory
 
@@ -77,26 +74,14 @@ class RiskReportService:
         )
 
         # 4. Generate PDF in memory
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-
-        elements = [
-            Paragraph("AI Risk Advisory Report", styles["Title"]),
-            Spacer(1, 20),
-            Paragraph(f"User: {user.email}", styles["Normal"]),
-            Paragraph(f"OP Score: {total_op}", styles["Normal"]),
-            Paragraph(f"Risk Level: {risk_level}", styles["Normal"]),
-            Spacer(1, 20),
-            Paragraph("AI Summary", styles["Heading2"]),
-            Spacer(1, 10),
-            Paragraph(ai_summary, styles["Normal"]),
-        ]
-
-        doc.build(elements)
-
-        pdf_bytes = buffer.getvalue()
-        buffer.close()
+        pdf_bytes = RISK_REPORT_PDF.render(
+            {
+                "email": user.email,
+                "op_score": total_op,
+                "risk_level": risk_level,
+                "ai_summary": ai_summary,
+            }
+        )
 
         report.status = "ready"
         report.save(update_fields=["status"])
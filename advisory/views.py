@@ -6,15 +6,11 @@ from django.db import models
 
 from drf_spectacular.utils import extend_schema, OpenApiExample
 
-from .services import AdvisoryAIService
-from .models import TradeInsight, RiskScore, RiskReport
+from .services import AdvisoryAIService, RiskReportService
+from .models import TradeInsight, RiskScore
 from gamification.models import OPHistory
 
 from django.http import HttpResponse
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
 
 
 class AdvisoryChatView(APIView):
@@ -165,56 +161,7 @@ class RiskReportPDFView(APIView):
         tags=["Advisory"],
     )
     def post(self, request):
-        total_op = (
-            OPHistory.objects
-            .filter(user=request.user)
-            .aggregate(total=models.Sum("points"))
-            .get("total") or 0
-        )
-
-        if total_op < 100:
-            risk_level = "HIGH RISK"
-        elif total_op < 500:
-            risk_level = "MODERATE RISK"
-        else:
-            risk_level = "LOW RISK"
-
-        ai_prompt = (
-            f"Generate a concise risk awareness summary for a trader with:\n"
-            f"- OP score: {total_op}\n"
-            f"- Risk level: {risk_level}\n\n"
-            f"Focus on education, position sizing, and risk discipline."
-        )
-
-        ai_summary = AdvisoryAIService.ask(ai_prompt)
-
-        report = RiskReport.objects.create(
-            user=request.user,
-            ai_summary=ai_summary,
-            status="generating",
-        )
-
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        elements = []
-
-        elements.append(Paragraph("AI Risk Advisory Report", styles["Title"]))
-        elements.append(Spacer(1, 20))
-        elements.append(Paragraph(f"User: {request.user.email}", styles["Normal"]))
-        elements.append(Paragraph(f"OP Score: {total_op}", styles["Normal"]))
-        elements.append(Paragraph(f"Risk Level: {risk_level}", styles["Normal"]))
-        elements.append(Spacer(1, 20))
-        elements.append(Paragraph("AI Summary", styles["Heading2"]))
-        elements.append(Spacer(1, 10))
-        elements.append(Paragraph(ai_summary, styles["Normal"]))
-
-        doc.build(elements)
-        pdf_bytes = buffer.getvalue()
-        buffer.close()
-
-        report.status = "ready"
-        report.save(update_fields=["status"])
+        pdf_bytes = RiskReportService.generate(request.user)
 
         response = HttpResponse(pdf_bytes, content_type="application/pdf")
         response["Content-Disposition"] = 'attachment; filename="risk_report.pdf"'
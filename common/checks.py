@@ -0,0 +1,29 @@
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+from .routers import replica_alias
+
+
+def cache_is_shared(alias="default"):
+    """Whether entries in cache ``alias`` are seen by every worker process."""
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+@register(Tags.caches, Tags.database, deploy=True)
+def check_primary_pin_cache(app_configs, **kwargs):
+    """Pins set after a write must reach the worker serving the next read."""
+    if replica_alias() is None or cache_is_shared():
+        return []
+    return [
+        Error(
+            "Pinning users to the primary after a write needs a cache "
+            "backend shared between worker processes.",
+            hint=(
+                "Point CACHE_BACKEND at a shared backend such as "
+                "django.core.cache.backends.redis.RedisCache."
+            ),
+            id="common.E001",
+        )
+    ]
@@ -0,0 +1,141 @@
+import random
+import time
+import traceback
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+
+def backoff_delay(attempt, base=30, cap=3600):
+    """Exponential backoff with jitter: ~base, 2*base, 4*base... up to cap."""
+    delay = min(cap, base * 2 ** max(attempt - 1, 0))
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def claim_job(queryset, stale_after):
+    """
+    Move the next due job in ``queryset`` to running and return it.
+
+    Jobs whose worker stopped heartbeating for ``stale_after`` are taken
+    over. The claim is a conditional UPDATE, so two workers never run the
+    same job even on databases without SKIP LOCKED.
+    """
+    now = timezone.now()
+    due = (
+        queryset
+        .filter(
+            Q(status=BackgroundJob.STATUS_PENDING, run_after__lte=now)
+            | Q(
+                status=BackgroundJob.STATUS_RUNNING,
+                heartbeat_at__lt=now - stale_after,
+            )
+        )
+        .order_by("run_after", "id")
+    )
+
+    for job in due[:10]:
+        claimed = queryset.filter(
+            pk=job.pk,
+            status=job.status,
+            attempts=job.attempts,
+        ).update(
+            status=BackgroundJob.STATUS_RUNNING,
+            attempts=job.attempts + 1,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+    return None
+
+
+def heartbeat(job, **fields):
+    """Record liveness (and any progress ``fields``) for a running job."""
+    fields["heartbeat_at"] = timezone.now()
+    type(job).objects.filter(pk=job.pk).update(**fields)
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+def complete_job(job, **fields):
+    heartbeat(
+        job,
+        status=BackgroundJob.STATUS_COMPLETED,
+        finished_at=timezone.now(),
+        last_error="",
+        **fields,
+    )
+
+
+def fail_job(job, error):
+    """Reschedule ``job`` with backoff, or mark it failed when out of attempts."""
+    if job.attempts < job.max_attempts:
+        heartbeat(
+            job,
+            status=BackgroundJob.STATUS_PENDING,
+            run_after=timezone.now() + backoff_delay(job.attempts),
+            last_error=error,
+        )
+    else:
+        heartbeat(
+            job,
+            status=BackgroundJob.STATUS_FAILED,
+            finished_at=timezone.now(),
+            last_error=error,
+        )
+
+
+class JobWorkerCommand(BaseCommand):
+    """
+    Polling worker for a ``BackgroundJob`` model.
+
+    Subclasses set ``job_model`` and implement ``run_job(job)``; raising
+    from it reschedules the job with backoff.
+    """
+
+    job_model = None
+    stale_after = timedelta(minutes=5)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the jobs that are due, then exit",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when the queue is empty",
+        )
+
+    def get_queryset(self):
+        return self.job_model.objects.all()
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_job(self.get_queryset(), self.stale_after)
+
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["sleep"])
+                continue
+
+            self.stdout.write(f"Running {job}")
+            try:
+                self.run_job(job)
+            except Exception:
+                fail_job(job, traceback.format_exc())
+                self.stderr.write(f"{job} failed (attempt {job.attempts})")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{job} done"))
+
+    def run_job(self, job):
+        raise NotImplementedError
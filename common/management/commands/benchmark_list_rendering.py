@@ -0,0 +1,122 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from common.renderers import ORJSONRenderer
+from invoices.models import Invoice
+from invoices.serializers import InvoiceSerializer
+from trades.models import Asset, Trade
+from trades.serializers import TradeListSerializer
+from users.models import Desk, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the stock and fast paths for rendering trade and invoice "
+        "lists on generated rows. Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            trades, invoices = self.seed(options["rows"])
+            cases = (
+                ("trades", TradeListSerializer, trades.select_related("asset", "desk")),
+                ("invoices", InvoiceSerializer, invoices),
+            )
+            for name, serializer_class, queryset in cases:
+                self.compare(name, serializer_class, queryset, options["repeat"])
+            transaction.set_rollback(True)
+
+    def seed(self, rows):
+        desk = Desk.objects.create(name="Benchmark Desk")
+        trader = User.objects.create(
+            email="benchmark@example.com",
+            full_name="Benchmark",
+            desk=desk,
+        )
+        assets = [
+            Asset.objects.get_or_create(symbol=symbol, defaults={"name": symbol})[0]
+            for symbol in ("BTC", "ETH", "USDT")
+        ]
+
+        now = timezone.now()
+        trades = Trade.objects.bulk_create(
+            [
+                Trade(
+                    trader=trader,
+                    desk=desk,
+                    asset=assets[index % len(assets)],
+                    side=("buy", "sell")[index % 2],
+                    trade_type="otc",
+                    amount_crypto=Decimal("0.12345678"),
+                    amount_ngn=Decimal("154321.50"),
+                    rate=Decimal("1250000.00"),
+                    profit_loss=Decimal("-1.75"),
+                    trade_date=now - timedelta(minutes=index, microseconds=index),
+                    sync_seq=index + 1,
+                )
+                for index in range(rows)
+            ],
+            batch_size=2000,
+        )
+        Invoice.objects.bulk_create(
+            [
+                Invoice(
+                    invoice_number=f"BENCH-{trade.pk}",
+                    trade=trade,
+                    trader=trader,
+                    desk_name=desk.name,
+                    asset_symbol="BTC",
+                    amount=trade.amount_ngn,
+                )
+                for trade in trades
+            ],
+            batch_size=2000,
+        )
+
+        return (
+            Trade.objects.filter(trader=trader),
+            Invoice.objects.filter(trader=trader),
+        )
+
+    def compare(self, name, serializer_class, queryset, repeat):
+        def stock():
+            data = serializers.ListSerializer(
+                queryset,
+                child=serializer_class(),
+            ).data
+            return JSONRenderer().render(data)
+
+        def fast():
+            return ORJSONRenderer().render(serializer_class(queryset, many=True).data)
+
+        if stock() != fast():
+            raise CommandError(f"{name}: fast path output differs from DRF's.")
+
+        stock_time = self.best_of(stock, repeat)
+        fast_time = self.best_of(fast, repeat)
+        self.stdout.write(
+            f"{name}: {queryset.count()} rows  "
+            f"stock {stock_time * 1000:.0f}ms  "
+            f"fast {fast_time * 1000:.0f}ms  "
+            f"({stock_time / fast_time:.1f}x, identical bytes)"
+        )
+
+    @staticmethod
+    def best_of(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,180 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+
+from advisory.documents import RISK_REPORT_PDF
+from common import pdf
+from invoices.documents import INVOICE_PDF
+
+
+SUMMARY = (
+    "Keep position sizes small relative to your book while volatility is "
+    "high, and set a loss limit before entering each trade. "
+) * 6
+
+
+def invoice_contexts(count):
+    return [
+        {
+            "invoice_number": f"OTC-2026-{index:06d}",
+            "issued_at": "2026-01-31 17:45",
+            "desk_name": "Lagos OTC Desk",
+            "asset_symbol": "USDT",
+            "amount": f"{1_534_250.5 + index:,.2f}",
+            "status": "Draft",
+            "client_email": "client@example.com" if index % 2 else "",
+        }
+        for index in range(count)
+    ]
+
+
+def risk_report_contexts(count):
+    return [
+        {
+            "email": f"trader{index}@example.com",
+            "op_score": index * 7,
+            "risk_level": "MODERATE RISK",
+            "ai_summary": SUMMARY,
+        }
+        for index in range(count)
+    ]
+
+
+def legacy_invoice(context):
+    """The per-document setup invoices used before common.pdf."""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    elements = [
+        Paragraph("INVOICE", styles["Title"]),
+        Spacer(1, 20),
+        Table([
+            ["Invoice Number", context["invoice_number"]],
+            ["Issued At", context["issued_at"]],
+            ["Desk", context["desk_name"]],
+            ["Asset", context["asset_symbol"]],
+            ["Amount (NGN)", context["amount"]],
+            ["Status", context["status"]],
+        ]),
+        Spacer(1, 20),
+    ]
+    if context["client_email"]:
+        elements.append(
+            Paragraph(f"Billed To: {context['client_email']}", styles["Normal"])
+        )
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def legacy_risk_report(context):
+    """The per-document setup risk reports used before common.pdf."""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    doc.build([
+        Paragraph("AI Risk Advisory Report", styles["Title"]),
+        Spacer(1, 20),
+        Paragraph(f"User: {context['email']}", styles["Normal"]),
+        Paragraph(f"OP Score: {context['op_score']}", styles["Normal"]),
+        Paragraph(f"Risk Level: {context['risk_level']}", styles["Normal"]),
+        Spacer(1, 20),
+        Paragraph("AI Summary", styles["Heading2"]),
+        Spacer(1, 10),
+        Paragraph(context["ai_summary"], styles["Normal"]),
+    ])
+    return buffer.getvalue()
+
+
+def render_invoices(contexts):
+    return sum(len(data) for data in INVOICE_PDF.render_many(contexts))
+
+
+class Command(BaseCommand):
+    help = (
+        "Report PDFs per second per core for invoices and risk reports, "
+        "rendered the old way (fresh stylesheet and template per document) "
+        "and through common.pdf."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--documents", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=0,
+            help="Also render invoices in a pool of this many processes",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import _rl_accel  # noqa: F401
+            accel = "installed"
+        except ImportError:
+            accel = "not installed"
+        self.stdout.write(f"rl_accel: {accel}")
+
+        count = options["documents"]
+        pdf.warm()
+
+        cases = (
+            (
+                "invoice",
+                invoice_contexts(count),
+                legacy_invoice,
+                lambda contexts: list(INVOICE_PDF.render_many(contexts)),
+            ),
+            (
+                "risk report",
+                risk_report_contexts(count),
+                legacy_risk_report,
+                lambda contexts: list(RISK_REPORT_PDF.render_many(contexts)),
+            ),
+        )
+        for name, contexts, legacy, engine in cases:
+            before = self.best_of(
+                lambda: [legacy(context) for context in contexts],
+                options["repeat"],
+            )
+            after = self.best_of(lambda: engine(contexts), options["repeat"])
+            self.stdout.write(
+                f"{name}: before {count / before:.0f} docs/s/core  "
+                f"after {count / after:.0f} docs/s/core  "
+                f"({before / after:.2f}x)"
+            )
+
+        if options["workers"]:
+            self.pool(invoice_contexts(count), options["workers"])
+
+    def pool(self, contexts, workers):
+        chunk = max(len(contexts) // (workers * 4), 1)
+        chunks = [contexts[i:i + chunk] for i in range(0, len(contexts), chunk)]
+
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(workers, mp_context=context) as executor:
+            # Start the workers before timing.
+            list(executor.map(render_invoices, [contexts[:1]] * workers))
+            start = time.perf_counter()
+            list(executor.map(render_invoices, chunks))
+            elapsed = time.perf_counter() - start
+
+        rate = len(contexts) / elapsed
+        self.stdout.write(
+            f"invoice pool of {workers}: {rate:.0f} docs/s "
+            f"({rate / workers:.0f} docs/s/core)"
+        )
+
+    @staticmethod
+    def best_of(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,30 @@
+from rest_framework.permissions import SAFE_METHODS
+
+from .routers import pin_to_primary, replica_alias
+
+
+class PrimaryPinMiddleware:
+    """
+    Pin users to the primary database for a short while after they write.
+
+    DRF authenticates inside the view and copies the user back onto the
+    Django request, so JWT users are visible here once the view returns.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        user = getattr(request, "user", None)
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and user is not None
+            and user.is_authenticated
+            and replica_alias() is not None
+        ):
+            pin_to_primary(user)
+
+        return response
@@ -0,0 +1,114 @@
+"""
+Shared ReportLab rendering for generated documents.
+
+Layouts are declared once as a ``DocumentTemplate`` of blocks and filled
+from a plain context dict, so documents can be rendered in batches or in
+worker processes. The stylesheet, table styles and font metrics are built
+once per process. ReportLab uses the optional ``rl_accel`` extension when
+it is installed, which speeds up number formatting and stream encoding.
+"""
+
+from functools import lru_cache
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.pdfbase import pdfmetrics
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+
+TABLE_STYLES = {
+    "plain": [],
+}
+
+
+@lru_cache(maxsize=None)
+def stylesheet():
+    return getSampleStyleSheet()
+
+
+@lru_cache(maxsize=None)
+def table_style(name):
+    return TableStyle(TABLE_STYLES[name])
+
+
+def warm():
+    """Build the shared styles and load their fonts, e.g. before forking."""
+    for style in stylesheet().byName.values():
+        font_name = getattr(style, "fontName", None)
+        if font_name:
+            pdfmetrics.getFont(font_name)
+    for name in TABLE_STYLES:
+        table_style(name)
+
+
+class Block:
+    def flowables(self, context):
+        raise NotImplementedError
+
+
+class Text(Block):
+    """
+    A paragraph formatted from the context with ``str.format_map``.
+
+    Values are escaped, so they cannot inject ReportLab markup. With
+    ``when`` the paragraph is left out unless that context key is truthy.
+    """
+
+    def __init__(self, text, style="Normal", when=None):
+        self.text = text
+        self.style = style
+        self.when = when
+
+    def flowables(self, context):
+        if self.when and not context.get(self.when):
+            return []
+        values = {key: escape(str(value)) for key, value in context.items()}
+        return [Paragraph(self.text.format_map(values), stylesheet()[self.style])]
+
+
+class Gap(Block):
+    def __init__(self, height):
+        self.height = height
+
+    def flowables(self, context):
+        return [Spacer(1, self.height)]
+
+
+class Fields(Block):
+    """A two-column table of ``(label, text)`` rows formatted from the context."""
+
+    def __init__(self, rows, style="plain"):
+        self.rows = rows
+        self.style = style
+
+    def flowables(self, context):
+        data = [[label, text.format_map(context)] for label, text in self.rows]
+        return [Table(data, style=table_style(self.style))]
+
+
+class DocumentTemplate:
+    def __init__(self, *blocks, pagesize=A4):
+        self.blocks = blocks
+        self.pagesize = pagesize
+
+    def flowables(self, context):
+        return [
+            flowable
+            for block in self.blocks
+            for flowable in block.flowables(context)
+        ]
+
+    def render(self, context):
+        """Return the PDF for one ``context`` as bytes."""
+        buffer = BytesIO()
+        SimpleDocTemplate(buffer, pagesize=self.pagesize).build(
+            self.flowables(context)
+        )
+        return buffer.getvalue()
+
+    def render_many(self, contexts):
+        """Yield one PDF per context, in order."""
+        for context in contexts:
+            yield self.render(context)
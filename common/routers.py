@@ -0,0 +1,67 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+
+# Alias reads are routed to while a ReplicaReadMixin view handles a request.
+current_read_alias = ContextVar("current_read_alias", default=None)
+
+PIN_KEY = "db:primary-pin:{user_id}"
+
+
+def replica_alias():
+    """The configured replica alias, or None when only ``default`` exists."""
+    alias = settings.REPLICA_DATABASE_ALIAS
+    return alias if alias in settings.DATABASES else None
+
+
+def pin_to_primary(user):
+    """
+    Keep ``user`` reading from the primary for ``REPLICA_PIN_SECONDS``.
+
+    The pin lives in the Django cache, so it only spans workers with a
+    shared backend such as Redis; the ``common.E001`` deploy check fails
+    without one while a replica is configured.
+    """
+    cache.set(
+        PIN_KEY.format(user_id=user.pk),
+        True,
+        settings.REPLICA_PIN_SECONDS,
+    )
+
+
+def is_pinned(user):
+    return bool(
+        user.is_authenticated
+        and cache.get(PIN_KEY.format(user_id=user.pk))
+    )
+
+
+def replica_for(user):
+    """Alias ``user`` may read from right now, or None for the primary."""
+    alias = replica_alias()
+    if alias is None or is_pinned(user):
+        return None
+    return alias
+
+
+class ReplicaRouter:
+    """
+    Sends reads to ``current_read_alias`` while it is set and every
+    write, and every other read, to ``default``.
+    """
+
+    def db_for_read(self, model, **hints):
+        return current_read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary.
+        aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
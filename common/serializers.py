@@ -0,0 +1,163 @@
+import decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+)
+
+
+def lookup_for(model, source_attrs):
+    """
+    Return the ``values()`` lookup for a dotted serializer source, or None.
+
+    Only non-null forward relations are followed: a missing related row
+    would make DRF skip the field, which a values() row cannot reproduce.
+    A trailing ``.id`` on a foreign key reads the local ``<fk>_id`` column.
+    """
+    parts = []
+    for index, name in enumerate(source_attrs):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+        if index == len(source_attrs) - 1:
+            if field.is_relation:
+                return None
+            parts.append(name)
+            break
+
+        if not (field.many_to_one or field.one_to_one) or field.null:
+            return None
+        if field.auto_created and not field.concrete:
+            return None
+
+        if (
+            index == len(source_attrs) - 2
+            and source_attrs[-1] in ("id", "pk", field.target_field.name)
+        ):
+            parts.append(field.attname)
+            break
+
+        parts.append(name)
+        model = field.related_model
+
+    return "__".join(parts)
+
+
+def decimal_converter(field):
+    coerce_to_string = getattr(
+        field,
+        "coerce_to_string",
+        api_settings.COERCE_DECIMAL_TO_STRING,
+    )
+    if (
+        not coerce_to_string
+        or field.localize
+        or field.normalize_output
+        or field.decimal_places is None
+    ):
+        return field.to_representation
+
+    # The same quantize DecimalField.to_representation does, minus the
+    # per-value context copy.
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    exponent = decimal.Decimal(".1") ** field.decimal_places
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            return field.to_representation(value)
+        return f"{value.quantize(exponent, rounding=rounding, context=context):f}"
+
+    return convert
+
+
+def datetime_converter(field):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    zone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    if zone is None or output_format is None or output_format.lower() != "iso-8601":
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str) or value.tzinfo is None:
+            return field.to_representation(value)
+        text = value.astimezone(zone).isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+    return convert
+
+
+def field_converter(field):
+    if isinstance(field, serializers.DecimalField):
+        return decimal_converter(field)
+    if isinstance(field, serializers.DateTimeField):
+        return datetime_converter(field)
+    if isinstance(field, IDENTITY_FIELDS):
+        return None
+    return field.to_representation
+
+
+class ValuesListSerializer(serializers.ListSerializer):
+    """
+    List serializer that renders querysets from ``values_list()`` rows.
+
+    Every readable field of the child must map to a model column (dotted
+    sources become joins); the rows then skip model instantiation and
+    DRF's per-field attribute lookups, and values are formatted exactly as
+    the child fields would. Anything else, including lists of instances
+    from pagination, goes through the regular ``ListSerializer`` path.
+    """
+
+    def to_representation(self, data):
+        if isinstance(data, QuerySet):
+            plan = self.get_values_plan(data.model)
+            if plan is not None:
+                return self.represent_rows(data, *plan)
+        return super().to_representation(data)
+
+    def get_values_plan(self, model):
+        child = self.child
+        if type(child).to_representation is not serializers.Serializer.to_representation:
+            return None
+
+        names, lookups, converters = [], [], []
+        for field in child._readable_fields:
+            if (
+                isinstance(field, (serializers.BaseSerializer, serializers.RelatedField))
+                or isinstance(field, serializers.SerializerMethodField)
+                or field.source == "*"
+            ):
+                return None
+
+            lookup = lookup_for(model, field.source_attrs)
+            if lookup is None:
+                return None
+
+            names.append(field.field_name)
+            lookups.append(lookup)
+            converters.append(field_converter(field))
+
+        return names, lookups, converters
+
+    @staticmethod
+    def represent_rows(queryset, names, lookups, converters):
+        columns = list(enumerate(zip(names, converters)))
+        results = []
+        for row in queryset.values_list(*lookups).iterator(chunk_size=2000):
+            item = {}
+            for index, (name, convert) in columns:
+                value = row[index]
+                item[name] = value if convert is None or value is None else convert(value)
+            results.append(item)
+        return results
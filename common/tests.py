@@ -1,3 +1,177 @@
-from django.test import TestCase
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from trades.assets import asset_cache
+from trades.models import Asset, Trade
+from users.models import Desk, User
+
+from .checks import check_primary_pin_cache
+from .pdf import DocumentTemplate, Fields, Gap, Text
+from .routers import ReplicaRouter, current_read_alias, replica_for
+
+
+TRADE = {
+    "asset": "BTC",
+    "side": "buy",
+    "trade_type": "spot",
+    "amount_crypto": "0.10000000",
+    "amount_ngn": "100.00",
+    "rate": "1000.00",
+    "trade_date": "2025-01-01T00:00:00Z",
+}
+
+
+def separate_replica():
+    database = settings.DATABASES.get(settings.REPLICA_DATABASE_ALIAS)
+    return database is not None and not database.get("TEST", {}).get("MIRROR")
+
+
+# Routing only needs the alias to be configured; pointing it at "default"
+# keeps the test database single while exercising the same code paths.
+@override_settings(REPLICA_DATABASE_ALIAS="default")
+class ReplicaRoutingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="Replica Desk")
+        cls.trader = User.objects.create_user(
+            email="replica@otcbook.com",
+            password="password",
+            full_name="Replica Trader",
+            role="trader",
+            desk=desk,
+        )
+        Asset.objects.create(symbol="BTC")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def test_reads_follow_current_alias(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Trade))
+
+        token = current_read_alias.set("replica")
+        try:
+            self.assertEqual(router.db_for_read(Trade), "replica")
+            self.assertEqual(router.db_for_write(Trade), "default")
+        finally:
+            current_read_alias.reset(token)
+
+    def test_write_pins_user_to_primary(self):
+        self.assertEqual(replica_for(self.trader), "default")
+
+        response = self.client.post("/trades/create/", TRADE, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(replica_for(self.trader))
+
+    def test_deploy_check_requires_shared_cache(self):
+        self.assertEqual(
+            [error.id for error in check_primary_pin_cache(None)],
+            ["common.E001"],
+        )
+        with self.settings(REPLICA_DATABASE_ALIAS="unconfigured"):
+            self.assertEqual(check_primary_pin_cache(None), [])
+
+    def test_view_releases_alias_after_request(self):
+        response = self.client.get("/trades/pnl/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(current_read_alias.get())
+
+
+@skipUnless(
+    separate_replica(),
+    "needs a separate replica: --settings=otcbook_server.settings_replica",
+)
+class ReplicaLagTests(TestCase):
+    """The replica never receives rows, so reads show which alias served them."""
+
+    databases = "__all__"
+
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="Lag Desk")
+        cls.trader = User.objects.create_user(
+            email="lag@otcbook.com",
+            password="password",
+            full_name="Lag Trader",
+            role="trader",
+            desk=desk,
+        )
+        Trade.objects.create(
+            trader=cls.trader,
+            desk=desk,
+            asset=Asset.objects.create(symbol="BTC"),
+            side="buy",
+            trade_type="spot",
+            amount_crypto=Decimal("0.10000000"),
+            amount_ngn=Decimal("100.00"),
+            rate=Decimal("1000.00"),
+            trade_date=datetime(2025, 1, 1, tzinfo=dt_timezone.utc),
+        )
+
+    def setUp(self):
+        cache.clear()
+        # Assets cached by earlier tests were rolled back with them.
+        asset_cache.invalidate()
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def total_trades(self):
+        response = self.client.get("/trades/metrics/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["total_trades"]
+
+    def test_unpinned_reads_hit_replica(self):
+        self.assertEqual(replica_for(self.trader), "replica")
+        self.assertEqual(self.total_trades(), 0)
+
+    def test_pinned_reads_hit_primary(self):
+        response = self.client.post("/trades/create/", TRADE, format="json")
+        self.assertEqual(response.status_code, 201)
+
+        self.assertIsNone(replica_for(self.trader))
+        self.assertEqual(self.total_trades(), 2)
+
+        # Once the pin expires reads go back to the lagging replica.
+        cache.clear()
+        self.assertEqual(self.total_trades(), 0)
+
+
+class DocumentTemplateTests(SimpleTestCase):
+    template = DocumentTemplate(
+        Text("Report for {name}", style="Title"),
+        Gap(10),
+        Fields([("Amount", "{amount}")]),
+        Text("Note: {note}", when="note"),
+    )
+
+    def test_optional_blocks_follow_context(self):
+        with_note = self.template.flowables({"name": "A", "amount": "1", "note": "x"})
+        without_note = self.template.flowables({"name": "A", "amount": "1", "note": ""})
+
+        self.assertEqual(len(with_note), 4)
+        self.assertEqual(len(without_note), 3)
+
+    def test_values_are_escaped(self):
+        title = self.template.flowables(
+            {"name": "<b>A & B</b>", "amount": "1", "note": ""}
+        )[0]
+
+        self.assertEqual(title.getPlainText(), "Report for <b>A & B</b>")
+
+    def test_render_many_returns_one_pdf_per_context(self):
+        contexts = [{"name": index, "amount": index, "note": ""} for index in range(3)]
+
+        documents = list(self.template.render_many(contexts))
+
+        self.assertEqual(len(documents), 3)
+        self.assertTrue(all(data.startswith(b"%PDF") for data in documents))
@@ -1,3 +1,40 @@
-from django.shortcuts import render
+from rest_framework.permissions import SAFE_METHODS
 
-# Create your views here.
+from .routers import current_read_alias, replica_for
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe requests of a DRF view from the read replica.
+
+    Reads made while the view runs are routed through ``ReplicaRouter``,
+    and ``filter_queryset()`` binds its result to the replica so querysets
+    evaluated after the view returns, such as streamed exports, stay there
+    too. Users who wrote recently are pinned to the primary and skip it.
+    """
+
+    read_alias = None
+
+    def dispatch(self, request, *args, **kwargs):
+        self._read_alias_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._read_alias_token is not None:
+                current_read_alias.reset(self._read_alias_token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        if request.method in SAFE_METHODS:
+            self.read_alias = replica_for(request.user)
+            if self.read_alias is not None:
+                self._read_alias_token = current_read_alias.set(
+                    self.read_alias
+                )
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.read_alias is not None:
+            queryset = queryset.using(self.read_alias)
+        return queryset
@@ -12,10 +12,11 @@ class GamificationService:
     INVITE_POINTS = 30
 
     @staticmethod
-    def award_trade_points(trade: Trade):
+    def trade_point_entries(trade: Trade):
         user = trade.trader
         points = GamificationService.BASE_TRADE_POINTS
         is_fast = False
+        entries = []
 
         if trade.trade_date:
             delta = abs((trade.created_at - trade.trade_date).total_seconds())
@@ -24,25 +25,38 @@ class GamificationService:
                 points += bonus
                 is_fast = True
 
-                OPHistory.objects.create(
-                    user=user,
-                    action="trade_bonus",
-                    points=bonus,
-                    meta={"trade_id": trade.id},
+                entries.append(
+                    OPHistory(
+                        user=user,
+                        action="trade_bonus",
+                        points=bonus,
+                        meta={"trade_id": trade.id},
+                    )
                 )
 
-        OPHistory.objects.create(
-            user=user,
-            action="trade_logged",
-            points=points,
-            meta={
-                "trade_id": trade.id,
-                "asset": trade.asset.symbol,
-                "amount": float(trade.amount_ngn),
-                "fast": is_fast,
-            },
+        entries.append(
+            OPHistory(
+                user=user,
+                action="trade_logged",
+                points=points,
+                meta={
+                    "trade_id": trade.id,
+                    "asset": trade.asset.symbol,
+                    "amount": float(trade.amount_ngn),
+                    "fast": is_fast,
+                },
+            )
         )
 
+        return points, entries
+
+    @staticmethod
+    def award_trade_points(trade: Trade):
+        user = trade.trader
+        points, entries = GamificationService.trade_point_entries(trade)
+
+        OPHistory.objects.bulk_create(entries)
+
         Notification.objects.create(
             user=user,
             type="points",
@@ -52,6 +66,29 @@ class GamificationService:
 
         GamificationService.check_badges(user)
 
+    @staticmethod
+    def award_bulk_trade_points(user, trades):
+        total_points = 0
+        entries = []
+
+        for trade in trades:
+            points, trade_entries = GamificationService.trade_point_entries(trade)
+            total_points += points
+            entries.extend(trade_entries)
+
+        OPHistory.objects.bulk_create(entries)
+
+        Notification.objects.create(
+            user=user,
+            type="points",
+            title="Trades Logged",
+            message=f"+{total_points} OP earned for logging {len(trades)} trades",
+        )
+
+        # Badge thresholds only grow, so one check after the whole batch
+        # unlocks exactly the badges a trade-by-trade replay would.
+        GamificationService.check_badges(user)
+
     @staticmethod
     def award_invite_points(user):
         OPHistory.objects.create(
@@ -1,6 +1,7 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from trades.models import Trade
+from trades.signals import trades_bulk_created
 from .services import GamificationService
 
 
@@ -8,3 +9,8 @@ from .services import GamificationService
 def trade_created(sender, instance, created, **kwargs):
     if created:
         GamificationService.award_trade_points(instance)
+
+
+@receiver(trades_bulk_created)
+def trades_bulk_created_handler(sender, trader, trades, **kwargs):
+    GamificationService.award_bulk_trade_points(trader, trades)
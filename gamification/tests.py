@@ -1,3 +1,136 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Sum
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from trades.assets import asset_cache
+from trades.models import Asset
+from users.models import Desk, User
+
+from .models import Badge, Notification, OPHistory, UserBadge
+
+
+class BulkTradePointsTests(TestCase):
+    TRADES = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="Points Desk")
+        cls.bulk_trader, cls.single_trader = [
+            User.objects.create_user(
+                email=f"{name}@otcbook.com",
+                password="password",
+                full_name=f"{name.title()} Trader",
+                role="trader",
+                desk=desk,
+            )
+            for name in ("bulk", "single")
+        ]
+        Asset.objects.create(symbol="BTC")
+
+        Badge.objects.create(code="first", name="First Trade", min_trades=1)
+        Badge.objects.create(
+            code="steady",
+            name="Steady",
+            min_trades=4,
+            min_points=45,
+        )
+        Badge.objects.create(
+            code="whale",
+            name="Whale",
+            min_trades=1,
+            min_points=10000,
+        )
+
+    def setUp(self):
+        # Request throttle counters live in the cache, and assets cached by
+        # earlier tests were rolled back with them.
+        cache.clear()
+        asset_cache.invalidate()
+
+    def payload(self, index):
+        # Every other trade is logged as it happens and earns the fast bonus.
+        trade_date = timezone.now() - timedelta(days=index % 2 * 3)
+        return {
+            "asset": "btc",
+            "side": "sell" if index % 3 else "buy",
+            "trade_type": "otc",
+            "amount_crypto": "0.50000000",
+            "amount_ngn": f"{1000 + index}.00",
+            "rate": "2000.00",
+            "trade_date": trade_date.isoformat(),
+        }
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def history(self, user):
+        entries = OPHistory.objects.filter(user=user)
+        return {
+            "total": entries.aggregate(total=Sum("points"))["total"],
+            "actions": Counter(entries.values_list("action", "points")),
+            "badges": set(
+                UserBadge.objects.filter(user=user)
+                .values_list("badge__code", flat=True)
+            ),
+        }
+
+    def test_bulk_matches_single_creates(self):
+        response = self.client_for(self.bulk_trader).post(
+            "/trades/bulk/",
+            [self.payload(index) for index in range(self.TRADES)],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+        client = self.client_for(self.single_trader)
+        for index in range(self.TRADES):
+            response = client.post(
+                "/trades/create/",
+                self.payload(index),
+                format="json",
+            )
+            self.assertEqual(response.status_code, 201)
+
+        bulk = self.history(self.bulk_trader)
+        single = self.history(self.single_trader)
+        self.assertEqual(bulk, single)
+        self.assertEqual(bulk["badges"], {"first", "steady"})
+        self.assertEqual(bulk["actions"][("trade_bonus", 1)], self.TRADES // 2)
 
-# Create your tests here.
+        single_points = [
+            int(message.split()[0])
+            for message in Notification.objects.filter(
+                user=self.single_trader,
+                type="points",
+            ).values_list("message", flat=True)
+        ]
+        self.assertEqual(len(single_points), self.TRADES)
+        self.assertEqual(
+            list(
+                Notification.objects.filter(user=self.bulk_trader, type="points")
+                .values_list("title", "message")
+            ),
+            [
+                (
+                    "Trades Logged",
+                    f"+{sum(single_points)} OP earned for logging {self.TRADES} trades",
+                )
+            ],
+        )
+        self.assertEqual(
+            Counter(
+                Notification.objects.filter(user=self.bulk_trader, type="badge")
+                .values_list("message", flat=True)
+            ),
+            Counter(
+                Notification.objects.filter(user=self.single_trader, type="badge")
+                .values_list("message", flat=True)
+            ),
+        )
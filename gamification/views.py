@@ -5,6 +5,8 @@ from django.db.models import Sum
 
 from drf_spectacular.utils import extend_schema, OpenApiExample
 
+from common.views import ReplicaReadMixin
+
 from .models import OPHistory, UserBadge, Notification
 from .serializers import (
     OPHistorySerializer,
@@ -75,7 +77,7 @@ class BadgeView(APIView):
         return Response(UserBadgeSerializer(badges, many=True).data)
 
 
-class LeaderboardView(APIView):
+class LeaderboardView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     @extend_schema(
@@ -110,7 +112,8 @@ class LeaderboardView(APIView):
             .annotate(total_op=Sum("points"))
             .order_by("-total_op")[:10]
         )
-        return Response(data)
+        # Evaluate here: the response renders after the replica is released.
+        return Response(list(data))
 
 
 class NotificationView(APIView):
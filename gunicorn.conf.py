@@ -0,0 +1,16 @@
+# Read by gunicorn from the working directory, e.g. the Procfile's web process.
+
+
+def post_worker_init(worker):
+    # Load the asset cache before the worker's first request rather than
+    # on it. A failure here is left to the lazy load on first lookup.
+    from django.db import connections
+
+    from trades.assets import asset_cache
+
+    try:
+        asset_cache.sync()
+    except Exception as error:
+        worker.log.warning("Asset cache not warmed: %s", error)
+    finally:
+        connections.close_all()
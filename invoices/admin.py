@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Invoice
+from .models import Invoice, InvoicePDFJob, InvoiceSequence
+from .services import InvoicePDFService
 
 
 @admin.register(Invoice)
@@ -11,12 +12,60 @@ class InvoiceAdmin(admin.ModelAdmin):
         "asset_symbol",
         "amount",
         "status",
+        "pdf_status",
         "issued_at",
     )
-    list_filter = ("status", "issued_at", "desk_name")
+    list_filter = ("status", "pdf_status", "issued_at", "desk_name")
     search_fields = ("invoice_number", "trader__email",
                      "desk_name", "asset_symbol")
-    readonly_fields = ("invoice_number", "issued_at", "pdf_url")
+    readonly_fields = (
+        "invoice_number",
+        "issued_at",
+        "pdf_url",
+        "pdf_status",
+        "pdf_sha256",
+    )
+    actions = ["regenerate_pdf"]
+
+    @admin.action(description="Regenerate PDF")
+    def regenerate_pdf(self, request, queryset):
+        for invoice in queryset:
+            InvoicePDFService.requeue(invoice)
+        self.message_user(request, f"Queued {queryset.count()} PDF(s).")
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(InvoicePDFJob)
+class InvoicePDFJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "invoice",
+        "status",
+        "attempts",
+        "run_after",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status",)
+    search_fields = ("invoice__invoice_number",)
+    ordering = ("-created_at",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(InvoiceSequence)
+class InvoiceSequenceAdmin(admin.ModelAdmin):
+    list_display = ("year", "scope", "last_number", "updated_at")
+    readonly_fields = ("year", "scope", "last_number", "updated_at")
+
+    def has_add_permission(self, request):
+        return False
 
     def has_delete_permission(self, request, obj=None):
         return False
@@ -0,0 +1,36 @@
+from common.pdf import DocumentTemplate, Fields, Gap, Text
+
+
+INVOICE_PDF = DocumentTemplate(
+    Text("INVOICE", style="Title"),
+    Gap(20),
+    Fields(
+        [
+            ("Invoice Number", "{invoice_number}"),
+            ("Issued At", "{issued_at}"),
+            ("Desk", "{desk_name}"),
+            ("Asset", "{asset_symbol}"),
+            ("Amount (NGN)", "{amount}"),
+            ("Status", "{status}"),
+        ]
+    ),
+    Gap(20),
+    Text("Billed To: {client_email}", when="client_email"),
+)
+
+
+def invoice_context(invoice):
+    return {
+        "invoice_number": invoice.invoice_number,
+        "issued_at": invoice.issued_at.strftime("%Y-%m-%d %H:%M"),
+        "desk_name": invoice.desk_name,
+        "asset_symbol": invoice.asset_symbol,
+        "amount": f"{invoice.amount:,.2f}",
+        "status": invoice.get_status_display(),
+        "client_email": invoice.client_email,
+    }
+
+
+def render_invoice(context):
+    """Render an ``invoice_context()``; importable by pool workers."""
+    return INVOICE_PDF.render(context)
@@ -0,0 +1,110 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from invoices.services import InvoicePDFService, InvoiceService
+from trades.filters import TradeFilter
+from trades.models import Trade
+
+
+class Command(BaseCommand):
+    help = (
+        "Invoice many trades at once: numbers are allocated in one batch and "
+        "PDFs are rendered in a process pool, one worker per core."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "trade_ids",
+            nargs="*",
+            type=int,
+            help="Trades to invoice (default: every trade matching --filter)",
+        )
+        parser.add_argument(
+            "--filter",
+            action="append",
+            default=[],
+            metavar="NAME=VALUE",
+            help="Trade list filter, e.g. start_date=2025-01-01; repeatable",
+        )
+        parser.add_argument("--client-email", default="")
+        parser.add_argument(
+            "--send-when-ready",
+            action="store_true",
+            help="Email each PDF to --client-email once it is uploaded",
+        )
+        parser.add_argument(
+            "--queue",
+            action="store_true",
+            help="Leave rendering to run_invoice_pdf_jobs instead",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Render processes (default: CPU count)",
+        )
+
+    def handle(self, *args, **options):
+        if not options["trade_ids"] and not options["filter"]:
+            raise CommandError("Pass trade ids or at least one --filter.")
+        if options["send_when_ready"] and not options["client_email"]:
+            raise CommandError("--send-when-ready needs --client-email.")
+
+        try:
+            params = dict(value.split("=", 1) for value in options["filter"])
+        except ValueError:
+            raise CommandError("Filters must look like NAME=VALUE.")
+
+        trade_filter = TradeFilter(params, queryset=Trade.objects.all())
+        if not trade_filter.is_valid():
+            raise CommandError(f"Invalid filters: {trade_filter.errors.as_json()}")
+        trades = trade_filter.qs
+        if options["trade_ids"]:
+            trades = trades.filter(pk__in=options["trade_ids"])
+            missing = set(options["trade_ids"]) - set(
+                trades.values_list("pk", flat=True)
+            )
+            for trade_id in sorted(missing):
+                self.stderr.write(f"trade {trade_id}: not found")
+
+        invoices, skipped = InvoiceService.bulk_create_invoices(
+            trades,
+            client_email=options["client_email"],
+            send_when_ready=options["send_when_ready"],
+        )
+        for trade in skipped:
+            self.stdout.write(f"trade {trade.pk}: skipped, already invoiced")
+
+        if options["queue"] or not invoices:
+            for invoice in invoices:
+                self.stdout.write(
+                    f"trade {invoice.trade_id}: {invoice.invoice_number} queued"
+                )
+            return
+
+        start = time.perf_counter()
+        results = InvoicePDFService.render_many(invoices, options["workers"])
+        elapsed = time.perf_counter() - start
+
+        failures = 0
+        for invoice in invoices:
+            error = results.get(invoice.pk)
+            if error is None:
+                status = "queued"
+            elif error:
+                failures += 1
+                status = f"failed: {error}"
+            else:
+                status = "ready"
+            self.stdout.write(
+                f"trade {invoice.trade_id}: {invoice.invoice_number} {status}"
+            )
+
+        summary = (
+            f"Invoiced {len(invoices)} trades, {failures} PDF failures, "
+            f"{elapsed:.1f}s rendering and uploading."
+        )
+        if failures:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,20 @@
+from common.jobs import JobWorkerCommand
+from invoices.models import InvoicePDFJob
+from invoices.services import InvoicePDFService
+
+
+class Command(JobWorkerCommand):
+    help = "Render and upload queued invoice PDFs."
+
+    job_model = InvoicePDFJob
+
+    def get_queryset(self):
+        return InvoicePDFJob.objects.select_related("invoice")
+
+    def run_job(self, job):
+        try:
+            InvoicePDFService.run(job)
+        except Exception:
+            # Let pollers see whether another attempt is coming.
+            InvoicePDFService.record_failure(job)
+            raise
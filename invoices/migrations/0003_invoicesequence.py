@@ -0,0 +1,68 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:25
+
+import re
+
+from django.db import migrations, models
+
+
+def backfill_sequences(apps, schema_editor):
+    Invoice = apps.get_model("invoices", "Invoice")
+    InvoiceSequence = apps.get_model("invoices", "InvoiceSequence")
+
+    # Numbers were count()+1 per year, so continue after the highest one.
+    last_numbers = {}
+    for number in Invoice.objects.values_list("invoice_number", flat=True):
+        match = re.fullmatch(r"OTC-(\d{4})-(\d+)", number)
+        if match:
+            year, value = int(match[1]), int(match[2])
+            last_numbers[year] = max(last_numbers.get(year, 0), value)
+
+    InvoiceSequence.objects.bulk_create(
+        [
+            InvoiceSequence(year=year, scope="", last_number=last_number)
+            for year, last_number in last_numbers.items()
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("invoices", "0002_alter_invoice_issued_at_alter_invoice_pdf_url_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InvoiceSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("year", models.PositiveSmallIntegerField()),
+                (
+                    "scope",
+                    models.CharField(
+                        blank=True,
+                        help_text="Empty for firm-wide numbering, else e.g. desk:3",
+                        max_length=30,
+                    ),
+                ),
+                ("last_number", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("year", "scope"),
+                        name="invoice_sequence_year_scope_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_sequences, migrations.RunPython.noop),
+    ]
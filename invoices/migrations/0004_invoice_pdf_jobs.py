@@ -0,0 +1,108 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_pdf_status(apps, schema_editor):
+    Invoice = apps.get_model("invoices", "Invoice")
+    InvoicePDFJob = apps.get_model("invoices", "InvoicePDFJob")
+
+    Invoice.objects.filter(pdf_url__isnull=False).exclude(pdf_url="").update(
+        pdf_status="ready",
+    )
+
+    # Invoices whose inline render or upload failed get a queued job.
+    missing = Invoice.objects.exclude(pdf_status="ready").values_list(
+        "pk",
+        flat=True,
+    )
+    InvoicePDFJob.objects.bulk_create(
+        [InvoicePDFJob(invoice_id=pk) for pk in missing.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("invoices", "0003_invoicesequence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invoice",
+            name="pdf_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("rendering", "Rendering"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                max_length=10,
+            ),
+        ),
+        migrations.CreateModel(
+            name="InvoicePDFJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("max_attempts", models.PositiveSmallIntegerField(default=3)),
+                ("last_error", models.TextField(blank=True)),
+                ("run_after", models.DateTimeField(default=django.utils.timezone.now)),
+                ("heartbeat_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "send_when_ready",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Email the PDF to the client once it is uploaded",
+                    ),
+                ),
+                (
+                    "invoice",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pdf_job",
+                        to="invoices.invoice",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "abstract": False,
+                "indexes": [
+                    models.Index(
+                        fields=["status", "run_after"],
+                        name="invoices_invoicepdfjob_queue",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_pdf_status, migrations.RunPython.noop),
+    ]
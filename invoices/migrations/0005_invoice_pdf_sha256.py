@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("invoices", "0004_invoice_pdf_jobs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invoice",
+            name="pdf_sha256",
+            field=models.CharField(
+                blank=True,
+                help_text="SHA-256 of the current PDF, the local cache key",
+                max_length=64,
+            ),
+        ),
+    ]
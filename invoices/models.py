@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from common.models import BackgroundJob
 from trades.models import Trade
 
 User = settings.AUTH_USER_MODEL
@@ -12,6 +13,18 @@ class Invoice(models.Model):
         ("cancelled", "Cancelled"),
     )
 
+    PDF_PENDING = "pending"
+    PDF_RENDERING = "rendering"
+    PDF_READY = "ready"
+    PDF_FAILED = "failed"
+
+    PDF_STATUS_CHOICES = (
+        (PDF_PENDING, "Pending"),
+        (PDF_RENDERING, "Rendering"),
+        (PDF_READY, "Ready"),
+        (PDF_FAILED, "Failed"),
+    )
+
     invoice_number = models.CharField(
         max_length=30,
         unique=True,
@@ -58,6 +71,18 @@ class Invoice(models.Model):
         help_text="Private Cloudinary PDF URL",
     )
 
+    pdf_status = models.CharField(
+        max_length=10,
+        choices=PDF_STATUS_CHOICES,
+        default=PDF_PENDING,
+    )
+
+    pdf_sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="SHA-256 of the current PDF, the local cache key",
+    )
+
     client_email = models.EmailField(
         blank=True,
     )
@@ -72,3 +97,54 @@ class Invoice(models.Model):
 
     def __str__(self):
         return self.invoice_number
+
+
+class InvoicePDFJob(BackgroundJob):
+    """Renders and uploads one invoice PDF in the ``run_invoice_pdf_jobs`` worker."""
+
+    invoice = models.OneToOneField(
+        Invoice,
+        on_delete=models.CASCADE,
+        related_name="pdf_job",
+    )
+
+    send_when_ready = models.BooleanField(
+        default=False,
+        help_text="Email the PDF to the client once it is uploaded",
+    )
+
+    class Meta(BackgroundJob.Meta):
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Invoice PDF #{self.pk} ({self.invoice_id}, {self.status})"
+
+
+class InvoiceSequence(models.Model):
+    """
+    Last invoice number issued in one year, firm-wide or for one desk.
+
+    Incremented with an UPDATE in the same transaction as the invoice
+    insert, so the row lock orders concurrent invoices and a rolled-back
+    invoice hands its number back.
+    """
+
+    year = models.PositiveSmallIntegerField()
+    scope = models.CharField(
+        max_length=30,
+        blank=True,
+        help_text="Empty for firm-wide numbering, else e.g. desk:3",
+    )
+    last_number = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["year", "scope"],
+                name="invoice_sequence_year_scope_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.year} {self.scope or 'all'} #{self.last_number}"
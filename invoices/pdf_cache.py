@@ -0,0 +1,138 @@
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import requests
+from django.conf import settings
+
+
+class PDFFetchError(Exception):
+    pass
+
+
+class PDFCache:
+    """
+    Size-bounded on-disk LRU of invoice PDFs.
+
+    Files are named after the invoice number and the SHA-256 of their
+    bytes, so a regenerated PDF never serves stale content and entries
+    need no invalidation. Hits refresh the file's mtime; once the
+    directory grows past ``max_bytes`` the least recently used files are
+    removed. Writes go through a temporary file and ``os.replace``, so
+    workers sharing the directory never see partial PDFs.
+    """
+
+    FETCH_TIMEOUT = 30
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+    def path(self, invoice_number, sha256):
+        return self.directory / f"{invoice_number}.{sha256}.pdf"
+
+    def get(self, invoice):
+        """Return the cached path of ``invoice``'s current PDF, or None."""
+        if not invoice.pdf_sha256:
+            return None
+
+        path = self.path(invoice.invoice_number, invoice.pdf_sha256)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, invoice_number, data):
+        """Store ``data`` and return its SHA-256 hex digest."""
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.path(invoice_number, sha256)
+
+        if path.exists():
+            os.utime(path)
+        else:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as temp:
+                    temp.write(data)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+            self.evict(keep=path)
+
+        return sha256
+
+    def get_or_fetch(self, invoice):
+        """
+        Return a path to ``invoice``'s PDF, downloading it on a miss.
+
+        A download whose hash differs from ``invoice.pdf_sha256`` (or an
+        invoice generated before the cache existed) updates the stored
+        hash. Raises ``PDFFetchError`` if the PDF cannot be retrieved.
+        """
+        path = self.get(invoice)
+        if path is not None:
+            return path
+
+        try:
+            response = requests.get(invoice.pdf_url, timeout=self.FETCH_TIMEOUT)
+        except requests.RequestException as exc:
+            raise PDFFetchError(str(exc)) from exc
+        if response.status_code != 200:
+            raise PDFFetchError(f"HTTP {response.status_code}")
+
+        sha256 = self.put(invoice.invoice_number, response.content)
+        if sha256 != invoice.pdf_sha256:
+            invoice.pdf_sha256 = sha256
+            type(invoice).objects.filter(pk=invoice.pk).update(pdf_sha256=sha256)
+
+        return self.path(invoice.invoice_number, sha256)
+
+    def open(self, invoice):
+        """
+        Open ``invoice``'s PDF for reading, downloading it on a miss.
+
+        The open file stays readable if the entry is evicted meanwhile.
+        """
+        for _ in range(2):
+            try:
+                return open(self.get_or_fetch(invoice), "rb")
+            except FileNotFoundError:
+                # Evicted between lookup and open; the next pass refetches.
+                continue
+        raise PDFFetchError("Cache entry was evicted while opening")
+
+    def evict(self, keep=None):
+        """Remove least recently used PDFs until under ``max_bytes``."""
+        with self.lock:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if not entry.name.endswith(".pdf"):
+                        continue
+                    stat = entry.stat()
+                    total += stat.st_size
+                    if entry.path != str(keep):
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+pdf_cache = PDFCache(
+    settings.INVOICE_PDF_CACHE_DIR,
+    settings.INVOICE_PDF_CACHE_SIZE,
+)
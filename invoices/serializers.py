@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from common.serializers import ValuesListSerializer
+
 from .models import Invoice
 
 
@@ -15,6 +17,7 @@ class InvoiceSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Invoice
+        list_serializer_class = ValuesListSerializer
         fields = [
             "id",
             "invoice_number",
@@ -24,6 +27,7 @@ class InvoiceSerializer(serializers.ModelSerializer):
             "asset_symbol",
             "amount",
             "status",
+            "pdf_status",
             "pdf_url",
             "client_email",
             "issued_at",
@@ -38,6 +42,7 @@ class InvoiceSerializer(serializers.ModelSerializer):
             "asset_symbol",
             "amount",
             "status",
+            "pdf_status",
             "pdf_url",
             "issued_at",
         ]
@@ -48,3 +53,62 @@ class InvoiceCreateSerializer(serializers.Serializer):
         required=False,
         allow_blank=True,
     )
+
+    send_when_ready = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Email the PDF to client_email as soon as it is ready",
+    )
+
+    def validate(self, attrs):
+        if attrs.get("send_when_ready") and not attrs.get("client_email"):
+            raise serializers.ValidationError(
+                {"client_email": "Required when send_when_ready is set."}
+            )
+        return attrs
+
+
+class InvoiceBulkCreateSerializer(serializers.Serializer):
+    MAX_TRADES = 1000
+
+    trade_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        max_length=MAX_TRADES,
+    )
+
+    filters = serializers.DictField(
+        required=False,
+        help_text="Trade list filters, e.g. start_date and end_date",
+    )
+
+    client_email = serializers.EmailField(
+        required=False,
+        allow_blank=True,
+        default="",
+    )
+
+    send_when_ready = serializers.BooleanField(
+        required=False,
+        default=False,
+    )
+
+    def validate(self, attrs):
+        if ("trade_ids" in attrs) == ("filters" in attrs):
+            raise serializers.ValidationError(
+                "Pass either trade_ids or filters."
+            )
+        if attrs["send_when_ready"] and not attrs["client_email"]:
+            raise serializers.ValidationError(
+                {"client_email": "Required when send_when_ready is set."}
+            )
+        return attrs
+
+
+class InvoiceBulkResultSerializer(serializers.Serializer):
+    trade_id = serializers.IntegerField()
+    status = serializers.ChoiceField(
+        choices=("created", "already_invoiced", "not_found"),
+    )
+    invoice = InvoiceSerializer(allow_null=True)
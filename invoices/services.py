@@ -1,19 +1,71 @@
+import multiprocessing
+import os
+import traceback
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import connections, transaction
+from django.db.models import F
 from django.utils import timezone
 from io import BytesIO
 
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
-from reportlab.lib.styles import getSampleStyleSheet
-
-from .models import Invoice
+from .documents import invoice_context, render_invoice
+from .models import Invoice, InvoicePDFJob, InvoiceSequence
+from .pdf_cache import pdf_cache
+from .signals import invoice_pdf_ready
 from trades.models import Trade
+from trades.services import increment_or_create
+from common import pdf
+from common.jobs import complete_job, fail_job, heartbeat
 from common.storage.cloudinary import upload_private_file
 
 
-def generate_invoice_number():
+@transaction.atomic
+def allocate_invoice_numbers(count=1, desk_id=None):
+    """
+    Reserve ``count`` consecutive invoice numbers for this year.
+
+    The sequence row stays locked until the caller's transaction commits,
+    so call this inside the transaction that inserts the invoices: a
+    concurrent request waits for the commit instead of reusing a number,
+    and a rollback releases the numbers without leaving a gap.
+    """
     year = timezone.now().year
-    count = Invoice.objects.filter(issued_at__year=year).count() + 1
-    return f"OTC-{year}-{str(count).zfill(6)}"
+    scope = f"desk:{desk_id}" if settings.INVOICE_NUMBER_PER_DESK else ""
+
+    increment_or_create(
+        InvoiceSequence,
+        {"year": year, "scope": scope},
+        {"last_number": count},
+        {"updated_at": timezone.now()},
+    )
+    last = (
+        InvoiceSequence.objects
+        .filter(year=year, scope=scope)
+        .values_list("last_number", flat=True)
+        .get()
+    )
+
+    prefix = f"OTC-{year}-D{desk_id}-" if scope else f"OTC-{year}-"
+    return [
+        f"{prefix}{str(number).zfill(6)}"
+        for number in range(last - count + 1, last + 1)
+    ]
+
+
+def generate_invoice_number(desk_id=None):
+    return allocate_invoice_numbers(1, desk_id)[0]
+
+
+def render_pool_size():
+    if settings.INVOICE_RENDER_WORKERS:
+        return settings.INVOICE_RENDER_WORKERS
+    # Affinity is Linux only; elsewhere count every core.
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
 
 
 class InvoiceService:
@@ -21,64 +73,292 @@ class InvoiceService:
     def create_invoice_from_trade(
         trade: Trade,
         client_email: str = "",
+        send_when_ready: bool = False,
     ) -> Invoice:
+        """
+        Create the invoice and queue its PDF for ``run_invoice_pdf_jobs``.
+
+        The invoice is returned with ``pdf_status`` pending; rendering and
+        the Cloudinary upload happen in the worker.
+        """
         if hasattr(trade, "invoice"):
             raise ValueError("Invoice already exists for this trade.")
 
-        invoice = Invoice.objects.create(
-            invoice_number=generate_invoice_number(),
-            trade=trade,
-            trader=trade.trader,
-            desk_name=trade.desk.name,
-            asset_symbol=trade.asset.symbol,
-            amount=trade.amount_ngn,
-            client_email=client_email,
-        )
-
-        pdf_url = InvoiceService.generate_invoice_pdf(invoice)
-        invoice.pdf_url = pdf_url
-        invoice.save(update_fields=["pdf_url"])
+        with transaction.atomic():
+            invoice = Invoice.objects.create(
+                invoice_number=generate_invoice_number(trade.desk_id),
+                trade=trade,
+                trader=trade.trader,
+                desk_name=trade.desk.name,
+                asset_symbol=trade.asset.symbol,
+                amount=trade.amount_ngn,
+                client_email=client_email,
+            )
+            InvoicePDFJob.objects.create(
+                invoice=invoice,
+                send_when_ready=send_when_ready,
+            )
 
         return invoice
 
     @staticmethod
-    def generate_invoice_pdf(invoice: Invoice) -> str:
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        elements = []
-
-        elements.append(Paragraph("INVOICE", styles["Title"]))
-        elements.append(Spacer(1, 20))
-
-        meta_table = Table([
-            ["Invoice Number", invoice.invoice_number],
-            ["Issued At", invoice.issued_at.strftime("%Y-%m-%d %H:%M")],
-            ["Desk", invoice.desk_name],
-            ["Asset", invoice.asset_symbol],
-            ["Amount (NGN)", f"{invoice.amount:,.2f}"],
-            ["Status", invoice.get_status_display()],
-        ])
-
-        elements.append(meta_table)
-        elements.append(Spacer(1, 20))
-
-        if invoice.client_email:
-            elements.append(
-                Paragraph(
-                    f"Billed To: {invoice.client_email}",
-                    styles["Normal"],
+    def bulk_create_invoices(
+        trades,
+        client_email: str = "",
+        send_when_ready: bool = False,
+    ):
+        """
+        Invoice every trade in the ``trades`` queryset in one transaction.
+
+        Trades that already have an invoice are skipped. Numbers are
+        reserved as one block per sequence, invoices and their PDF jobs go
+        in through ``bulk_create``. Returns ``(invoices, skipped_trades)``.
+        """
+        with transaction.atomic():
+            trades = list(
+                trades.select_related("trader", "desk", "asset").order_by("id")
+            )
+            invoiced = set(
+                Invoice.objects
+                .filter(trade_id__in=[trade.pk for trade in trades])
+                .values_list("trade_id", flat=True)
+            )
+            skipped = [trade for trade in trades if trade.pk in invoiced]
+            pending = [trade for trade in trades if trade.pk not in invoiced]
+
+            by_sequence = defaultdict(list)
+            for trade in pending:
+                key = trade.desk_id if settings.INVOICE_NUMBER_PER_DESK else None
+                by_sequence[key].append(trade)
+
+            invoices = []
+            for desk_id, group in by_sequence.items():
+                numbers = allocate_invoice_numbers(len(group), desk_id)
+                invoices.extend(
+                    Invoice(
+                        invoice_number=number,
+                        trade=trade,
+                        trader=trade.trader,
+                        desk_name=trade.desk.name,
+                        asset_symbol=trade.asset.symbol,
+                        amount=trade.amount_ngn,
+                        client_email=client_email,
+                    )
+                    for trade, number in zip(group, numbers)
                 )
+
+            invoices.sort(key=lambda invoice: invoice.trade_id)
+            Invoice.objects.bulk_create(invoices, batch_size=500)
+            InvoicePDFJob.objects.bulk_create(
+                [
+                    InvoicePDFJob(invoice=invoice, send_when_ready=send_when_ready)
+                    for invoice in invoices
+                ],
+                batch_size=500,
             )
 
-        doc.build(elements)
+        return invoices, skipped
 
-        pdf_bytes = buffer.getvalue()
-        buffer.close()
+    @staticmethod
+    def generate_invoice_pdf(invoice: Invoice) -> str:
+        pdf_bytes = InvoiceService.render_invoice_pdf(invoice)
+        return InvoiceService.upload_invoice_pdf(invoice, pdf_bytes)
+
+    @staticmethod
+    def render_invoice_pdf(invoice: Invoice) -> bytes:
+        return render_invoice(invoice_context(invoice))
 
-        cloudinary_url = upload_private_file(
+    @staticmethod
+    def upload_invoice_pdf(invoice: Invoice, pdf_bytes: bytes) -> str:
+        return upload_private_file(
             file_obj=BytesIO(pdf_bytes),
             public_id=f"invoices/{invoice.invoice_number}",
         )
 
-        return cloudinary_url
+    @staticmethod
+    def send_invoice_email(invoice: Invoice, pdf_bytes: bytes) -> None:
+        email = EmailMessage(
+            subject=f"Invoice {invoice.invoice_number}",
+            body=(
+                f"Dear Client,\n\n"
+                f"Please find attached your invoice "
+                f"{invoice.invoice_number}.\n\n"
+                f"Thank you.\n\n"
+                f"OTCBook"
+            ),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[invoice.client_email],
+        )
+
+        email.attach(
+            filename=f"{invoice.invoice_number}.pdf",
+            content=pdf_bytes,
+            mimetype="application/pdf",
+        )
+
+        email.send(fail_silently=False)
+
+
+class InvoicePDFService:
+    @staticmethod
+    def run(job: InvoicePDFJob) -> None:
+        """
+        Render and upload the invoice PDF, then mark the invoice ready.
+
+        The upload overwrites by invoice number, so a retry after a
+        partial run is safe. If ``send_when_ready`` is set the PDF is
+        emailed before the job completes, and a failed send is retried
+        with the rest of the job.
+        """
+        invoice = job.invoice
+        InvoicePDFService.set_status(invoice, Invoice.PDF_RENDERING)
+
+        pdf_bytes = InvoiceService.render_invoice_pdf(invoice)
+        heartbeat(job)
+        pdf_url = InvoiceService.upload_invoice_pdf(invoice, pdf_bytes)
+        heartbeat(job)
+
+        InvoicePDFService.finish(job, pdf_url, pdf_bytes)
+
+    @staticmethod
+    def finish(job: InvoicePDFJob, pdf_url: str, pdf_bytes: bytes) -> None:
+        invoice = job.invoice
+        if job.send_when_ready and invoice.client_email:
+            InvoiceService.send_invoice_email(invoice, pdf_bytes)
+
+        # Seed the local cache so the first download stays on this box.
+        invoice.pdf_sha256 = pdf_cache.put(invoice.invoice_number, pdf_bytes)
+
+        with transaction.atomic():
+            invoice.pdf_url = pdf_url
+            invoice.pdf_status = Invoice.PDF_READY
+            invoice.save(update_fields=["pdf_url", "pdf_status", "pdf_sha256"])
+            complete_job(job)
+
+        invoice_pdf_ready.send(sender=Invoice, invoice=invoice)
+
+    @staticmethod
+    def render_many(invoices, render_workers=None, upload_workers=None):
+        """
+        Render and upload the PDFs of ``invoices`` now, in parallel.
+
+        ReportLab holds the GIL, so documents are built in a process pool
+        with one worker per core from picklable ``invoice_context()``s;
+        uploads wait on the network and share a thread pool. Only jobs
+        still pending are claimed, so a running ``run_invoice_pdf_jobs``
+        worker never takes the same invoice, and failures are rescheduled
+        for it with backoff. Returns ``{invoice_id: error}`` where error is
+        empty on success.
+
+        Must run outside a transaction: connections are closed before the
+        render processes fork.
+        """
+        if transaction.get_connection().in_atomic_block:
+            raise transaction.TransactionManagementError(
+                "render_many() closes connections; call it outside atomic()."
+            )
+
+        now = timezone.now()
+        jobs = InvoicePDFJob.objects.filter(
+            invoice__in=[invoice.pk for invoice in invoices],
+            status=InvoicePDFJob.STATUS_PENDING,
+        )
+        claimed = list(jobs.values_list("pk", flat=True))
+        jobs.filter(pk__in=claimed).update(
+            status=InvoicePDFJob.STATUS_RUNNING,
+            attempts=F("attempts") + 1,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        jobs = list(
+            InvoicePDFJob.objects
+            .select_related("invoice")
+            .filter(
+                pk__in=claimed,
+                status=InvoicePDFJob.STATUS_RUNNING,
+                started_at=now,
+            )
+        )
+        Invoice.objects.filter(pdf_job__in=jobs).update(
+            pdf_status=Invoice.PDF_RENDERING,
+        )
+
+        results = {}
+
+        def failed(job):
+            error = traceback.format_exc()
+            results[job.invoice_id] = error.strip().splitlines()[-1]
+            fail_job(job, error)
+            InvoicePDFService.record_failure(job)
+
+        # Forked workers inherit the styles and fonts built here.
+        pdf.warm()
+        connections.close_all()
+        renderers = ProcessPoolExecutor(
+            render_workers or render_pool_size(),
+            mp_context=multiprocessing.get_context("fork"),
+        )
+        uploaders = ThreadPoolExecutor(
+            upload_workers or settings.INVOICE_UPLOAD_WORKERS,
+        )
+        with renderers, uploaders:
+            rendering = {
+                renderers.submit(render_invoice, invoice_context(job.invoice)): job
+                for job in jobs
+            }
+            uploading = {}
+            for future in as_completed(rendering):
+                job = rendering[future]
+                try:
+                    pdf_bytes = future.result()
+                except Exception:
+                    failed(job)
+                    continue
+                upload = uploaders.submit(
+                    InvoiceService.upload_invoice_pdf,
+                    job.invoice,
+                    pdf_bytes,
+                )
+                uploading[upload] = (job, pdf_bytes)
+
+            for future in as_completed(uploading):
+                job, pdf_bytes = uploading[future]
+                try:
+                    InvoicePDFService.finish(job, future.result(), pdf_bytes)
+                except Exception:
+                    failed(job)
+                else:
+                    results[job.invoice_id] = ""
+
+        return results
+
+    @staticmethod
+    def record_failure(job: InvoicePDFJob) -> None:
+        """Mirror a failed attempt onto the invoice: retrying, or failed for good."""
+        exhausted = job.attempts >= job.max_attempts
+        InvoicePDFService.set_status(
+            job.invoice,
+            Invoice.PDF_FAILED if exhausted else Invoice.PDF_PENDING,
+        )
+
+    @staticmethod
+    def set_status(invoice: Invoice, pdf_status: str) -> None:
+        invoice.pdf_status = pdf_status
+        Invoice.objects.filter(pk=invoice.pk).update(pdf_status=pdf_status)
+
+    @staticmethod
+    def requeue(invoice: Invoice) -> InvoicePDFJob:
+        """Schedule a fresh render of ``invoice``, e.g. after it failed."""
+        with transaction.atomic():
+            job, _ = InvoicePDFJob.objects.update_or_create(
+                invoice=invoice,
+                defaults={
+                    "status": InvoicePDFJob.STATUS_PENDING,
+                    "attempts": 0,
+                    "run_after": timezone.now(),
+                    "last_error": "",
+                    "finished_at": None,
+                },
+            )
+            InvoicePDFService.set_status(invoice, Invoice.PDF_PENDING)
+        return job
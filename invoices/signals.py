@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+
+# Sent by the PDF worker with ``invoice`` once its PDF is uploaded.
+invoice_pdf_ready = Signal()
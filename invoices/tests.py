@@ -1,3 +1,491 @@
-from django.test import TestCase
+import os
+import tempfile
+import threading
+from decimal import Decimal
+from pathlib import Path
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from trades.models import Asset, Trade
+from users.models import Desk, User
+
+from .models import Invoice, InvoicePDFJob, InvoiceSequence
+from .pdf_cache import PDFCache, pdf_cache
+from .serializers import InvoiceBulkCreateSerializer
+from .services import (
+    InvoicePDFService,
+    InvoiceService,
+    allocate_invoice_numbers,
+    render_pool_size,
+)
+
+
+def use_temporary_pdf_cache(test):
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    patcher = mock.patch.object(pdf_cache, "directory", Path(directory.name))
+    patcher.start()
+    test.addCleanup(patcher.stop)
+
+
+def create_trades(trader, asset, count):
+    return [
+        Trade.objects.create(
+            trader=trader,
+            desk=trader.desk,
+            asset=asset,
+            side="buy",
+            trade_type="otc",
+            amount_crypto=Decimal("0.10000000"),
+            amount_ngn=Decimal("100.00"),
+            rate=Decimal("1000.00"),
+            trade_date=timezone.now(),
+        )
+        for _ in range(count)
+    ]
+
+
+class InvoiceNumberTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.desk = Desk.objects.create(name="Numbering Desk")
+
+    def test_numbers_are_consecutive(self):
+        year = timezone.now().year
+
+        first = allocate_invoice_numbers()
+        batch = allocate_invoice_numbers(3)
+
+        self.assertEqual(first, [f"OTC-{year}-000001"])
+        self.assertEqual(
+            batch,
+            [f"OTC-{year}-00000{number}" for number in (2, 3, 4)],
+        )
+
+    def test_rollback_returns_numbers(self):
+        with transaction.atomic():
+            allocate_invoice_numbers(5)
+            transaction.set_rollback(True)
+
+        year = timezone.now().year
+        self.assertEqual(allocate_invoice_numbers(), [f"OTC-{year}-000001"])
+
+    @override_settings(INVOICE_NUMBER_PER_DESK=True)
+    def test_desks_number_independently(self):
+        year = timezone.now().year
+        other = Desk.objects.create(name="Other Desk")
+
+        allocate_invoice_numbers(2, self.desk.pk)
+
+        self.assertEqual(
+            allocate_invoice_numbers(1, other.pk),
+            [f"OTC-{year}-D{other.pk}-000001"],
+        )
+        self.assertEqual(
+            InvoiceSequence.objects.get(scope=f"desk:{self.desk.pk}").last_number,
+            2,
+        )
+
+
+class ConcurrentInvoiceTests(TransactionTestCase):
+    WORKERS = 8
+    INVOICES_PER_WORKER = 5
+
+    def setUp(self):
+        desk = Desk.objects.create(name="Stress Desk")
+        trader = User.objects.create_user(
+            email="stress@otcbook.com",
+            password="password",
+            full_name="Stress Trader",
+            role="trader",
+            desk=desk,
+        )
+        asset = Asset.objects.create(symbol="BTC")
+        self.trades = create_trades(
+            trader,
+            asset,
+            self.WORKERS * self.INVOICES_PER_WORKER,
+        )
+
+    def test_concurrent_invoices_get_unique_gap_free_numbers(self):
+        barrier = threading.Barrier(self.WORKERS)
+        errors = []
+
+        def work(trades):
+            barrier.wait()
+            try:
+                for trade in trades:
+                    InvoiceService.create_invoice_from_trade(trade)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=work, args=(self.trades[index::self.WORKERS],))
+            for index in range(self.WORKERS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        total = len(self.trades)
+        year = timezone.now().year
+        self.assertEqual(
+            sorted(Invoice.objects.values_list("invoice_number", flat=True)),
+            [f"OTC-{year}-{str(number).zfill(6)}" for number in range(1, total + 1)],
+        )
+        self.assertEqual(InvoiceSequence.objects.get().last_number, total)
+
+
+PDF_URL = "https://res.cloudinary.com/otcbook/raw/private/invoice.pdf"
+
+
+class InvoicePDFPipelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="PDF Desk")
+        cls.trader = User.objects.create_user(
+            email="pdf@otcbook.com",
+            password="password",
+            full_name="PDF Trader",
+            role="trader",
+            desk=desk,
+        )
+        cls.trade = create_trades(cls.trader, Asset.objects.create(symbol="BTC"), 1)[0]
+
+    def setUp(self):
+        # Request throttle counters live in the cache.
+        cache.clear()
+        use_temporary_pdf_cache(self)
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def create_invoice(self, **data):
+        return self.client.post(
+            f"/invoice/create/{self.trade.pk}/",
+            data,
+            format="json",
+        )
+
+    def run_worker(self):
+        call_command("run_invoice_pdf_jobs", "--once", stdout=StringIO(), stderr=StringIO())
+
+    @mock.patch("invoices.services.upload_private_file")
+    def test_create_queues_pdf_without_rendering(self, upload):
+        response = self.create_invoice(client_email="client@example.com")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["pdf_status"], Invoice.PDF_PENDING)
+        self.assertIsNone(response.json()["pdf_url"])
+        upload.assert_not_called()
+        self.assertTrue(
+            InvoicePDFJob.objects.filter(invoice_id=response.json()["id"]).exists()
+        )
+
+    @mock.patch("invoices.services.upload_private_file", return_value=PDF_URL)
+    def test_worker_renders_uploads_and_notifies(self, upload):
+        invoice_id = self.create_invoice(
+            client_email="client@example.com",
+            send_when_ready=True,
+        ).json()["id"]
+
+        self.run_worker()
+
+        response = self.client.get(f"/invoice/{invoice_id}/")
+        self.assertEqual(response.json()["pdf_status"], Invoice.PDF_READY)
+        self.assertEqual(response.json()["pdf_url"], PDF_URL)
+        pdf = upload.call_args.kwargs["file_obj"].getvalue()
+        self.assertTrue(pdf.startswith(b"%PDF"))
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["client@example.com"])
+        self.assertEqual(mail.outbox[0].attachments[0][1], pdf)
+
+    @mock.patch(
+        "invoices.services.upload_private_file",
+        side_effect=TimeoutError("upload timed out"),
+    )
+    def test_failed_uploads_retry_then_fail(self, upload):
+        invoice_id = self.create_invoice().json()["id"]
+        job = InvoicePDFJob.objects.get(invoice_id=invoice_id)
+
+        for attempt in range(1, job.max_attempts + 1):
+            InvoicePDFJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            self.run_worker()
+            job.refresh_from_db()
+            self.assertEqual(job.attempts, attempt)
+
+        self.assertEqual(job.status, InvoicePDFJob.STATUS_FAILED)
+        self.assertIn("upload timed out", job.last_error)
+        self.assertEqual(
+            Invoice.objects.get(pk=invoice_id).pdf_status,
+            Invoice.PDF_FAILED,
+        )
+        self.assertEqual(upload.call_count, job.max_attempts)
+
+    def test_download_waits_for_pdf(self):
+        invoice_id = self.create_invoice().json()["id"]
+
+        response = self.client.get(f"/invoice/{invoice_id}/download/")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["pdf_status"], Invoice.PDF_PENDING)
+
+
+class BulkInvoiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="Bulk Invoice Desk")
+        cls.trader = User.objects.create_user(
+            email="bulk-invoice@otcbook.com",
+            password="password",
+            full_name="Bulk Invoice Trader",
+            role="trader",
+            desk=desk,
+        )
+        other = User.objects.create_user(
+            email="other-invoice@otcbook.com",
+            password="password",
+            full_name="Other Trader",
+            role="trader",
+            desk=desk,
+        )
+        asset = Asset.objects.create(symbol="BTC")
+        cls.trades = create_trades(cls.trader, asset, 4)
+        cls.other_trade = create_trades(other, asset, 1)[0]
+
+    def setUp(self):
+        # Request throttle counters live in the cache.
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def test_reports_outcome_per_trade(self):
+        InvoiceService.create_invoice_from_trade(self.trades[0])
+        trade_ids = [trade.pk for trade in self.trades] + [self.other_trade.pk]
+
+        response = self.client.post(
+            "/invoice/bulk/",
+            {"trade_ids": trade_ids},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        results = response.json()
+        self.assertEqual(
+            [(result["trade_id"], result["status"]) for result in results],
+            [
+                (self.trades[0].pk, "already_invoiced"),
+                *[(trade.pk, "created") for trade in self.trades[1:]],
+                (self.other_trade.pk, "not_found"),
+            ],
+        )
+
+        year = timezone.now().year
+        self.assertEqual(
+            [result["invoice"]["invoice_number"] for result in results[1:4]],
+            [f"OTC-{year}-00000{number}" for number in (2, 3, 4)],
+        )
+        self.assertEqual(
+            InvoicePDFJob.objects.filter(
+                status=InvoicePDFJob.STATUS_PENDING,
+            ).count(),
+            4,
+        )
+
+    def test_filters_select_trades(self):
+        response = self.client.post(
+            "/invoice/bulk/",
+            {"filters": {"side": "sell"}},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), [])
+        self.assertFalse(Invoice.objects.exists())
+
+    @mock.patch.object(InvoiceBulkCreateSerializer, "MAX_TRADES", 3)
+    def test_broad_filters_are_rejected(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/invoice/bulk/",
+                {"filters": {"side": "buy"}},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["detail"],
+            "4 trades match; invoice at most 3 per request.",
+        )
+        self.assertFalse(Invoice.objects.exists())
+        self.assertTrue(
+            any(query["sql"].endswith("LIMIT 4") for query in queries),
+        )
+
+    def test_requires_one_selection(self):
+        response = self.client.post(
+            "/invoice/bulk/",
+            {"trade_ids": [self.trades[0].pk], "filters": {"side": "buy"}},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+@mock.patch("invoices.services.upload_private_file")
+class BulkInvoiceRenderTests(TransactionTestCase):
+    def setUp(self):
+        desk = Desk.objects.create(name="Render Pool Desk")
+        trader = User.objects.create_user(
+            email="render-pool@otcbook.com",
+            password="password",
+            full_name="Render Pool Trader",
+            role="trader",
+            desk=desk,
+        )
+        self.trades = create_trades(trader, Asset.objects.create(symbol="BTC"), 6)
+        use_temporary_pdf_cache(self)
+
+    def test_command_renders_in_process_pool(self, upload):
+        def uploaded(*, file_obj, public_id):
+            if public_id.endswith("000003"):
+                raise TimeoutError("upload timed out")
+            self.assertTrue(file_obj.getvalue().startswith(b"%PDF"))
+            return f"https://res.cloudinary.com/otcbook/{public_id}.pdf"
+
+        upload.side_effect = uploaded
+        stdout = StringIO()
+
+        call_command(
+            "bulk_invoice",
+            *[str(trade.pk) for trade in self.trades],
+            "--workers=2",
+            stdout=stdout,
+        )
+
+        invoices = Invoice.objects.order_by("invoice_number")
+        self.assertEqual(
+            [invoice.pdf_status for invoice in invoices],
+            [Invoice.PDF_READY] * 2 + [Invoice.PDF_PENDING] + [Invoice.PDF_READY] * 3,
+        )
+        self.assertEqual(upload.call_count, 6)
+        self.assertIn("000003 failed: TimeoutError: upload timed out", stdout.getvalue())
+
+        failed = InvoicePDFJob.objects.get(status=InvoicePDFJob.STATUS_PENDING)
+        self.assertEqual(failed.attempts, 1)
+        self.assertGreater(failed.run_after, timezone.now())
+
+
+@override_settings(INVOICE_RENDER_WORKERS=0)
+class RenderPoolSizeTests(SimpleTestCase):
+    def test_counts_cores_where_affinity_is_missing(self):
+        # macOS and Windows have no os.sched_getaffinity.
+        with mock.patch("invoices.services.os", spec=["cpu_count"]) as fake_os:
+            fake_os.cpu_count.return_value = 3
+            self.assertEqual(render_pool_size(), 3)
+
+
+class InvoicePDFCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="Cache Desk")
+        cls.trader = User.objects.create_user(
+            email="cache@otcbook.com",
+            password="password",
+            full_name="Cache Trader",
+            role="trader",
+            desk=desk,
+        )
+        trade = create_trades(cls.trader, Asset.objects.create(symbol="BTC"), 1)[0]
+        cls.invoice = Invoice.objects.create(
+            invoice_number="OTC-2025-000001",
+            trade=trade,
+            trader=cls.trader,
+            desk_name=desk.name,
+            asset_symbol="BTC",
+            amount=trade.amount_ngn,
+            client_email="client@example.com",
+            pdf_url=PDF_URL,
+            pdf_status=Invoice.PDF_READY,
+        )
+
+    def setUp(self):
+        # Request throttle counters live in the cache.
+        cache.clear()
+        use_temporary_pdf_cache(self)
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def download(self):
+        response = self.client.get(f"/invoice/{self.invoice.pk}/download/")
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    @mock.patch("invoices.pdf_cache.requests.get")
+    def test_first_fetch_fills_cache(self, get):
+        get.return_value = mock.Mock(status_code=200, content=b"%PDF-1.4 stored")
+
+        self.assertEqual(self.download(), b"%PDF-1.4 stored")
+        self.assertEqual(self.download(), b"%PDF-1.4 stored")
+        response = self.client.post(f"/invoice/{self.invoice.pk}/send/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox[0].attachments[0][1], b"%PDF-1.4 stored")
+        self.assertEqual(get.call_count, 1)
+        self.invoice.refresh_from_db()
+        self.assertEqual(len(self.invoice.pdf_sha256), 64)
+
+    @mock.patch("invoices.pdf_cache.requests.get")
+    def test_fetch_failure_is_bad_gateway(self, get):
+        get.return_value = mock.Mock(status_code=404, content=b"")
+
+        response = self.client.get(f"/invoice/{self.invoice.pk}/download/")
+
+        self.assertEqual(response.status_code, 502)
+
+    @mock.patch("invoices.pdf_cache.requests.get")
+    @mock.patch("invoices.services.upload_private_file", return_value=PDF_URL)
+    def test_generated_pdf_is_served_locally(self, upload, get):
+        InvoicePDFService.requeue(self.invoice)
+        call_command("run_invoice_pdf_jobs", "--once", stdout=StringIO(), stderr=StringIO())
+
+        pdf = upload.call_args.kwargs["file_obj"].getvalue()
+        self.assertEqual(self.download(), pdf)
+        get.assert_not_called()
+
+    def test_least_recently_used_files_are_evicted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            lru = PDFCache(directory, max_bytes=250)
+            invoices = [
+                mock.Mock(invoice_number=f"OTC-2025-00000{index}", pdf_sha256="")
+                for index in range(3)
+            ]
+            for index, invoice in enumerate(invoices[:2]):
+                invoice.pdf_sha256 = lru.put(invoice.invoice_number, bytes([index]) * 100)
+                os.utime(lru.get(invoice), (index, index))
+
+            # Reading the first entry makes the second the eviction victim.
+            lru.get(invoices[0])
+            invoices[2].pdf_sha256 = lru.put(invoices[2].invoice_number, b"x" * 100)
+
+            self.assertIsNotNone(lru.get(invoices[0]))
+            self.assertIsNone(lru.get(invoices[1]))
+            self.assertIsNotNone(lru.get(invoices[2]))
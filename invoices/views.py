@@ -1,17 +1,22 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
-from django.core.mail import EmailMessage
-from django.conf import settings
-import requests
+from django.http import FileResponse
 
 from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter
 
 from .models import Invoice
-from .serializers import InvoiceSerializer, InvoiceCreateSerializer
+from .pdf_cache import PDFFetchError, pdf_cache
+from .serializers import (
+    InvoiceSerializer,
+    InvoiceCreateSerializer,
+    InvoiceBulkCreateSerializer,
+    InvoiceBulkResultSerializer,
+)
 from .services import InvoiceService
+from trades.filters import TradeFilter
 from trades.models import Trade
+from common.views import ReplicaReadMixin
 
 
 # =====================================================
@@ -24,7 +29,13 @@ class InvoiceCreateView(generics.CreateAPIView):
 
     @extend_schema(
         summary="Create Invoice from Trade",
-        description="Generate an invoice for a specific trade owned by the authenticated user.",
+        description=(
+            "Generate an invoice for a specific trade owned by the "
+            "authenticated user. The invoice is returned straight away with "
+            "`pdf_status` pending; poll `GET /invoice/<id>/` until it is "
+            "ready, or set `send_when_ready` to email the client the PDF "
+            "as soon as it is uploaded."
+        ),
         parameters=[
             OpenApiParameter(
                 name="trade_id",
@@ -40,7 +51,8 @@ class InvoiceCreateView(generics.CreateAPIView):
             OpenApiExample(
                 "Create Invoice",
                 value={
-                    "client_email": "client@example.com"
+                    "client_email": "client@example.com",
+                    "send_when_ready": True,
                 }
             )
         ],
@@ -59,6 +71,7 @@ class InvoiceCreateView(generics.CreateAPIView):
         invoice = InvoiceService.create_invoice_from_trade(
             trade=trade,
             client_email=serializer.validated_data.get("client_email", ""),
+            send_when_ready=serializer.validated_data["send_when_ready"],
         )
 
         return Response(
@@ -67,11 +80,106 @@ class InvoiceCreateView(generics.CreateAPIView):
         )
 
 
+# =====================================================
+# BULK CREATE INVOICES
+# POST /invoice/bulk/
+# =====================================================
+class InvoiceBulkCreateView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = InvoiceBulkCreateSerializer
+
+    @extend_schema(
+        summary="Bulk Create Invoices",
+        description=(
+            "Invoice up to 1000 of the authenticated user's trades, chosen by "
+            "`trade_ids` or by trade list `filters`. Invoices are numbered "
+            "in one batch and their PDFs are queued for the worker; the "
+            "response reports the outcome for every trade."
+        ),
+        request=InvoiceBulkCreateSerializer,
+        responses={201: InvoiceBulkResultSerializer(many=True), 400: dict},
+        examples=[
+            OpenApiExample(
+                "Month end",
+                value={
+                    "filters": {
+                        "start_date": "2025-01-01",
+                        "end_date": "2025-01-31",
+                    },
+                },
+            )
+        ],
+        tags=["Invoices"],
+    )
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        trades = Trade.objects.filter(trader=request.user)
+        if "filters" in data:
+            trade_filter = TradeFilter(data["filters"], queryset=trades)
+            if not trade_filter.is_valid():
+                return Response(
+                    {"filters": trade_filter.errors},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            trades = trade_filter.qs
+            # One row past the limit is enough to reject a broad filter
+            # without loading the trader's whole history.
+            requested = list(
+                trades.values_list("pk", flat=True)[:serializer.MAX_TRADES + 1]
+            )
+            if len(requested) > serializer.MAX_TRADES:
+                return Response(
+                    {
+                        "detail": (
+                            f"{trades.count()} trades match; invoice at most "
+                            f"{serializer.MAX_TRADES} per request."
+                        )
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        else:
+            # The serializer caps trade_ids at MAX_TRADES.
+            requested = list(dict.fromkeys(data["trade_ids"]))
+            trades = trades.filter(pk__in=requested)
+
+        invoices, skipped = InvoiceService.bulk_create_invoices(
+            trades,
+            client_email=data["client_email"],
+            send_when_ready=data["send_when_ready"],
+        )
+
+        created = {invoice.trade_id: invoice for invoice in invoices}
+        skipped = {trade.pk for trade in skipped}
+        results = []
+        for trade_id in requested:
+            if trade_id in created:
+                outcome = "created"
+            elif trade_id in skipped:
+                outcome = "already_invoiced"
+            else:
+                outcome = "not_found"
+            results.append(
+                {
+                    "trade_id": trade_id,
+                    "status": outcome,
+                    "invoice": created.get(trade_id),
+                }
+            )
+
+        return Response(
+            InvoiceBulkResultSerializer(results, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
 # =====================================================
 # LIST USER INVOICES
 # GET /invoice/list/
 # =====================================================
-class InvoiceListView(generics.ListAPIView):
+class InvoiceListView(ReplicaReadMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = InvoiceSerializer
 
@@ -85,6 +193,30 @@ class InvoiceListView(generics.ListAPIView):
         return Invoice.objects.filter(trader=self.request.user)
 
 
+# =====================================================
+# INVOICE DETAIL / PDF STATUS
+# GET /invoice/<id>/
+# =====================================================
+class InvoiceDetailView(generics.RetrieveAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = InvoiceSerializer
+
+    @extend_schema(
+        summary="Get Invoice",
+        description=(
+            "Retrieve one invoice. Poll `pdf_status` after creating it: "
+            "pending, rendering, ready or failed."
+        ),
+        responses={200: InvoiceSerializer, 404: dict},
+        tags=["Invoices"],
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return Invoice.objects.filter(trader=self.request.user)
+
+
 # =====================================================
 # DOWNLOAD INVOICE PDF
 # GET /invoice/<id>/download/
@@ -122,29 +254,30 @@ class InvoiceDownloadView(generics.RetrieveAPIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        if not invoice.pdf_url:
+        if invoice.pdf_status != Invoice.PDF_READY or not invoice.pdf_url:
             return Response(
-                {"detail": "Invoice PDF not available"},
+                {
+                    "detail": "Invoice PDF not available",
+                    "pdf_status": invoice.pdf_status,
+                },
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        resp = requests.get(invoice.pdf_url, stream=True)
-
-        if resp.status_code != 200:
+        try:
+            pdf = pdf_cache.open(invoice)
+        except PDFFetchError:
             return Response(
                 {"detail": "Unable to retrieve invoice"},
                 status=status.HTTP_502_BAD_GATEWAY,
             )
 
-        response = HttpResponse(
-            resp.content,
+        # A real file, so the server can hand it to sendfile().
+        return FileResponse(
+            pdf,
+            as_attachment=True,
+            filename=f"{invoice.invoice_number}.pdf",
             content_type="application/pdf",
         )
-        response["Content-Disposition"] = (
-            f'attachment; filename="{invoice.invoice_number}.pdf"'
-        )
-
-        return response
 
 
 # =====================================================
@@ -187,40 +320,25 @@ class InvoiceSendView(generics.GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if not invoice.pdf_url:
+        if invoice.pdf_status != Invoice.PDF_READY or not invoice.pdf_url:
             return Response(
-                {"detail": "Invoice PDF not available"},
+                {
+                    "detail": "Invoice PDF not available",
+                    "pdf_status": invoice.pdf_status,
+                },
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        resp = requests.get(invoice.pdf_url)
-
-        if resp.status_code != 200:
+        try:
+            pdf = pdf_cache.open(invoice)
+        except PDFFetchError:
             return Response(
                 {"detail": "Unable to retrieve invoice PDF"},
                 status=status.HTTP_502_BAD_GATEWAY,
             )
 
-        email = EmailMessage(
-            subject=f"Invoice {invoice.invoice_number}",
-            body=(
-                f"Dear Client,\n\n"
-                f"Please find attached your invoice "
-                f"{invoice.invoice_number}.\n\n"
-                f"Thank you.\n\n"
-                f"OTCBook"
-            ),
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[invoice.client_email],
-        )
-
-        email.attach(
-            filename=f"{invoice.invoice_number}.pdf",
-            content=resp.content,
-            mimetype="application/pdf",
-        )
-
-        email.send(fail_silently=False)
+        with pdf:
+            InvoiceService.send_invoice_email(invoice, pdf.read())
 
         return Response(
             {"message": "Invoice sent successfully"},
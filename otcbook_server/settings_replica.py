@@ -0,0 +1,23 @@
+"""
+Settings with ``replica`` as a second SQLite file instead of a mirror.
+
+Rows written to ``default`` never reach it, like a replica that lags
+forever, so tests can tell which alias served a read:
+
+    python manage.py test common --settings=otcbook_server.settings_replica
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import (
+    BASE_DIR,
+    DATABASES,
+    REPLICA_DATABASE_ALIAS,
+    SQLITE_OPTIONS,
+)
+
+DATABASES[REPLICA_DATABASE_ALIAS] = {
+    "ENGINE": "django.db.backends.sqlite3",
+    "NAME": BASE_DIR / "replica.sqlite3",
+    "OPTIONS": SQLITE_OPTIONS,
+    "TEST": {"NAME": BASE_DIR / "test_replica.sqlite3"},
+}
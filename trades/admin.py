@@ -1,5 +1,12 @@
 from django.contrib import admin
-from .models import Trade, Asset
+from .models import (
+    Trade,
+    Asset,
+    TradeDailyRollup,
+    DeskPosition,
+    CostBasisPosition,
+    ExportJob,
+)
 
 
 # Register your models here.
@@ -87,3 +94,133 @@ class TradeAdmin(admin.ModelAdmin):
 
     def has_delete_permission(self, request, obj=None):
         return False
+
+
+@admin.register(TradeDailyRollup)
+class TradeDailyRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        "day",
+        "trader",
+        "desk",
+        "asset",
+        "side",
+        "trade_type",
+        "trade_count",
+        "profit_loss",
+        "amount_ngn",
+    )
+
+    list_filter = (
+        "side",
+        "trade_type",
+        "asset",
+        "desk",
+    )
+
+    date_hierarchy = "day"
+
+    ordering = ("-day",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DeskPosition)
+class DeskPositionAdmin(admin.ModelAdmin):
+    list_display = (
+        "desk",
+        "asset",
+        "quantity",
+        "ngn_flow",
+        "average_cost",
+        "trade_count",
+        "updated_at",
+    )
+
+    list_filter = (
+        "asset",
+        "desk",
+    )
+
+    ordering = ("desk", "asset")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CostBasisPosition)
+class CostBasisPositionAdmin(admin.ModelAdmin):
+    list_display = (
+        "desk",
+        "asset",
+        "method",
+        "quantity",
+        "cost_basis",
+        "realized_pnl",
+        "is_stale",
+        "updated_at",
+    )
+
+    list_filter = (
+        "method",
+        "is_stale",
+        "asset",
+        "desk",
+    )
+
+    ordering = ("desk", "asset")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "requested_by",
+        "scope",
+        "format",
+        "status",
+        "rows_written",
+        "rows_total",
+        "attempts",
+        "created_at",
+        "finished_at",
+    )
+
+    list_filter = (
+        "status",
+        "format",
+        "scope",
+    )
+
+    search_fields = (
+        "requested_by__email",
+    )
+
+    ordering = ("-created_at",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TradesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "trades"
+
+    def ready(self):
+        import trades.checks
+        import trades.signals
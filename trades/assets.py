@@ -0,0 +1,121 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+
+from .models import Asset
+
+
+class AssetCache:
+    """
+    Process-local LRU of ``Asset`` rows keyed by symbol.
+
+    Each worker keeps its own copy and compares it against a generation
+    token in the shared Django cache at most every ``check_interval``
+    seconds; updating or deleting an asset replaces the token, so other
+    workers reload within that interval and the invalidating one at once.
+    The token must live in a shared backend such as Redis, which the
+    ``trades.E001`` deploy check enforces.
+    """
+
+    GENERATION_KEY = "trades:assets:generation"
+
+    def __init__(self, maxsize, check_interval=0):
+        self.maxsize = maxsize
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.generation = None
+        self.checked_at = float("-inf")
+        self.field_names = [field.attname for field in Asset._meta.concrete_fields]
+        self.symbol_index = self.field_names.index("symbol")
+
+    def get_many(self, symbols):
+        """Return ``{symbol: Asset}`` for the cached symbols among ``symbols``."""
+        self.sync()
+
+        found = {}
+        with self.lock:
+            for symbol in symbols:
+                values = self.entries.get(symbol)
+                if values is not None:
+                    self.entries.move_to_end(symbol)
+                    found[symbol] = self.build(values)
+        return found
+
+    def get_or_create(self, symbol):
+        asset = self.get_many([symbol]).get(symbol)
+        if asset is not None:
+            return asset
+
+        # get_or_create retries the SELECT when a concurrent worker wins
+        # the INSERT, so both end up with the same row.
+        asset, created = Asset.objects.get_or_create(
+            symbol=symbol,
+            defaults={
+                "name": symbol,
+                "is_active": True,
+                "is_custom": True,
+            },
+        )
+
+        if created:
+            # Only cache the row once it exists for other connections.
+            transaction.on_commit(lambda: self.put(asset))
+        else:
+            self.put(asset)
+        return asset
+
+    def put(self, asset):
+        values = tuple(getattr(asset, name) for name in self.field_names)
+        with self.lock:
+            self.entries[asset.symbol] = values
+            self.entries.move_to_end(asset.symbol)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def sync(self):
+        now = time.monotonic()
+        fresh = now - self.checked_at < self.check_interval
+        if fresh and self.generation is not None:
+            return
+
+        generation = cache.get_or_set(
+            self.GENERATION_KEY,
+            lambda: uuid.uuid4().hex,
+            None,
+        )
+        self.checked_at = now
+        if generation != self.generation:
+            self.warm(generation)
+
+    def warm(self, generation=None):
+        rows = Asset.objects.values_list(*self.field_names)[:self.maxsize]
+        entries = OrderedDict((row[self.symbol_index], row) for row in rows)
+
+        with self.lock:
+            self.entries = entries
+            self.generation = generation
+
+    def invalidate(self):
+        cache.set(self.GENERATION_KEY, uuid.uuid4().hex, None)
+        with self.lock:
+            self.entries.clear()
+            self.generation = None
+
+    def build(self, values):
+        return Asset.from_db(
+            router.db_for_read(Asset),
+            self.field_names,
+            values,
+        )
+
+
+asset_cache = AssetCache(
+    settings.ASSET_CACHE_SIZE,
+    settings.ASSET_CACHE_CHECK_INTERVAL,
+)
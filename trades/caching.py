@@ -0,0 +1,117 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.views.decorators.http import condition
+
+from .models import TradeBookVersion
+from .services import trader_book_key
+
+
+def get_book_key(request):
+    """
+    The book a request reads: the user's own trades unless the view set
+    ``request.trade_book_key`` (desk-wide views use ``desk:<id>``).
+    """
+    return getattr(request, "trade_book_key", None) or trader_book_key(
+        request.user.pk
+    )
+
+
+def get_book_version(request):
+    """
+    Return ``(version, updated_at)`` for the book the request reads.
+
+    The lookup is a single indexed read, memoised on the request so the
+    ETag and Last-Modified callbacks share it.
+    """
+    if not hasattr(request, "_trade_book_version"):
+        request._trade_book_version = (
+            TradeBookVersion.objects
+            .filter(key=get_book_key(request))
+            .values_list("version", "updated_at")
+            .first()
+        ) or (0, None)
+    return request._trade_book_version
+
+
+def trade_book_etag(request, *args, **kwargs):
+    version, _ = get_book_version(request)
+    variant = hashlib.sha1(
+        f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}".encode()
+    ).hexdigest()[:16]
+    return f"{request.user.pk}-{version}-{variant}"
+
+
+def trade_book_last_modified(request, *args, **kwargs):
+    return get_book_version(request)[1]
+
+
+# Apply with method_decorator to GET handlers: a matching If-None-Match or
+# If-Modified-Since returns 304 before the view runs any of its queries.
+trade_book_condition = condition(
+    etag_func=trade_book_etag,
+    last_modified_func=trade_book_last_modified,
+)
+
+
+class PnLCache:
+    """
+    Versioned per-book cache for the P&L payload.
+
+    Keys embed the book's version, so logging a trade makes every
+    older entry unreachable at once; the timeout only reclaims space.
+    """
+
+    KEY_PREFIX = "trades:pnl"
+    HITS_KEY = "trades:pnl:stats:hits"
+    MISSES_KEY = "trades:pnl:stats:misses"
+
+    @staticmethod
+    def build_key(request):
+        version, _ = get_book_version(request)
+        params = sorted(
+            (name, value)
+            for name in request.query_params
+            for value in request.query_params.getlist(name)
+        )
+        digest = hashlib.sha1(repr(params).encode()).hexdigest()[:16]
+        book = get_book_key(request)
+        return f"{PnLCache.KEY_PREFIX}:{book}:{version}:{digest}"
+
+    @staticmethod
+    def get_or_set(request, compute):
+        """Return ``(payload, hit)``, computing and storing it on a miss."""
+        key = PnLCache.build_key(request)
+        payload = cache.get(key)
+
+        if payload is not None:
+            PnLCache._count(PnLCache.HITS_KEY)
+            return payload, True
+
+        PnLCache._count(PnLCache.MISSES_KEY)
+        payload = compute()
+        cache.set(key, payload, settings.PNL_CACHE_TIMEOUT)
+        return payload, False
+
+    @staticmethod
+    def _count(key):
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr(); losing one tick is fine.
+            pass
+
+    @staticmethod
+    def stats():
+        counters = cache.get_many([PnLCache.HITS_KEY, PnLCache.MISSES_KEY])
+        hits = counters.get(PnLCache.HITS_KEY, 0)
+        misses = counters.get(PnLCache.MISSES_KEY, 0)
+        total = hits + misses
+
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,122 @@
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.utils import timezone
+
+
+# Finest first: each interval is rolled up into the next one.
+INTERVALS = ("1m", "5m", "1h", "1d")
+
+INTERVAL_LENGTHS = {
+    "1m": timedelta(minutes=1),
+    "5m": timedelta(minutes=5),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+}
+
+
+def bucket_start(value, interval):
+    """Start of the ``interval`` bucket holding ``value``; days are local."""
+    if interval == "1d":
+        local = timezone.localtime(value)
+        return local.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    seconds = int(INTERVAL_LENGTHS[interval].total_seconds())
+    epoch = int(value.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=dt_timezone.utc)
+
+
+@dataclass
+class Bar:
+    open: Decimal
+    high: Decimal
+    low: Decimal
+    close: Decimal
+    open_at: datetime
+    close_at: datetime
+    volume: Decimal
+    volume_ngn: Decimal
+    trade_count: int = 1
+
+    @classmethod
+    def from_trade(cls, trade_date, rate, amount_crypto, amount_ngn):
+        return cls(
+            open=rate,
+            high=rate,
+            low=rate,
+            close=rate,
+            open_at=trade_date,
+            close_at=trade_date,
+            volume=amount_crypto,
+            volume_ngn=amount_ngn,
+        )
+
+    def merge(self, other):
+        """
+        Fold ``other`` into this bar. ``other`` is assumed to be booked
+        later, so on equal timestamps it keeps the open and takes the close.
+        """
+        if other.open_at < self.open_at:
+            self.open, self.open_at = other.open, other.open_at
+        if other.close_at >= self.close_at:
+            self.close, self.close_at = other.close, other.close_at
+        self.high = max(self.high, other.high)
+        self.low = min(self.low, other.low)
+        self.volume += other.volume
+        self.volume_ngn += other.volume_ngn
+        self.trade_count += other.trade_count
+
+    def copy(self):
+        return replace(self)
+
+
+def fold_candles(rows):
+    """
+    Turn ``(group, trade_date, rate, amount_crypto, amount_ngn)`` rows,
+    sorted by group then (trade_date, id), into finished candles.
+
+    Only 1m bars are built from trades; each finished bar is merged into
+    the bar one interval up, so memory holds one open bar per interval.
+    Yields ``(group, interval, bucket, bar)``.
+    """
+    current = {}
+    finished = []
+
+    def push(level, bucket, bar):
+        interval = INTERVALS[level]
+        if interval in current and current[interval][0] == bucket:
+            current[interval][1].merge(bar)
+            return
+        close(level)
+        current[interval] = (bucket, bar.copy())
+
+    def close(level):
+        interval = INTERVALS[level]
+        if interval not in current:
+            return
+        bucket, bar = current.pop(interval)
+        finished.append((interval, bucket, bar))
+        if level + 1 < len(INTERVALS):
+            parent = INTERVALS[level + 1]
+            push(level + 1, bucket_start(bucket, parent), bar)
+
+    group = None
+    for key, trade_date, rate, amount_crypto, amount_ngn in rows:
+        if key != group:
+            for level in range(len(INTERVALS)):
+                close(level)
+            yield from ((group, *candle) for candle in finished)
+            finished.clear()
+            group = key
+
+        bar = Bar.from_trade(trade_date, rate, amount_crypto, amount_ngn)
+        push(0, bucket_start(trade_date, INTERVALS[0]), bar)
+
+        if finished:
+            yield from ((group, *candle) for candle in finished)
+            finished.clear()
+
+    for level in range(len(INTERVALS)):
+        close(level)
+    yield from ((group, *candle) for candle in finished)
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from common.checks import cache_is_shared
+
+
+@register(Tags.caches, deploy=True)
+def check_asset_cache_backend(app_configs, **kwargs):
+    """The asset cache generation token must be shared by every worker."""
+    if not settings.ASSET_CACHE_SIZE or cache_is_shared():
+        return []
+    return [
+        Error(
+            "The asset cache needs a cache backend shared between "
+            "worker processes.",
+            hint=(
+                "Point CACHE_BACKEND at a shared backend such as "
+                "django.core.cache.backends.redis.RedisCache, or set "
+                "ASSET_CACHE_SIZE=0 to turn the asset cache off."
+            ),
+            id="trades.E001",
+        )
+    ]
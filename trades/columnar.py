@@ -0,0 +1,295 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from django.contrib.auth import get_user_model
+from django.db import connections
+
+from users.models import Desk
+
+from .metrics import CRYPTO_SCALE, NGN_SCALE, fixed_point, split_fixed_point
+from .models import Asset, Trade
+
+
+FORMAT_PARQUET = "parquet"
+FORMAT_ARROW = "arrow"
+
+CONTENT_TYPES = {
+    FORMAT_PARQUET: "application/vnd.apache.parquet",
+    FORMAT_ARROW: "application/vnd.apache.arrow.stream",
+}
+
+FILE_EXTENSIONS = {
+    FORMAT_PARQUET: "parquet",
+    FORMAT_ARROW: "arrows",
+}
+
+BATCH_SIZE = 50_000
+
+LABEL = pa.dictionary(pa.int32(), pa.string())
+NGN = pa.decimal128(18, 2)
+CRYPTO = pa.decimal128(20, 8)
+TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+SIDES = pa.array([value for value, _ in Trade.SIDE_CHOICES])
+TRADE_TYPES = pa.array([value for value, _ in Trade.TRADE_TYPE_CHOICES])
+
+
+def trade_schema(with_trader=False):
+    fields = [
+        pa.field("id", pa.int64(), nullable=False),
+        pa.field("trade_date", TIMESTAMP, nullable=False),
+        pa.field("asset", LABEL, nullable=False),
+        pa.field("desk", LABEL, nullable=False),
+        pa.field("side", LABEL, nullable=False),
+        pa.field("trade_type", LABEL, nullable=False),
+        pa.field("amount_crypto", CRYPTO, nullable=False),
+        pa.field("amount_ngn", NGN, nullable=False),
+        pa.field("rate", NGN, nullable=False),
+        pa.field("profit_loss", NGN, nullable=False),
+    ]
+    if with_trader:
+        fields.insert(1, pa.field("trader", LABEL, nullable=False))
+    return pa.schema(fields)
+
+
+class LabelDictionary:
+    """
+    Maps foreign key ids to an Arrow dictionary of labels.
+
+    The dictionary is loaded up front with the rows the export references.
+    The export cursor doesn't share that snapshot, so ids booked since,
+    e.g. a trade on a new desk, are looked up as they appear and appended;
+    earlier indices stay valid and the IPC stream sends only the delta.
+    """
+
+    def __init__(self, model, field, ids):
+        self.model = model
+        self.field = field
+        self.db = ids.db
+        self.keys = np.empty(0, dtype=np.int64)
+        self.labels = pa.array([], pa.string())
+        self.load(ids)
+
+    def load(self, ids):
+        rows = (
+            self.model.objects
+            .using(self.db)
+            .filter(pk__in=ids)
+            .order_by("pk")
+            .values_list("pk", self.field)
+        )
+        keys, labels = zip(*rows) if rows else ((), ())
+        self.keys = np.concatenate((self.keys, np.array(keys, dtype=np.int64)))
+        self.labels = pa.concat_arrays([self.labels, pa.array(labels, pa.string())])
+        self.order = np.argsort(self.keys, kind="stable")
+
+    def lookup(self, ids):
+        """Return ``(indices, found)`` of ``ids`` in the dictionary."""
+        if not self.keys.size:
+            return np.zeros(ids.size, dtype=np.int32), np.zeros(ids.size, dtype=bool)
+        positions = np.searchsorted(self.keys, ids, sorter=self.order)
+        indices = self.order[np.minimum(positions, self.keys.size - 1)]
+        return indices.astype(np.int32), self.keys[indices] == ids
+
+    def encode(self, ids):
+        indices, found = self.lookup(ids)
+        if not found.all():
+            self.load(np.unique(ids[~found]).tolist())
+            indices, found = self.lookup(ids)
+            if not found.all():
+                raise LookupError(
+                    f"{self.model._meta.label} has no row with id "
+                    f"{int(ids[~found][0])}."
+                )
+        return pa.DictionaryArray.from_arrays(indices, self.labels)
+
+
+def decimal_array(fixed, type):
+    """Build a decimal128 array from int64 values scaled by ``type.scale``."""
+    # Two's-complement 128-bit little-endian: the high word is the sign.
+    words = np.empty((fixed.size, 2), dtype=np.int64)
+    words[:, 0] = fixed
+    words[:, 1] = fixed >> 63
+    return pa.Array.from_buffers(type, fixed.size, [None, pa.py_buffer(words)])
+
+
+def split_decimal_array(whole, fraction, type):
+    """
+    Build a decimal128 array from int64 whole units and remainders.
+
+    ``whole * 10 ** type.scale`` can pass int64, so the product is formed
+    from the 32-bit halves of ``whole`` and carried into the high word.
+    """
+    scale = 10 ** type.scale
+    # whole = upper * 2**32 + lower, so the value is
+    # (upper * scale) * 2**32 + (lower * scale + fraction).
+    upper = (whole >> 32) * scale
+    lower = ((whole & 0xFFFFFFFF) * scale + fraction).view(np.uint64)
+
+    words = np.empty((whole.size, 2), dtype=np.uint64)
+    words[:, 0] = (upper.view(np.uint64) << np.uint64(32)) + lower
+    words[:, 1] = (upper >> 32).view(np.uint64) + (words[:, 0] < lower)
+    return pa.Array.from_buffers(type, whole.size, [None, pa.py_buffer(words)])
+
+
+def timestamp_array(values):
+    # SQLite hands back UTC text, other backends aware datetimes.
+    if values and isinstance(values[0], str):
+        return pc.cast(pa.array(values, pa.string()), pa.timestamp("us")).cast(
+            TIMESTAMP
+        )
+    return pa.array(values, TIMESTAMP)
+
+
+def label_array(values, dictionary):
+    indices = pc.index_in(pa.array(values, pa.string()), value_set=dictionary)
+    return pa.DictionaryArray.from_arrays(indices, dictionary)
+
+
+def iter_record_batches(queryset, with_trader=False, batch_size=BATCH_SIZE):
+    """
+    Yield ``queryset`` as Arrow record batches of ``trade_schema()``.
+
+    Rows are read off a DB-API cursor in ``fetchmany`` batches with money
+    already scaled to integers in SQL (crypto split at the decimal point,
+    as it doesn't fit int64 scaled), and each column is converted in one
+    vectorised step, so no model instances or Decimals are created. On
+    PostgreSQL the cursor is server side, so memory stays flat however
+    long the export is.
+    Asset, desk, trader, side and trade type are dictionary encoded.
+    """
+    schema = trade_schema(with_trader)
+    ids = queryset.order_by()
+    assets = LabelDictionary(Asset, "symbol", ids.values("asset_id"))
+    desks = LabelDictionary(Desk, "name", ids.values("desk_id"))
+    traders = (
+        LabelDictionary(get_user_model(), "email", ids.values("trader_id"))
+        if with_trader
+        else None
+    )
+
+    crypto_whole, crypto_fraction = split_fixed_point("amount_crypto", CRYPTO_SCALE)
+    rows = queryset.annotate(
+        crypto_whole=crypto_whole,
+        crypto_fraction=crypto_fraction,
+        ngn_fixed=fixed_point("amount_ngn", NGN_SCALE),
+        rate_fixed=fixed_point("rate", NGN_SCALE),
+        pnl_fixed=fixed_point("profit_loss", NGN_SCALE),
+    ).values_list(
+        "id",
+        "trade_date",
+        "trader_id",
+        "asset_id",
+        "desk_id",
+        "side",
+        "trade_type",
+        "crypto_whole",
+        "crypto_fraction",
+        "ngn_fixed",
+        "rate_fixed",
+        "pnl_fixed",
+    )
+    sql, params = rows.query.sql_with_params()
+
+    with connections[rows.db].chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        while batch := cursor.fetchmany(batch_size):
+            (
+                trade_ids,
+                trade_dates,
+                trader_ids,
+                asset_ids,
+                desk_ids,
+                sides,
+                trade_types,
+                *amounts,
+            ) = zip(*batch)
+            crypto_whole, crypto_fraction, ngn, rate, pnl = (
+                np.array(column, dtype=np.int64) for column in amounts
+            )
+
+            columns = [
+                pa.array(trade_ids, pa.int64()),
+                timestamp_array(trade_dates),
+                assets.encode(np.array(asset_ids, dtype=np.int64)),
+                desks.encode(np.array(desk_ids, dtype=np.int64)),
+                label_array(sides, SIDES),
+                label_array(trade_types, TRADE_TYPES),
+                split_decimal_array(crypto_whole, crypto_fraction, CRYPTO),
+                decimal_array(ngn, NGN),
+                decimal_array(rate, NGN),
+                decimal_array(pnl, NGN),
+            ]
+            if traders:
+                columns.insert(1, traders.encode(np.array(trader_ids, dtype=np.int64)))
+
+            yield pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+class ChunkSink:
+    """Write-only file object that hands back what was written so far."""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def iter_trade_arrow(
+    queryset,
+    export_format,
+    with_trader=False,
+    batch_size=BATCH_SIZE,
+    progress=None,
+):
+    """
+    Yield ``queryset`` as a Parquet file or Arrow IPC stream in byte chunks.
+
+    Each record batch becomes one Parquet row group or IPC message and is
+    yielded as soon as it is encoded. ``progress`` is called with the
+    running row count after every batch.
+    """
+    schema = trade_schema(with_trader)
+    sink = ChunkSink()
+
+    if export_format == FORMAT_PARQUET:
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(
+            sink,
+            schema,
+            options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True),
+        )
+
+    count = 0
+    with writer:
+        for batch in iter_record_batches(queryset, with_trader, batch_size):
+            writer.write_batch(batch)
+            count += batch.num_rows
+            if progress:
+                progress(count)
+            yield sink.drain()
+
+    if progress:
+        progress(count)
+    yield sink.drain()
@@ -0,0 +1,143 @@
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+from .models import CostBasisLot, CostBasisPosition
+
+
+CENT = Decimal("0.01")
+UNIT_COST = Decimal("0.00000001")
+
+
+@dataclass
+class Lot:
+    trade_id: int
+    quantity: Decimal
+    unit_cost: Decimal
+    pk: int = None
+    trade_date: datetime = None
+
+
+class MemoryLots:
+    """
+    Open lots held in a deque, used when replaying history.
+
+    Trades must be applied in (trade_date, id) order, so lots are queued
+    oldest first.
+    """
+
+    def __init__(self):
+        self.lots = deque()
+
+    def first(self):
+        return self.lots[0]
+
+    def append(self, lot):
+        self.lots.append(lot)
+
+    def reduce(self, lot, quantity):
+        lot.quantity = quantity
+
+    def remove(self, lot):
+        self.lots.popleft()
+
+
+class DatabaseLots:
+    """
+    Open lots of a stored position.
+
+    ``first()`` is an index seek on (position, trade_date, trade), so each
+    match costs O(log n) in the number of open lots rather than loading
+    the queue.
+    """
+
+    def __init__(self, position):
+        self.lots = CostBasisLot.objects.filter(position=position)
+        self.position = position
+
+    def first(self):
+        lot = self.lots.order_by("trade_date", "trade_id").first()
+        return Lot(lot.trade_id, lot.quantity, lot.unit_cost, lot.pk, lot.trade_date)
+
+    def append(self, lot):
+        CostBasisLot.objects.create(
+            position=self.position,
+            trade_id=lot.trade_id,
+            trade_date=lot.trade_date,
+            quantity=lot.quantity,
+            unit_cost=lot.unit_cost,
+        )
+
+    def reduce(self, lot, quantity):
+        self.lots.filter(pk=lot.pk).update(quantity=quantity)
+
+    def remove(self, lot):
+        self.lots.filter(pk=lot.pk).delete()
+
+
+def apply_trade(
+    position,
+    lots,
+    trade_id,
+    side,
+    quantity,
+    amount_ngn,
+    trade_date=None,
+):
+    """
+    Book one trade against ``position`` and its open ``lots``.
+
+    A trade against the open direction closes inventory first (oldest lot
+    first for FIFO, at the running average otherwise) and any excess opens
+    a new lot the other way. Realized P&L is rounded to kobo per trade, so
+    replaying history reproduces the incremental result exactly. Trades
+    must arrive in (trade_date, id) order, so "oldest" is by trade date
+    however late a trade was booked.
+    """
+    unit_price = (amount_ngn / quantity).quantize(UNIT_COST, ROUND_HALF_UP)
+    buying = side == "buy"
+    remaining = quantity
+
+    if position.quantity and (position.quantity > 0) == (not buying):
+        closing_long = position.quantity > 0
+        closed = min(remaining, abs(position.quantity))
+
+        if position.method == CostBasisPosition.AVERAGE:
+            unit_cost = position.cost_basis / abs(position.quantity)
+            cost = closed * unit_cost
+            gain = closed * (unit_price - unit_cost)
+        else:
+            cost = gain = Decimal("0")
+            left = closed
+            while left:
+                lot = lots.first()
+                take = min(left, lot.quantity)
+                cost += take * lot.unit_cost
+                gain += take * (unit_price - lot.unit_cost)
+                if take == lot.quantity:
+                    lots.remove(lot)
+                else:
+                    lots.reduce(lot, lot.quantity - take)
+                left -= take
+
+        position.quantity += -closed if closing_long else closed
+        position.cost_basis = (
+            (position.cost_basis - cost).quantize(UNIT_COST, ROUND_HALF_UP)
+            if position.quantity
+            else Decimal("0")
+        )
+        position.realized_pnl += (gain if closing_long else -gain).quantize(
+            CENT,
+            ROUND_HALF_UP,
+        )
+        remaining -= closed
+
+    if remaining:
+        position.quantity += remaining if buying else -remaining
+        position.cost_basis += (remaining * unit_price).quantize(
+            UNIT_COST,
+            ROUND_HALF_UP,
+        )
+        if position.method == CostBasisPosition.FIFO:
+            lots.append(Lot(trade_id, remaining, unit_price, trade_date=trade_date))
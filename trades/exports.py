@@ -0,0 +1,87 @@
+import csv
+import io
+import zlib
+
+
+CSV_HEADER = [
+    "Trade ID",
+    "Trade Date",
+    "Asset",
+    "Desk",
+    "Side",
+    "Trade Type",
+    "Crypto Amount",
+    "NGN Amount",
+    "Rate",
+    "Profit/Loss",
+]
+
+CSV_COLUMNS = (
+    "id",
+    "trade_date",
+    "asset__symbol",
+    "desk__name",
+    "side",
+    "trade_type",
+    "amount_crypto",
+    "amount_ngn",
+    "rate",
+    "profit_loss",
+)
+
+# Desk-wide exports add the trader after the trade ID.
+DESK_CSV_HEADER = CSV_HEADER[:1] + ["Trader"] + CSV_HEADER[1:]
+DESK_CSV_COLUMNS = CSV_COLUMNS[:1] + ("trader__email",) + CSV_COLUMNS[1:]
+
+CHUNK_SIZE = 2000
+FLUSH_BYTES = 64 * 1024
+
+
+def iter_trade_csv(
+    queryset,
+    columns=CSV_COLUMNS,
+    header=CSV_HEADER,
+    chunk_size=CHUNK_SIZE,
+    progress=None,
+):
+    """
+    Yield the trade CSV in ~64KB text chunks.
+
+    Rows are read as ``values_list`` tuples through ``iterator()`` so no
+    model instances are built and memory stays flat regardless of size.
+    ``progress`` is called with the running row count at every flush.
+    """
+    side_index = columns.index("side")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    count = 0
+    rows = queryset.values_list(*columns).iterator(chunk_size=chunk_size)
+    for count, row in enumerate(rows, 1):
+        row = list(row)
+        row[side_index] = row[side_index].upper()
+        writer.writerow(row)
+
+        if buffer.tell() >= FLUSH_BYTES:
+            if progress:
+                progress(count)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if progress:
+        progress(count)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_gzip(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+
+    yield compressor.flush()
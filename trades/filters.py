@@ -1,14 +1,49 @@
 from django_filters import rest_framework as filters
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 
-from .models import Trade
+from .models import Trade, Asset, TradeCandle, TradeDailyRollup
+
+
+DATE_PRESET_CHOICES = [
+    ("today", "Today"),
+    ("week", "This Week"),
+    ("month", "This Month"),
+    ("year", "This Year"),
+]
+
+
+def start_of_day(value):
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
+def date_preset_range(value):
+    """Return ``(first_day, end_day)`` for a preset; ``end_day`` is exclusive."""
+    today = timezone.now().date()
+
+    if value == "today":
+        return today, today + timedelta(days=1)
+
+    if value == "week":
+        return today - timedelta(days=today.weekday()), None
+
+    if value == "month":
+        return today.replace(day=1), None
+
+    if value == "year":
+        return today.replace(month=1, day=1), None
+
+    return None, None
 
 
 class TradeFilter(filters.FilterSet):
+    trader = filters.NumberFilter(
+        field_name="trader_id"
+    )
+
     asset = filters.CharFilter(
         field_name="asset__symbol",
-        lookup_expr="iexact"
+        method="filter_asset"
     )
 
     side = filters.ChoiceFilter(
@@ -21,21 +56,16 @@ class TradeFilter(filters.FilterSet):
 
     start_date = filters.DateFilter(
         field_name="trade_date",
-        lookup_expr="date__gte"
+        method="filter_start_date"
     )
 
     end_date = filters.DateFilter(
         field_name="trade_date",
-        lookup_expr="date__lte"
+        method="filter_end_date"
     )
 
     date_preset = filters.ChoiceFilter(
-        choices=[
-            ("today", "Today"),
-            ("week", "This Week"),
-            ("month", "This Month"),
-            ("year", "This Year"),
-        ],
+        choices=DATE_PRESET_CHOICES,
         method="filter_date_preset"
     )
 
@@ -66,6 +96,7 @@ class TradeFilter(filters.FilterSet):
     class Meta:
         model = Trade
         fields = [
+            "trader",
             "asset",
             "side",
             "trade_type",
@@ -79,6 +110,12 @@ class TradeFilter(filters.FilterSet):
             "is_profitable",
         ]
 
+    def filter_asset(self, queryset, name, value):
+        # Resolve the symbol in a subquery so (trader, asset) can be seeked.
+        return queryset.filter(
+            asset__in=Asset.objects.filter(symbol__iexact=value).values("id")
+        )
+
     def filter_is_profitable(self, queryset, name, value):
         if value is True:
             return queryset.filter(profit_loss__gt=0)
@@ -86,22 +123,119 @@ class TradeFilter(filters.FilterSet):
             return queryset.filter(profit_loss__lte=0)
         return queryset
 
+    # Date filters compare the raw column against half-open datetime ranges
+    # rather than casting it with __date, so the trade_date indexes apply.
+    def filter_start_date(self, queryset, name, value):
+        return queryset.filter(trade_date__gte=start_of_day(value))
+
+    def filter_end_date(self, queryset, name, value):
+        return queryset.filter(
+            trade_date__lt=start_of_day(value + timedelta(days=1))
+        )
+
     def filter_date_preset(self, queryset, name, value):
-        today = timezone.now().date()
+        start, end = date_preset_range(value)
+
+        if start is not None:
+            queryset = queryset.filter(trade_date__gte=start_of_day(start))
+
+        if end is not None:
+            queryset = queryset.filter(trade_date__lt=start_of_day(end))
+
+        return queryset
+
+
+class TradeRollupFilter(filters.FilterSet):
+    """The subset of TradeFilter that maps onto daily rollup dimensions."""
+
+    trader = filters.NumberFilter(
+        field_name="trader_id"
+    )
+
+    asset = filters.CharFilter(
+        field_name="asset__symbol",
+        lookup_expr="iexact"
+    )
+
+    side = filters.ChoiceFilter(
+        choices=Trade.SIDE_CHOICES
+    )
+
+    trade_type = filters.ChoiceFilter(
+        choices=Trade.TRADE_TYPE_CHOICES
+    )
+
+    start_date = filters.DateFilter(
+        field_name="day",
+        lookup_expr="gte"
+    )
+
+    end_date = filters.DateFilter(
+        field_name="day",
+        lookup_expr="lte"
+    )
 
-        if value == "today":
-            return queryset.filter(trade_date__date=today)
+    date_preset = filters.ChoiceFilter(
+        choices=DATE_PRESET_CHOICES,
+        method="filter_date_preset"
+    )
 
-        if value == "week":
-            start = today - timedelta(days=today.weekday())
-            return queryset.filter(trade_date__date__gte=start)
+    class Meta:
+        model = TradeDailyRollup
+        fields = [
+            "trader",
+            "asset",
+            "side",
+            "trade_type",
+            "start_date",
+            "end_date",
+            "date_preset",
+        ]
 
-        if value == "month":
-            start = today.replace(day=1)
-            return queryset.filter(trade_date__date__gte=start)
+    def filter_date_preset(self, queryset, name, value):
+        start, end = date_preset_range(value)
 
-        if value == "year":
-            start = today.replace(month=1, day=1)
-            return queryset.filter(trade_date__date__gte=start)
+        if start is not None:
+            queryset = queryset.filter(day__gte=start)
+
+        if end is not None:
+            queryset = queryset.filter(day__lt=end)
 
         return queryset
+
+
+class TradeCandleFilter(filters.FilterSet):
+    asset = filters.CharFilter(
+        field_name="asset__symbol",
+        lookup_expr="iexact",
+        required=True
+    )
+
+    interval = filters.ChoiceFilter(
+        choices=TradeCandle.INTERVAL_CHOICES
+    )
+
+    start = filters.IsoDateTimeFilter(
+        field_name="bucket",
+        lookup_expr="gte"
+    )
+
+    end = filters.IsoDateTimeFilter(
+        field_name="bucket",
+        lookup_expr="lt"
+    )
+
+    class Meta:
+        model = TradeCandle
+        fields = [
+            "asset",
+            "interval",
+            "start",
+            "end",
+        ]
+
+    def __init__(self, data=None, *args, **kwargs):
+        # Candles of mixed intervals never make sense, so default to 1h.
+        data = data.copy() if data is not None else {}
+        data.setdefault("interval", "1h")
+        super().__init__(data, *args, **kwargs)
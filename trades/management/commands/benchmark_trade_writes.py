@@ -0,0 +1,166 @@
+import multiprocessing
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.utils import timezone
+
+from trades.models import Asset
+from trades.serializers import TradeSerializer
+from users.models import Desk, User
+
+
+PROFILES = (
+    ("django default", {}),
+    ("SQLITE_OPTIONS", settings.SQLITE_OPTIONS),
+)
+
+
+def create_trades(trader_id, count, barrier, results):
+    """Worker process: book ``count`` trades the way TradeCreateView does."""
+    trader = User.objects.select_related("desk").get(pk=trader_id)
+    request = SimpleNamespace(user=trader)
+    created = locked = 0
+
+    barrier.wait()
+    try:
+        for index in range(count):
+            serializer = TradeSerializer(
+                data={
+                    "asset": "BTC",
+                    "side": ("buy", "sell")[index % 2],
+                    "trade_type": "otc",
+                    "amount_crypto": "0.10000000",
+                    "amount_ngn": "150000.00",
+                    "rate": "1500000.00",
+                    "trade_date": timezone.now().isoformat(),
+                },
+                context={"request": request},
+            )
+            serializer.is_valid(raise_exception=True)
+            try:
+                serializer.save()
+                created += 1
+            except OperationalError as exc:
+                if "locked" not in str(exc):
+                    raise
+                locked += 1
+    finally:
+        # Always report, so the parent never waits on a crashed worker.
+        connections.close_all()
+        results.put((created, locked))
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure concurrent trade-create throughput on a scratch SQLite "
+        "database, with Django's default connection settings and with "
+        "SQLITE_OPTIONS. Each worker is a separate process, like a gunicorn "
+        "sync worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+        parser.add_argument(
+            "--trades",
+            type=int,
+            default=200,
+            help="Trades booked by each worker",
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor != "sqlite":
+            raise CommandError("This benchmark only applies to SQLite.")
+
+        original = {
+            "NAME": connection.settings_dict["NAME"],
+            "OPTIONS": connection.settings_dict["OPTIONS"],
+        }
+        workers = options["workers"]
+
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                template = Path(directory) / "template.sqlite3"
+                self.use_database(template, {})
+                call_command("migrate", verbosity=0)
+                trader_ids = self.seed(max(workers))
+                connection.close()
+
+                self.stdout.write(
+                    f"{'profile':<16}{'workers':>8}{'booked':>8}"
+                    f"{'locked':>8}{'seconds':>9}{'trades/s':>10}"
+                )
+                for label, profile_options in PROFILES:
+                    for count in workers:
+                        database = Path(directory) / f"run-{count}.sqlite3"
+                        shutil.copy(template, database)
+                        self.use_database(database, profile_options)
+
+                        created, locked, elapsed = self.run_workers(
+                            trader_ids[:count],
+                            options["trades"],
+                        )
+                        self.stdout.write(
+                            f"{label:<16}{count:>8}{created:>8}{locked:>8}"
+                            f"{elapsed:>9.2f}{created / elapsed:>10.1f}"
+                        )
+                        connection.close()
+                        database.unlink()
+        finally:
+            connection.close()
+            connection.settings_dict.update(original)
+
+    @staticmethod
+    def use_database(name, options):
+        connection = connections[DEFAULT_DB_ALIAS]
+        connection.close()
+        connection.settings_dict["NAME"] = str(name)
+        connection.settings_dict["OPTIONS"] = dict(options)
+
+    @staticmethod
+    def seed(count):
+        desk = Desk.objects.create(name="Benchmark Desk")
+        Asset.objects.create(symbol="BTC", name="BTC")
+        return [
+            User.objects.create(
+                email=f"benchmark{index}@example.com",
+                full_name=f"Benchmark {index}",
+                role="trader",
+                desk=desk,
+            ).pk
+            for index in range(count)
+        ]
+
+    @staticmethod
+    def run_workers(trader_ids, count):
+        # Fork so workers inherit the scratch database settings.
+        context = multiprocessing.get_context("fork")
+        barrier = context.Barrier(len(trader_ids) + 1)
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=create_trades,
+                args=(trader_id, count, barrier, results),
+            )
+            for trader_id in trader_ids
+        ]
+        for process in processes:
+            process.start()
+
+        barrier.wait()
+        start = time.perf_counter()
+        totals = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+
+        created = sum(created for created, _ in totals)
+        locked = sum(locked for _, locked in totals)
+        return created, locked, elapsed
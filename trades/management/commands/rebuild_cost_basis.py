@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+
+from trades.models import CostBasisPosition, Trade
+from trades.services import CostBasisService
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay trade history into FIFO / average cost-basis positions, "
+        "one streaming pass per desk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--desk",
+            type=int,
+            action="append",
+            dest="desks",
+            help="Desk id to rebuild; repeat for several (default: all)",
+        )
+        parser.add_argument(
+            "--method",
+            choices=[choice for choice, _ in CostBasisPosition.METHOD_CHOICES],
+        )
+        parser.add_argument(
+            "--stale",
+            action="store_true",
+            help="Only replay positions flagged stale by trade deletions",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=CostBasisService.REPLAY_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        if options["stale"]:
+            positions = CostBasisPosition.objects.all()
+            if options["desks"]:
+                positions = positions.filter(desk_id__in=options["desks"])
+
+            count = CostBasisService.replay_stale(positions)
+            self.stdout.write(
+                self.style.SUCCESS(f"Replayed {count} stale positions.")
+            )
+            return
+
+        desks = options["desks"] or (
+            Trade.objects
+            .order_by()
+            .values_list("desk_id", flat=True)
+            .distinct()
+        )
+
+        count = 0
+        for desk_id in desks:
+            count += CostBasisService.rebuild_desk(
+                desk_id,
+                method=options["method"],
+                batch_size=options["batch_size"],
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {count} cost-basis positions.")
+        )
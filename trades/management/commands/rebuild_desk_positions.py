@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from trades.services import DeskPositionService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the desk position table from the trades table."
+
+    def handle(self, *args, **options):
+        created = DeskPositionService.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {created} desk positions.")
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from trades.services import CandleService
+
+
+class Command(BaseCommand):
+    help = "Rebuild OHLC rate candles at every interval from the trades table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=CandleService.REBUILD_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        created = CandleService.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {created} candles.")
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from trades.services import TradeRollupService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily P&L rollup table from the trades table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=TradeRollupService.REBUILD_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        created = TradeRollupService.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {created} rollup rows.")
+        )
@@ -0,0 +1,12 @@
+from common.jobs import JobWorkerCommand
+from trades.models import ExportJob
+from trades.services import ExportJobService
+
+
+class Command(JobWorkerCommand):
+    help = "Process queued trade export jobs."
+
+    job_model = ExportJob
+
+    def run_job(self, job):
+        ExportJobService.run(job)
@@ -0,0 +1,184 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+from django.db import connections
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Floor, Round
+
+from .models import Asset
+
+
+# Money is loaded in kobo and crypto as whole units plus a 1e-8 remainder
+# so every sum below is exact int64 arithmetic; Decimal only appears when
+# formatting the result.
+NGN_SCALE = 100
+CRYPTO_SCALE = 10 ** 8
+
+FETCH_SIZE = 50_000
+
+CENT = Decimal("0.01")
+SATOSHI = Decimal("0.00000001")
+RATIO = Decimal("0.0001")
+
+
+def fixed_point(field, scale):
+    return Cast(Round(F(field) * scale), BigIntegerField())
+
+
+def split_fixed_point(field, scale):
+    """
+    Return ``field`` as bigint whole units and a remainder in ``1 / scale``.
+
+    ``amount_crypto`` has 20 digits, so scaled by 1e8 it can pass the
+    bigint range (about 92 billion units); each part on its own can't.
+    """
+    whole = Floor(F(field))
+    return (
+        Cast(whole, BigIntegerField()),
+        Cast(Round((F(field) - whole) * scale), BigIntegerField()),
+    )
+
+
+def load_trade_arrays(queryset, fetch_size=FETCH_SIZE):
+    """
+    Load ``queryset`` in (trade_date, id) order as int64 columns.
+
+    ``amount_crypto`` comes back as two columns, whole units and the
+    satoshi remainder, see ``split_fixed_point()``.
+
+    Rows come straight off a DB-API cursor in ``fetchmany`` batches, so
+    no model instances or Decimals are created. On PostgreSQL the cursor
+    is server side, so the result set is never buffered whole in libpq.
+    """
+    crypto_whole, crypto_fraction = split_fixed_point("amount_crypto", CRYPTO_SCALE)
+    rows = (
+        queryset
+        .order_by("trade_date", "id")
+        .annotate(
+            pnl_fixed=fixed_point("profit_loss", NGN_SCALE),
+            ngn_fixed=fixed_point("amount_ngn", NGN_SCALE),
+            crypto_whole=crypto_whole,
+            crypto_fraction=crypto_fraction,
+        )
+        .values_list(
+            "asset_id",
+            "pnl_fixed",
+            "ngn_fixed",
+            "crypto_whole",
+            "crypto_fraction",
+        )
+    )
+    sql, params = rows.query.sql_with_params()
+
+    batches = []
+    with connections[rows.db].chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        while batch := cursor.fetchmany(fetch_size):
+            batches.append(np.array(batch, dtype=np.int64))
+
+    data = np.concatenate(batches) if batches else np.empty((0, 5), np.int64)
+    return tuple(data.T)
+
+
+def longest_run(mask):
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return int((ends - starts).max()) if starts.size else 0
+
+
+def max_drawdown(pnl):
+    """Largest peak-to-trough fall of cumulative P&L, starting from zero."""
+    if not pnl.size:
+        return 0
+    equity = np.cumsum(pnl)
+    peaks = np.maximum.accumulate(np.maximum(equity, 0))
+    return int((peaks - equity).max())
+
+
+def group_sums(keys, *columns):
+    """Exact per-key sums of int64 columns; returns ``(keys, counts, sums)``."""
+    if not keys.size:
+        return keys, keys, list(columns)
+
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    counts = np.diff(np.append(starts, keys.size))
+    sums = [np.add.reduceat(column[order], starts) for column in columns]
+    return keys[starts], counts, sums
+
+
+def money(fixed):
+    return (Decimal(int(fixed)) / NGN_SCALE).quantize(CENT)
+
+
+def ratio(numerator, denominator, places=RATIO):
+    if not denominator:
+        return None
+    return (Decimal(int(numerator)) / Decimal(int(denominator))).quantize(
+        places,
+        rounding=ROUND_HALF_UP,
+    )
+
+
+def compute_metrics(asset_ids, pnl, amount_ngn, crypto_whole, crypto_fraction):
+    wins = pnl > 0
+    losses = pnl < 0
+
+    win_count = int(np.count_nonzero(wins))
+    loss_count = int(np.count_nonzero(losses))
+    gross_profit = int(pnl[wins].sum())
+    gross_loss = int(-pnl[losses].sum())
+
+    average_win = ratio(gross_profit, win_count * NGN_SCALE, CENT)
+    average_loss = ratio(-gross_loss, loss_count * NGN_SCALE, CENT)
+
+    assets, counts, (ngn_sums, whole_sums, fraction_sums) = group_sums(
+        asset_ids,
+        amount_ngn,
+        crypto_whole,
+        crypto_fraction,
+    )
+    # Recombined as Python ints, which don't overflow.
+    crypto_sums = [
+        int(whole) * CRYPTO_SCALE + int(fraction)
+        for whole, fraction in zip(whole_sums, fraction_sums)
+    ]
+    symbols = dict(
+        Asset.objects.filter(id__in=assets.tolist()).values_list("id", "symbol")
+    )
+    by_asset = [
+        {
+            "asset": symbols.get(int(asset_id)),
+            "trades": int(count),
+            "volume": (Decimal(crypto) / CRYPTO_SCALE).quantize(SATOSHI),
+            "volume_ngn": money(ngn),
+            # NGN per whole unit of crypto.
+            "vwap": ratio(int(ngn) * (CRYPTO_SCALE // NGN_SCALE), crypto, CENT),
+        }
+        for asset_id, count, ngn, crypto in zip(
+            assets, counts, ngn_sums, crypto_sums
+        )
+    ]
+    by_asset.sort(key=lambda row: row["volume_ngn"], reverse=True)
+
+    return {
+        "total_trades": int(pnl.size),
+        "winning_trades": win_count,
+        "losing_trades": loss_count,
+        "win_rate": ratio(win_count, pnl.size),
+        "total_profit_loss": money(pnl.sum()),
+        "gross_profit": money(gross_profit),
+        "gross_loss": money(gross_loss),
+        "average_win": average_win or Decimal("0.00"),
+        "average_loss": average_loss or Decimal("0.00"),
+        "profit_factor": ratio(gross_profit, gross_loss),
+        "max_drawdown": money(max_drawdown(pnl)),
+        "longest_losing_streak": longest_run(losses),
+        "by_asset": by_asset,
+    }
+
+
+def trade_metrics(queryset):
+    return compute_metrics(*load_trade_arrays(queryset))
@@ -0,0 +1,133 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:38
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    Trade = apps.get_model("trades", "Trade")
+    TradeDailyRollup = apps.get_model("trades", "TradeDailyRollup")
+
+    rows = (
+        Trade.objects.annotate(day=TruncDate("trade_date"))
+        .values("trader_id", "desk_id", "asset_id", "day", "side", "trade_type")
+        .annotate(
+            rollup_count=Count("id"),
+            rollup_profit_loss=Sum("profit_loss"),
+            rollup_amount_ngn=Sum("amount_ngn"),
+        )
+        .order_by()
+    )
+
+    TradeDailyRollup.objects.bulk_create(
+        [
+            TradeDailyRollup(
+                trader_id=row["trader_id"],
+                desk_id=row["desk_id"],
+                asset_id=row["asset_id"],
+                day=row["day"],
+                side=row["side"],
+                trade_type=row["trade_type"],
+                trade_count=row["rollup_count"],
+                profit_loss=row["rollup_profit_loss"],
+                amount_ngn=row["rollup_amount_ngn"],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trades", "0004_alter_trade_desk_alter_asset_options_and_more"),
+        ("users", "0003_desk_address"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TradeDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "side",
+                    models.CharField(
+                        choices=[("buy", "Buy"), ("sell", "Sell")], max_length=4
+                    ),
+                ),
+                (
+                    "trade_type",
+                    models.CharField(
+                        choices=[
+                            ("spot", "Spot"),
+                            ("otc", "OTC"),
+                            ("p2p", "P2P"),
+                            ("futures", "Futures"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("trade_count", models.PositiveIntegerField(default=0)),
+                (
+                    "profit_loss",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=24
+                    ),
+                ),
+                (
+                    "amount_ngn",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=24
+                    ),
+                ),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trade_rollups",
+                        to="trades.asset",
+                    ),
+                ),
+                (
+                    "desk",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trade_rollups",
+                        to="users.desk",
+                    ),
+                ),
+                (
+                    "trader",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trade_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-day"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("trader", "desk", "asset", "day", "side", "trade_type"),
+                        name="trades_rollup_unique_key",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trades", "0005_tradedailyrollup"),
+        ("users", "0003_desk_address"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="trade",
+            index=models.Index(
+                fields=["trader", "-trade_date"], name="trade_trader_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trade",
+            index=models.Index(
+                fields=["trader", "asset"], name="trade_trader_asset_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trade",
+            index=models.Index(
+                fields=["trader", "profit_loss"], name="trade_trader_pnl_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trade",
+            index=models.Index(
+                fields=["desk", "trade_date"], name="trade_desk_date_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:42
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_versions(apps, schema_editor):
+    Trade = apps.get_model("trades", "Trade")
+    TradeBookVersion = apps.get_model("trades", "TradeBookVersion")
+
+    rows = (
+        Trade.objects.values("trader_id")
+        .annotate(trade_count=Count("id"))
+        .order_by()
+    )
+
+    TradeBookVersion.objects.bulk_create(
+        [
+            TradeBookVersion(
+                key=f"trader:{row['trader_id']}",
+                version=row["trade_count"],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trades", "0006_trade_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TradeBookVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=50, unique=True)),
+                ("version", models.PositiveBigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_sync_seq(apps, schema_editor):
+    Trade = apps.get_model("trades", "Trade")
+    TradeBookVersion = apps.get_model("trades", "TradeBookVersion")
+
+    trader_ids = Trade.objects.values_list("trader_id", flat=True).distinct()
+    for trader_id in list(trader_ids.order_by()):
+        batch = []
+        seq = 0
+        trades = Trade.objects.filter(trader_id=trader_id).order_by("id").only("id")
+        for trade in trades.iterator(chunk_size=1000):
+            seq += 1
+            trade.sync_seq = seq
+            batch.append(trade)
+            if len(batch) >= 1000:
+                Trade.objects.bulk_update(batch, ["sync_seq"])
+                batch = []
+        if batch:
+            Trade.objects.bulk_update(batch, ["sync_seq"])
+
+        book, _ = TradeBookVersion.objects.get_or_create(key=f"trader:{trader_id}")
+        if book.version < seq:
+            book.version = seq
+            book.save(update_fields=["version", "updated_at"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trades", "0007_tradebookversion"),
+        ("users", "0003_desk_address"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trade",
+            name="sync_seq",
+            field=models.PositiveBigIntegerField(
+                editable=False,
+                help_text="Per-trader insertion sequence used by delta sync",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="tradebookversion",
+            name="resync_floor",
+            field=models.PositiveBigIntegerField(
+                default=0, help_text="Sync tokens below this version must fully resync"
+            ),
+        ),
+        migrations.RunPython(backfill_sync_seq, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="trade",
+            name="sync_seq",
+            field=models.PositiveBigIntegerField(
+                editable=False,
+                help_text="Per-trader insertion sequence used by delta sync",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="trade",
+            constraint=models.UniqueConstraint(
+                fields=("trader", "sync_seq"), name="trade_trader_sync_seq_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,135 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:54
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trades", "0008_trade_sync_seq"),
+        ("users", "0003_desk_address"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CostBasisPosition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "method",
+                    models.CharField(
+                        choices=[("fifo", "FIFO"), ("average", "Weighted Average")],
+                        default="fifo",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "quantity",
+                    models.DecimalField(
+                        decimal_places=8,
+                        default=Decimal("0"),
+                        help_text="Open quantity; negative when the desk is short",
+                        max_digits=24,
+                    ),
+                ),
+                (
+                    "cost_basis",
+                    models.DecimalField(
+                        decimal_places=8,
+                        default=Decimal("0"),
+                        help_text="NGN cost of the open quantity",
+                        max_digits=28,
+                    ),
+                ),
+                (
+                    "realized_pnl",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=24
+                    ),
+                ),
+                (
+                    "is_stale",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Set when a trade is deleted; replayed before next use",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cost_basis_positions",
+                        to="trades.asset",
+                    ),
+                ),
+                (
+                    "desk",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cost_basis_positions",
+                        to="users.desk",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["desk", "asset"],
+            },
+        ),
+        migrations.CreateModel(
+            name="CostBasisLot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.DecimalField(decimal_places=8, max_digits=24)),
+                ("unit_cost", models.DecimalField(decimal_places=8, max_digits=28)),
+                (
+                    "trade",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cost_basis_lots",
+                        to="trades.trade",
+                    ),
+                ),
+                (
+                    "position",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lots",
+                        to="trades.costbasisposition",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["trade_id"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="costbasisposition",
+            constraint=models.UniqueConstraint(
+                fields=("desk", "asset"), name="trades_cost_basis_position_unique"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="costbasislot",
+            index=models.Index(
+                fields=["position", "trade"], name="trade_lot_position_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:55
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_positions(apps, schema_editor):
+    Trade = apps.get_model("trades", "Trade")
+    DeskPosition = apps.get_model("trades", "DeskPosition")
+
+    rows = (
+        Trade.objects.values("desk_id", "asset_id")
+        .annotate(
+            position_count=Count("id"),
+            bought=Sum("amount_crypto", filter=Q(side="buy")),
+            sold=Sum("amount_crypto", filter=Q(side="sell")),
+            paid=Sum("amount_ngn", filter=Q(side="buy")),
+            received=Sum("amount_ngn", filter=Q(side="sell")),
+        )
+        .order_by()
+    )
+
+    zero = Decimal("0")
+    DeskPosition.objects.bulk_create(
+        [
+            DeskPosition(
+                desk_id=row["desk_id"],
+                asset_id=row["asset_id"],
+                trade_count=row["position_count"],
+                quantity=(row["bought"] or zero) - (row["sold"] or zero),
+                ngn_flow=(row["received"] or zero) - (row["paid"] or zero),
+                buy_quantity=row["bought"] or zero,
+                buy_amount_ngn=row["paid"] or zero,
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trades", "0009_cost_basis"),
+        ("users", "0003_desk_address"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeskPosition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "quantity",
+                    models.DecimalField(
+                        decimal_places=8,
+                        default=Decimal("0"),
+                        help_text="Net crypto held: bought minus sold",
+                        max_digits=28,
+                    ),
+                ),
+                (
+                    "ngn_flow",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Net NGN: received on sells minus paid on buys",
+                        max_digits=24,
+                    ),
+                ),
+                (
+                    "buy_quantity",
+                    models.DecimalField(
+                        decimal_places=8, default=Decimal("0"), max_digits=28
+                    ),
+                ),
+                (
+                    "buy_amount_ngn",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=24
+                    ),
+                ),
+                ("trade_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="desk_positions",
+                        to="trades.asset",
+                    ),
+                ),
+                (
+                    "desk",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="positions",
+                        to="users.desk",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["desk", "asset"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("desk", "asset"), name="trades_desk_position_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_positions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:58
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+from trades.candles import fold_candles
+
+
+def backfill_candles(apps, schema_editor):
+    Trade = apps.get_model("trades", "Trade")
+    TradeCandle = apps.get_model("trades", "TradeCandle")
+
+    rows = (
+        Trade.objects.order_by("desk_id", "asset_id", "trade_date", "id")
+        .values_list(
+            "desk_id",
+            "asset_id",
+            "trade_date",
+            "rate",
+            "amount_crypto",
+            "amount_ngn",
+        )
+        .iterator(chunk_size=2000)
+    )
+
+    TradeCandle.objects.bulk_create(
+        (
+            TradeCandle(
+                desk_id=desk_id,
+                asset_id=asset_id,
+                interval=interval,
+                bucket=bucket,
+                **vars(bar),
+            )
+            for (desk_id, asset_id), interval, bucket, bar in fold_candles(
+                ((desk_id, asset_id), *values) for desk_id, asset_id, *values in rows
+            )
+        ),
+        batch_size=1000,
+    )
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trades", "0010_deskposition"),
+        ("users", "0003_desk_address"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TradeCandle",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "interval",
+                    models.CharField(
+                        choices=[
+                            ("1m", "1 Minute"),
+                            ("5m", "5 Minutes"),
+                            ("1h", "1 Hour"),
+                            ("1d", "1 Day"),
+                        ],
+                        max_length=3,
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("open", models.DecimalField(decimal_places=2, max_digits=18)),
+                ("high", models.DecimalField(decimal_places=2, max_digits=18)),
+                ("low", models.DecimalField(decimal_places=2, max_digits=18)),
+                ("close", models.DecimalField(decimal_places=2, max_digits=18)),
+                ("open_at", models.DateTimeField()),
+                ("close_at", models.DateTimeField()),
+                (
+                    "volume",
+                    models.DecimalField(
+                        decimal_places=8, default=Decimal("0"), max_digits=28
+                    ),
+                ),
+                (
+                    "volume_ngn",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=24
+                    ),
+                ),
+                ("trade_count", models.PositiveIntegerField(default=0)),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="candles",
+                        to="trades.asset",
+                    ),
+                ),
+                (
+                    "desk",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="candles",
+                        to="users.desk",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["bucket"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("desk", "asset", "interval", "bucket"),
+                        name="trades_candle_unique_bucket",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_candles, migrations.RunPython.noop),
+    ]
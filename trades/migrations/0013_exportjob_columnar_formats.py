@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trades", "0012_exportjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="exportjob",
+            name="format",
+            field=models.CharField(
+                choices=[
+                    ("csv", "CSV"),
+                    ("csv.gz", "Gzip CSV"),
+                    ("parquet", "Parquet"),
+                    ("arrow", "Arrow IPC stream"),
+                ],
+                default="csv",
+                max_length=10,
+            ),
+        ),
+    ]
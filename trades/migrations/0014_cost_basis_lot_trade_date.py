@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_lot_trade_date(apps, schema_editor):
+    CostBasisLot = apps.get_model("trades", "CostBasisLot")
+    CostBasisPosition = apps.get_model("trades", "CostBasisPosition")
+    Trade = apps.get_model("trades", "Trade")
+
+    CostBasisLot.objects.update(
+        trade_date=Subquery(
+            Trade.objects.filter(pk=OuterRef("trade_id")).values("trade_date")[:1]
+        )
+    )
+    # Lots were matched in booking order; replay everything in date order.
+    CostBasisPosition.objects.update(is_stale=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trades", "0013_exportjob_columnar_formats"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="costbasislot",
+            options={"ordering": ["trade_date", "trade_id"]},
+        ),
+        migrations.RemoveIndex(
+            model_name="costbasislot",
+            name="trade_lot_position_idx",
+        ),
+        migrations.AddField(
+            model_name="costbasislot",
+            name="trade_date",
+            field=models.DateTimeField(
+                help_text="Copied from the trade; lots are consumed in this order",
+                null=True,
+            ),
+        ),
+        migrations.RunPython(backfill_lot_trade_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="costbasislot",
+            name="trade_date",
+            field=models.DateTimeField(
+                help_text="Copied from the trade; lots are consumed in this order",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="costbasislot",
+            index=models.Index(
+                fields=["position", "trade_date", "trade"],
+                name="trade_lot_position_date_idx",
+            ),
+        ),
+    ]
@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction
+from django.core.files.storage import storages
 from django.core.validators import MinValueValidator
 from django.conf import settings
 from decimal import Decimal, ROUND_HALF_UP
+from common.models import BackgroundJob
 from users.models import Desk
 
 User = settings.AUTH_USER_MODEL
@@ -89,8 +91,37 @@ class Trade(models.Model):
     trade_date = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    sync_seq = models.PositiveBigIntegerField(
+        editable=False,
+        help_text="Per-trader insertion sequence used by delta sync",
+    )
+
     class Meta:
         ordering = ["-trade_date"]
+        indexes = [
+            models.Index(
+                fields=["trader", "-trade_date"],
+                name="trade_trader_date_idx",
+            ),
+            models.Index(
+                fields=["trader", "asset"],
+                name="trade_trader_asset_idx",
+            ),
+            models.Index(
+                fields=["trader", "profit_loss"],
+                name="trade_trader_pnl_idx",
+            ),
+            models.Index(
+                fields=["desk", "trade_date"],
+                name="trade_desk_date_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["trader", "sync_seq"],
+                name="trade_trader_sync_seq_unique",
+            ),
+        ]
 
     def calculate_pnl(self):
         reference_value = self.amount_crypto * self.rate
@@ -103,4 +134,427 @@ class Trade(models.Model):
 
     def save(self, *args, **kwargs):
         self.profit_loss = self.calculate_pnl()
-        super().save(*args, **kwargs)
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+
+class TradeDailyRollup(models.Model):
+    trader = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="trade_rollups",
+    )
+
+    desk = models.ForeignKey(
+        Desk,
+        on_delete=models.CASCADE,
+        related_name="trade_rollups",
+    )
+
+    asset = models.ForeignKey(
+        Asset,
+        on_delete=models.CASCADE,
+        related_name="trade_rollups",
+    )
+
+    day = models.DateField()
+
+    side = models.CharField(
+        max_length=4,
+        choices=Trade.SIDE_CHOICES,
+    )
+
+    trade_type = models.CharField(
+        max_length=10,
+        choices=Trade.TRADE_TYPE_CHOICES,
+    )
+
+    trade_count = models.PositiveIntegerField(default=0)
+
+    profit_loss = models.DecimalField(
+        max_digits=24,
+        decimal_places=2,
+        default=Decimal("0.00"),
+    )
+
+    amount_ngn = models.DecimalField(
+        max_digits=24,
+        decimal_places=2,
+        default=Decimal("0.00"),
+    )
+
+    class Meta:
+        ordering = ["-day"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["trader", "desk", "asset", "day", "side", "trade_type"],
+                name="trades_rollup_unique_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.trader_id} | {self.day} | {self.asset_id} | {self.side}"
+
+
+class TradeBookVersion(models.Model):
+    """
+    Per-book write counter, e.g. ``trader:42``.
+
+    Bumped in the same transaction as every trade insert or delete, so it is
+    a cheap version token for ETags and cache keys.
+    """
+
+    key = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    resync_floor = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Sync tokens below this version must fully resync",
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
+
+
+class DeskPosition(models.Model):
+    """
+    Running inventory of one asset on one desk.
+
+    Every column is a sum over the desk's trades, so bookings update it
+    with F() increments and never read-modify-write.
+    """
+
+    desk = models.ForeignKey(
+        Desk,
+        on_delete=models.CASCADE,
+        related_name="positions",
+    )
+
+    asset = models.ForeignKey(
+        Asset,
+        on_delete=models.CASCADE,
+        related_name="desk_positions",
+    )
+
+    quantity = models.DecimalField(
+        max_digits=28,
+        decimal_places=8,
+        default=Decimal("0"),
+        help_text="Net crypto held: bought minus sold",
+    )
+
+    ngn_flow = models.DecimalField(
+        max_digits=24,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        help_text="Net NGN: received on sells minus paid on buys",
+    )
+
+    buy_quantity = models.DecimalField(
+        max_digits=28,
+        decimal_places=8,
+        default=Decimal("0"),
+    )
+
+    buy_amount_ngn = models.DecimalField(
+        max_digits=24,
+        decimal_places=2,
+        default=Decimal("0.00"),
+    )
+
+    trade_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["desk", "asset"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["desk", "asset"],
+                name="trades_desk_position_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.desk_id} | {self.asset_id} | {self.quantity}"
+
+    @property
+    def average_cost(self):
+        """Average NGN paid per unit bought."""
+        if not self.buy_quantity:
+            return None
+        return (self.buy_amount_ngn / self.buy_quantity).quantize(
+            Decimal("0.01"),
+            rounding=ROUND_HALF_UP,
+        )
+
+
+class CostBasisPosition(models.Model):
+    """
+    Inventory and realized P&L for one (desk, asset), maintained by
+    ``CostBasisService`` as trades are booked.
+    """
+
+    FIFO = "fifo"
+    AVERAGE = "average"
+
+    METHOD_CHOICES = (
+        (FIFO, "FIFO"),
+        (AVERAGE, "Weighted Average"),
+    )
+
+    desk = models.ForeignKey(
+        Desk,
+        on_delete=models.CASCADE,
+        related_name="cost_basis_positions",
+    )
+
+    asset = models.ForeignKey(
+        Asset,
+        on_delete=models.CASCADE,
+        related_name="cost_basis_positions",
+    )
+
+    method = models.CharField(
+        max_length=10,
+        choices=METHOD_CHOICES,
+        default=FIFO,
+    )
+
+    quantity = models.DecimalField(
+        max_digits=24,
+        decimal_places=8,
+        default=Decimal("0"),
+        help_text="Open quantity; negative when the desk is short",
+    )
+
+    cost_basis = models.DecimalField(
+        max_digits=28,
+        decimal_places=8,
+        default=Decimal("0"),
+        help_text="NGN cost of the open quantity",
+    )
+
+    realized_pnl = models.DecimalField(
+        max_digits=24,
+        decimal_places=2,
+        default=Decimal("0.00"),
+    )
+
+    is_stale = models.BooleanField(
+        default=False,
+        help_text="Set when a trade is deleted; replayed before next use",
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["desk", "asset"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["desk", "asset"],
+                name="trades_cost_basis_position_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.desk_id} | {self.asset_id} | {self.quantity}"
+
+    @property
+    def average_cost(self):
+        if not self.quantity:
+            return None
+        return self.cost_basis / abs(self.quantity)
+
+
+class CostBasisLot(models.Model):
+    """An open FIFO lot: what is left of the trade that opened it."""
+
+    position = models.ForeignKey(
+        CostBasisPosition,
+        on_delete=models.CASCADE,
+        related_name="lots",
+    )
+
+    trade = models.ForeignKey(
+        Trade,
+        on_delete=models.CASCADE,
+        related_name="cost_basis_lots",
+    )
+
+    quantity = models.DecimalField(
+        max_digits=24,
+        decimal_places=8,
+    )
+
+    unit_cost = models.DecimalField(
+        max_digits=28,
+        decimal_places=8,
+    )
+
+    trade_date = models.DateTimeField(
+        help_text="Copied from the trade; lots are consumed in this order",
+    )
+
+    class Meta:
+        ordering = ["trade_date", "trade_id"]
+        indexes = [
+            models.Index(
+                fields=["position", "trade_date", "trade"],
+                name="trade_lot_position_date_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.position_id} | {self.trade_id} | {self.quantity}"
+
+
+class TradeCandle(models.Model):
+    """
+    OHLC of executed ``Trade.rate`` for one desk and asset per time bucket.
+
+    Open and close belong to the earliest and latest ``trade_date`` in the
+    bucket; ``open_at``/``close_at`` keep those times so backdated trades
+    can be merged in without rereading the bucket.
+    """
+
+    INTERVAL_CHOICES = (
+        ("1m", "1 Minute"),
+        ("5m", "5 Minutes"),
+        ("1h", "1 Hour"),
+        ("1d", "1 Day"),
+    )
+
+    desk = models.ForeignKey(
+        Desk,
+        on_delete=models.CASCADE,
+        related_name="candles",
+    )
+
+    asset = models.ForeignKey(
+        Asset,
+        on_delete=models.CASCADE,
+        related_name="candles",
+    )
+
+    interval = models.CharField(
+        max_length=3,
+        choices=INTERVAL_CHOICES,
+    )
+
+    bucket = models.DateTimeField()
+
+    open = models.DecimalField(max_digits=18, decimal_places=2)
+    high = models.DecimalField(max_digits=18, decimal_places=2)
+    low = models.DecimalField(max_digits=18, decimal_places=2)
+    close = models.DecimalField(max_digits=18, decimal_places=2)
+
+    open_at = models.DateTimeField()
+    close_at = models.DateTimeField()
+
+    volume = models.DecimalField(
+        max_digits=28,
+        decimal_places=8,
+        default=Decimal("0"),
+    )
+
+    volume_ngn = models.DecimalField(
+        max_digits=24,
+        decimal_places=2,
+        default=Decimal("0.00"),
+    )
+
+    trade_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["bucket"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["desk", "asset", "interval", "bucket"],
+                name="trades_candle_unique_bucket",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id} {self.interval} {self.bucket:%Y-%m-%d %H:%M}"
+
+
+def export_storage():
+    return storages["exports"]
+
+
+class ExportJob(BackgroundJob):
+    """A trade export produced by the ``run_export_jobs`` worker."""
+
+    FORMAT_CSV = "csv"
+    FORMAT_CSV_GZIP = "csv.gz"
+    FORMAT_PARQUET = "parquet"
+    FORMAT_ARROW = "arrow"
+
+    FORMAT_CHOICES = (
+        (FORMAT_CSV, "CSV"),
+        (FORMAT_CSV_GZIP, "Gzip CSV"),
+        (FORMAT_PARQUET, "Parquet"),
+        (FORMAT_ARROW, "Arrow IPC stream"),
+    )
+
+    SCOPE_CHOICES = (
+        ("user", "My Trades"),
+        ("desk", "Whole Desk"),
+    )
+
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="export_jobs",
+    )
+
+    desk = models.ForeignKey(
+        Desk,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="export_jobs",
+    )
+
+    scope = models.CharField(
+        max_length=10,
+        choices=SCOPE_CHOICES,
+        default="user",
+    )
+
+    format = models.CharField(
+        max_length=10,
+        choices=FORMAT_CHOICES,
+        default=FORMAT_CSV,
+    )
+
+    filters = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="TradeFilter parameters captured at request time",
+    )
+
+    file = models.FileField(
+        upload_to="exports/%Y/%m/",
+        storage=export_storage,
+        blank=True,
+    )
+
+    rows_total = models.PositiveBigIntegerField(null=True, blank=True)
+    rows_written = models.PositiveBigIntegerField(default=0)
+    size = models.PositiveBigIntegerField(default=0)
+
+    class Meta(BackgroundJob.Meta):
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Export #{self.pk} ({self.format}, {self.status})"
+
+    @property
+    def progress(self):
+        if self.status == self.STATUS_COMPLETED:
+            return 1.0
+        if not self.rows_total:
+            return 0.0
+        return round(min(self.rows_written / self.rows_total, 1.0), 4)
@@ -0,0 +1,139 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class TradeKeysetPagination(CursorPagination):
+    """
+    Keyset pagination over ``(<ordering field>, id)``.
+
+    Every page is fetched with a ``WHERE (field, id) < (last field, last id)``
+    seek instead of an OFFSET, so page N costs the same as page 1. The mode
+    is opt-in: requests without ``cursor`` or ``page_size`` keep the legacy
+    unpaginated response.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = "-trade_date"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if (
+            self.cursor_query_param not in params
+            and self.page_size_query_param not in params
+        ):
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        self.keys = self.get_keys(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor["reverse"])
+
+        order_by = [
+            ("-" if descending != reverse else "") + name
+            for name, descending in self.keys
+        ]
+        queryset = queryset.order_by(*order_by)
+
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self.get_seek_filter(self.cursor["values"], reverse)
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_keys(self, request, queryset, view):
+        ordering = [
+            field for field in self.get_ordering(request, queryset, view)
+            if field.lstrip("-") not in ("id", "pk")
+        ]
+        keys = [(field.lstrip("-"), field.startswith("-")) for field in ordering]
+        tiebreak_descending = keys[-1][1] if keys else True
+        keys.append(("id", tiebreak_descending))
+        self.model = queryset.model
+        return keys
+
+    def get_seek_filter(self, values, reverse):
+        first_name, first_descending = self.keys[0]
+        bound = "lte" if first_descending != reverse else "gte"
+
+        seek = Q()
+        for index, (name, descending) in enumerate(self.keys):
+            lookup = "lt" if descending != reverse else "gt"
+            clause = Q(**{f"{name}__{lookup}": values[index]})
+            for prev_index, (prev_name, _) in enumerate(self.keys[:index]):
+                clause &= Q(**{prev_name: values[prev_index]})
+            seek |= clause
+
+        # The redundant bound on the leading key keeps the seek sargable so
+        # the database can range-scan the index instead of filtering rows.
+        return Q(**{f"{first_name}__{bound}": values[0]}) & seek
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            payload = json.loads(urlsafe_b64decode(padded.encode("ascii")))
+            if payload["k"] != [name for name, _ in self.keys]:
+                raise ValueError("Cursor does not match ordering")
+            values = [
+                self.model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.keys, payload["v"], strict=True)
+            ]
+            reverse = bool(payload.get("r", 0))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {"values": values, "reverse": reverse}
+
+    def encode_cursor(self, instance, reverse):
+        payload = {
+            "k": [name for name, _ in self.keys],
+            "v": [
+                self.model._meta.get_field(name).value_to_string(instance)
+                for name, _ in self.keys
+            ],
+        }
+        if reverse:
+            payload["r"] = 1
+
+        encoded = urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode("ascii")
+        ).decode("ascii").rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
@@ -0,0 +1,19 @@
+from rest_framework import permissions
+
+
+DESK_SCOPE_ROLES = ("desk_owner", "manager")
+
+
+class IsDeskManager(permissions.BasePermission):
+    """Desk owners and managers, who may see desk-wide books."""
+
+    message = "Only desk owners and managers can view desk-wide data."
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(
+            user
+            and user.is_authenticated
+            and user.desk_id
+            and user.role in DESK_SCOPE_ROLES
+        )
@@ -1,7 +1,13 @@
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from django.contrib.auth import get_user_model
 
-from .models import Trade, Asset
+from common.serializers import ValuesListSerializer
+
+from .assets import asset_cache
+from .filters import TradeFilter
+from .models import Trade, Asset, DeskPosition, ExportJob, TradeCandle
+from .permissions import DESK_SCOPE_ROLES
 
 User = get_user_model()
 
@@ -74,6 +80,9 @@ class TradeSerializer(serializers.ModelSerializer):
             "trade_type_display",
         ]
 
+    def validate_asset(self, value):
+        return value.upper().strip()
+
     def validate(self, data):
         for field in ("amount_crypto", "amount_ngn", "rate"):
             if field in data and data[field] <= 0:
@@ -85,21 +94,14 @@ class TradeSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         request = self.context["request"]
 
-        symbol = validated_data.pop("asset").upper().strip()
+        symbol = validated_data.pop("asset")
 
         if not request.user.desk:
             raise serializers.ValidationError(
                 "User is not assigned to a desk."
             )
 
-        asset, _ = Asset.objects.get_or_create(
-            symbol=symbol,
-            defaults={
-                "name": symbol,
-                "is_active": True,
-                "is_custom": True,
-            },
-        )
+        asset = asset_cache.get_or_create(symbol)
 
         return Trade.objects.create(
             trader=request.user,
@@ -121,6 +123,7 @@ class TradeListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Trade
+        list_serializer_class = ValuesListSerializer
         fields = [
             "id",
             "trade_date",
@@ -135,6 +138,18 @@ class TradeListSerializer(serializers.ModelSerializer):
         ]
 
 
+class DeskTradeListSerializer(TradeListSerializer):
+    trader = serializers.EmailField(
+        source="trader.email",
+        read_only=True,
+    )
+
+    class Meta(TradeListSerializer.Meta):
+        fields = TradeListSerializer.Meta.fields[:1] + [
+            "trader",
+        ] + TradeListSerializer.Meta.fields[1:]
+
+
 class PnLSummarySerializer(serializers.Serializer):
     total_trades = serializers.IntegerField()
     total_profit_loss = serializers.DecimalField(
@@ -152,3 +167,178 @@ class PnLSummarySerializer(serializers.Serializer):
     by_asset = serializers.ListField(child=serializers.DictField())
     by_desk = serializers.ListField(child=serializers.DictField())
     by_date = serializers.ListField(child=serializers.DictField())
+    by_trader = serializers.ListField(
+        child=serializers.DictField(),
+        required=False,
+    )
+
+
+class AssetMetricsSerializer(serializers.Serializer):
+    asset = serializers.CharField()
+    trades = serializers.IntegerField()
+    volume = serializers.DecimalField(max_digits=28, decimal_places=8)
+    volume_ngn = serializers.DecimalField(max_digits=24, decimal_places=2)
+    vwap = serializers.DecimalField(max_digits=24, decimal_places=2)
+
+
+class TradeMetricsSerializer(serializers.Serializer):
+    total_trades = serializers.IntegerField()
+    winning_trades = serializers.IntegerField()
+    losing_trades = serializers.IntegerField()
+    win_rate = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=4,
+        allow_null=True,
+    )
+    total_profit_loss = serializers.DecimalField(
+        max_digits=24,
+        decimal_places=2,
+    )
+    gross_profit = serializers.DecimalField(max_digits=24, decimal_places=2)
+    gross_loss = serializers.DecimalField(max_digits=24, decimal_places=2)
+    average_win = serializers.DecimalField(max_digits=24, decimal_places=2)
+    average_loss = serializers.DecimalField(max_digits=24, decimal_places=2)
+    profit_factor = serializers.DecimalField(
+        max_digits=24,
+        decimal_places=4,
+        allow_null=True,
+    )
+    max_drawdown = serializers.DecimalField(max_digits=24, decimal_places=2)
+    longest_losing_streak = serializers.IntegerField()
+    by_asset = AssetMetricsSerializer(many=True)
+
+
+class DeskPositionSerializer(serializers.ModelSerializer):
+    asset = serializers.CharField(source="asset.symbol", read_only=True)
+    average_cost = serializers.DecimalField(
+        max_digits=24,
+        decimal_places=2,
+        read_only=True,
+        allow_null=True,
+    )
+    cost_basis = serializers.DecimalField(
+        max_digits=28,
+        decimal_places=8,
+        read_only=True,
+        allow_null=True,
+    )
+    realized_pnl = serializers.DecimalField(
+        max_digits=24,
+        decimal_places=2,
+        read_only=True,
+        allow_null=True,
+    )
+
+    class Meta:
+        model = DeskPosition
+        fields = [
+            "asset",
+            "quantity",
+            "ngn_flow",
+            "average_cost",
+            "buy_quantity",
+            "buy_amount_ngn",
+            "cost_basis",
+            "realized_pnl",
+            "trade_count",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+
+class TradeCandleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TradeCandle
+        list_serializer_class = ValuesListSerializer
+        fields = [
+            "bucket",
+            "open",
+            "high",
+            "low",
+            "close",
+            "volume",
+            "volume_ngn",
+            "trade_count",
+        ]
+        read_only_fields = fields
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "format",
+            "scope",
+            "filters",
+            "status",
+            "progress",
+            "rows_total",
+            "rows_written",
+            "size",
+            "attempts",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "download_url",
+        ]
+        read_only_fields = [
+            "id",
+            "status",
+            "progress",
+            "rows_total",
+            "rows_written",
+            "size",
+            "attempts",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "download_url",
+        ]
+
+    def get_download_url(self, obj):
+        if obj.status != ExportJob.STATUS_COMPLETED:
+            return None
+        return reverse(
+            "trade-export-job-download",
+            kwargs={"pk": obj.pk},
+            request=self.context.get("request"),
+        )
+
+    def validate_filters(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("Expected an object of filters.")
+
+        form = TradeFilter(value, queryset=Trade.objects.none()).form
+        if not form.is_valid():
+            raise serializers.ValidationError(form.errors)
+
+        # Keep only recognised filters, as strings, so the worker replays
+        # exactly what was validated here.
+        return {
+            name: str(value[name])
+            for name in TradeFilter.base_filters
+            if value.get(name) not in (None, "")
+        }
+
+    def validate(self, data):
+        user = self.context["request"].user
+
+        if data.get("scope") == "desk" and (
+            user.role not in DESK_SCOPE_ROLES or not user.desk_id
+        ):
+            raise serializers.ValidationError(
+                {"scope": "Only desk owners and managers can export the desk."}
+            )
+        return data
+
+    def create(self, validated_data):
+        user = self.context["request"].user
+        return ExportJob.objects.create(
+            requested_by=user,
+            desk_id=user.desk_id,
+            **validated_data,
+        )
@@ -0,0 +1,1019 @@
+import csv
+import io
+import tempfile
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import Greatest, Least, TruncDate
+from django.utils import timezone
+
+from .assets import asset_cache
+from .candles import INTERVALS, INTERVAL_LENGTHS, Bar, bucket_start, fold_candles
+from .columnar import FILE_EXTENSIONS, iter_trade_arrow
+from .cost_basis import DatabaseLots, MemoryLots, apply_trade
+from .exports import (
+    CSV_COLUMNS,
+    CSV_HEADER,
+    DESK_CSV_COLUMNS,
+    DESK_CSV_HEADER,
+    iter_gzip,
+    iter_trade_csv,
+)
+from .filters import TradeFilter
+from common.jobs import complete_job, heartbeat
+from .models import (
+    Asset,
+    CostBasisLot,
+    CostBasisPosition,
+    DeskPosition,
+    ExportJob,
+    Trade,
+    TradeBookVersion,
+    TradeCandle,
+    TradeDailyRollup,
+)
+
+
+ROLLUP_KEY_FIELDS = (
+    "trader_id",
+    "desk_id",
+    "asset_id",
+    "day",
+    "side",
+    "trade_type",
+)
+
+
+def update_or_insert(model, lookup, changes, defaults):
+    """
+    Apply ``changes`` to the row matching ``lookup``, or insert it with
+    ``defaults`` if there is none.
+
+    A writer that loses the INSERT race falls back to the UPDATE, so
+    ``changes`` must be expressions that merge into the existing row.
+    """
+    rows = model.objects.filter(**lookup)
+
+    if rows.update(**changes):
+        return
+
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **defaults)
+    except IntegrityError:
+        rows.update(**changes)
+
+
+def increment_or_create(model, lookup, increments, values=None):
+    """
+    Add ``increments`` to the row matching ``lookup``, creating it if needed.
+
+    The UPDATE uses F() expressions so concurrent writers never lose counts.
+    """
+    values = values or {}
+    update_or_insert(
+        model,
+        lookup,
+        {
+            **{field: F(field) + amount for field, amount in increments.items()},
+            **values,
+        },
+        {**increments, **values},
+    )
+
+
+def copy_insert(model, objs):
+    """
+    Insert unsaved ``objs`` like ``bulk_create``, using ``COPY`` on
+    PostgreSQL.
+
+    Primary keys are drawn from the table's sequence up front so the
+    instances end up with them set, as they would after ``bulk_create``.
+    Other backends go through ``bulk_create`` unchanged.
+    """
+    alias = router.db_for_write(model)
+    connection = connections[alias]
+    if connection.vendor != "postgresql" or not objs:
+        return model.objects.using(alias).bulk_create(objs)
+
+    opts = model._meta
+    table = opts.db_table
+    pk_column = opts.pk.column
+    fields = opts.concrete_fields
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) "
+            "FROM generate_series(1, %s)",
+            [table, pk_column, len(objs)],
+        )
+        for obj, (pk,) in zip(objs, cursor.fetchall()):
+            obj.pk = pk
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in objs:
+            row = []
+            for field in fields:
+                value = field.get_db_prep_save(
+                    field.pre_save(obj, add=True),
+                    connection,
+                )
+                row.append(r"\N" if value is None else value)
+            writer.writerow(row)
+        buffer.seek(0)
+
+        columns = ", ".join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        cursor.copy_expert(
+            f"COPY {connection.ops.quote_name(table)} ({columns}) "
+            r"FROM STDIN WITH (FORMAT csv, NULL '\N')",
+            buffer,
+        )
+
+    for obj in objs:
+        obj._state.adding = False
+        obj._state.db = alias
+    return objs
+
+
+def trader_book_key(trader_id):
+    return f"trader:{trader_id}"
+
+
+def desk_book_key(desk_id):
+    return f"desk:{desk_id}"
+
+
+def trade_day(value):
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return timezone.localdate(value)
+
+
+class TradeService:
+    @staticmethod
+    def record_created(trades):
+        """Update every table derived from trades for newly inserted rows."""
+        TradeService.bump_desk_versions(trades)
+        TradeRollupService.record(trades)
+        DeskPositionService.record(trades)
+        CostBasisService.record(trades)
+        CandleService.record(trades)
+
+    @staticmethod
+    def allocate_versions(key, count):
+        """Bump a book version by ``count`` and return the new version."""
+        increment_or_create(
+            TradeBookVersion,
+            {"key": key},
+            {"version": count},
+            {"updated_at": timezone.now()},
+        )
+        return (
+            TradeBookVersion.objects
+            .filter(key=key)
+            .values_list("version", flat=True)
+            .get()
+        )
+
+    @staticmethod
+    def assign_sync_seqs(trades):
+        """
+        Give unsaved trades consecutive per-trader sequence numbers.
+
+        Numbers come from the trader's book version row, whose UPDATE lock
+        is held until commit, so sequences are committed in order.
+        """
+        pending = defaultdict(list)
+        for trade in trades:
+            if trade.sync_seq is None:
+                pending[trade.trader_id].append(trade)
+
+        for trader_id, group in pending.items():
+            last = TradeService.allocate_versions(
+                trader_book_key(trader_id),
+                len(group),
+            )
+            first = last - len(group) + 1
+            for offset, trade in enumerate(group):
+                trade.sync_seq = first + offset
+
+    @staticmethod
+    def bump_desk_versions(trades):
+        counts = defaultdict(int)
+        for trade in trades:
+            counts[trade.desk_id] += 1
+
+        for desk_id, count in counts.items():
+            TradeService.allocate_versions(desk_book_key(desk_id), count)
+
+    @staticmethod
+    def record_deleted(trades):
+        TradeService.bump_desk_versions(trades)
+        TradeRollupService.record(trades, sign=-1)
+        DeskPositionService.record(trades, sign=-1)
+        CostBasisService.mark_stale(trades)
+        CandleService.recompute(trades)
+
+        for trader_id in {trade.trader_id for trade in trades}:
+            # Deletions cannot be expressed as deltas, so earlier sync
+            # tokens are invalidated and those clients must fully resync.
+            TradeBookVersion.objects.filter(
+                key=trader_book_key(trader_id),
+            ).update(
+                version=F("version") + 1,
+                resync_floor=F("version") + 1,
+                updated_at=timezone.now(),
+            )
+
+    @staticmethod
+    def resolve_assets(symbols):
+        symbols = set(symbols)
+        assets = asset_cache.get_many(symbols)
+
+        missing = symbols - assets.keys()
+        if missing:
+            Asset.objects.bulk_create(
+                [
+                    Asset(symbol=symbol, name=symbol, is_active=True, is_custom=True)
+                    for symbol in missing
+                ],
+                ignore_conflicts=True,
+            )
+            created = list(Asset.objects.filter(symbol__in=missing))
+            transaction.on_commit(
+                lambda: [asset_cache.put(asset) for asset in created]
+            )
+            assets.update((asset.symbol, asset) for asset in created)
+
+        return assets
+
+    @staticmethod
+    @transaction.atomic
+    def bulk_create_trades(user, items):
+        """
+        Insert many validated trades for ``user`` in one transaction.
+
+        Symbols are resolved in one query, P&L is computed in Python and
+        rows go in through ``copy_insert``; derived tables and the
+        ``trades_bulk_created`` receivers then run once for the batch.
+        """
+        from .signals import trades_bulk_created
+
+        assets = TradeService.resolve_assets(item["asset"] for item in items)
+
+        trades = []
+        for item in items:
+            fields = dict(item)
+            trade = Trade(
+                trader=user,
+                desk=user.desk,
+                asset=assets[fields.pop("asset")],
+                **fields,
+            )
+            trade.profit_loss = trade.calculate_pnl()
+            trades.append(trade)
+
+        TradeService.assign_sync_seqs(trades)
+        copy_insert(Trade, trades)
+        TradeService.record_created(trades)
+        trades_bulk_created.send(sender=Trade, trader=user, trades=trades)
+
+        return trades
+
+
+class TradeSyncService:
+    TOKEN_SALT = "trades.sync"
+
+    class InvalidToken(Exception):
+        pass
+
+    class TokenExpired(Exception):
+        pass
+
+    @staticmethod
+    def encode_token(user, seq):
+        return signing.dumps(
+            {"u": user.pk, "s": seq},
+            salt=TradeSyncService.TOKEN_SALT,
+            compress=True,
+        )
+
+    @staticmethod
+    def decode_token(user, token):
+        try:
+            payload = signing.loads(token, salt=TradeSyncService.TOKEN_SALT)
+            if payload["u"] != user.pk:
+                raise ValueError("Token belongs to another user")
+            return int(payload["s"])
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            raise TradeSyncService.InvalidToken
+
+    @staticmethod
+    def changes_since(user, token=None, limit=500):
+        """
+        Return ``(trades, last_seq, has_more)`` for trades inserted after
+        ``token``; a missing token starts a full sync from the beginning.
+        """
+        floor = (
+            TradeBookVersion.objects
+            .filter(key=trader_book_key(user.pk))
+            .values_list("resync_floor", flat=True)
+            .first()
+        ) or 0
+
+        since = 0
+        if token:
+            since = TradeSyncService.decode_token(user, token)
+            if since < floor:
+                raise TradeSyncService.TokenExpired
+
+        trades = list(
+            Trade.objects
+            .filter(trader=user, sync_seq__gt=since)
+            .select_related("asset", "desk")
+            .order_by("sync_seq")[:limit + 1]
+        )
+        has_more = len(trades) > limit
+        trades = trades[:limit]
+        last_seq = trades[-1].sync_seq if trades else since
+        if not has_more:
+            # Caught up: move past the floor so the next call is not
+            # rejected for a deletion this response already reflects.
+            last_seq = max(last_seq, floor)
+
+        return trades, last_seq, has_more
+
+
+class TradeRollupService:
+    REBUILD_BATCH_SIZE = 1000
+
+    @staticmethod
+    def record(trades, sign=1):
+        """
+        Fold trades into the daily rollup; ``sign=-1`` removes them again.
+
+        Callers run this inside the transaction that wrote the trades.
+        """
+        buckets = defaultdict(lambda: [0, Decimal("0.00"), Decimal("0.00")])
+
+        for trade in trades:
+            key = (
+                trade.trader_id,
+                trade.desk_id,
+                trade.asset_id,
+                trade_day(trade.trade_date),
+                trade.side,
+                trade.trade_type,
+            )
+            bucket = buckets[key]
+            bucket[0] += 1
+            bucket[1] += trade.profit_loss
+            bucket[2] += trade.amount_ngn
+
+        for key, (count, profit_loss, amount_ngn) in buckets.items():
+            TradeRollupService._apply(
+                dict(zip(ROLLUP_KEY_FIELDS, key)),
+                count * sign,
+                profit_loss * sign,
+                amount_ngn * sign,
+            )
+
+    @staticmethod
+    def _apply(key, count, profit_loss, amount_ngn):
+        increments = {
+            "trade_count": count,
+            "profit_loss": profit_loss,
+            "amount_ngn": amount_ngn,
+        }
+
+        if count > 0:
+            increment_or_create(TradeDailyRollup, key, increments)
+            return
+
+        rollups = TradeDailyRollup.objects.filter(**key)
+        rollups.update(
+            **{field: F(field) + amount for field, amount in increments.items()}
+        )
+        rollups.filter(trade_count__lte=0).delete()
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(batch_size=REBUILD_BATCH_SIZE):
+        TradeDailyRollup.objects.all().delete()
+
+        rows = (
+            Trade.objects
+            .annotate(day=TruncDate("trade_date"))
+            .values(*ROLLUP_KEY_FIELDS)
+            .annotate(
+                trade_count=Count("id"),
+                total_profit_loss=Sum("profit_loss"),
+                total_amount_ngn=Sum("amount_ngn"),
+            )
+            .order_by()
+        )
+
+        created = 0
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(
+                TradeDailyRollup(
+                    **{field: row[field] for field in ROLLUP_KEY_FIELDS},
+                    trade_count=row["trade_count"],
+                    profit_loss=row["total_profit_loss"],
+                    amount_ngn=row["total_amount_ngn"],
+                )
+            )
+            if len(batch) >= batch_size:
+                TradeDailyRollup.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+
+        if batch:
+            TradeDailyRollup.objects.bulk_create(batch)
+            created += len(batch)
+
+        return created
+
+    @staticmethod
+    def pnl_summary(rollups, by_trader=False):
+        aggregates = rollups.aggregate(
+            total_trades=Sum("trade_count"),
+            total_profit_loss=Sum("profit_loss"),
+            total_buy_volume=Sum("amount_ngn", filter=Q(side="buy")),
+            total_sell_volume=Sum("amount_ngn", filter=Q(side="sell")),
+        )
+
+        for key in aggregates:
+            if aggregates[key] is None:
+                aggregates[key] = Decimal("0.00")
+
+        by_asset = (
+            rollups.values("asset__symbol")
+            .annotate(trades=Sum("trade_count"), profit_loss=Sum("profit_loss"))
+            .order_by("-profit_loss")
+        )
+
+        by_desk = (
+            rollups.values("desk__name")
+            .annotate(trades=Sum("trade_count"), profit_loss=Sum("profit_loss"))
+            .order_by("-profit_loss")
+        )
+
+        by_date = (
+            rollups.values("day")
+            .annotate(trades=Sum("trade_count"), profit_loss=Sum("profit_loss"))
+            .order_by("day")
+        )
+
+        summary = {
+            "total_trades": aggregates["total_trades"] or 0,
+            "total_profit_loss": aggregates["total_profit_loss"],
+            "total_buy_volume": aggregates["total_buy_volume"],
+            "total_sell_volume": aggregates["total_sell_volume"],
+            "by_asset": list(by_asset),
+            "by_desk": list(by_desk),
+            "by_date": [
+                {
+                    "trade_date__date": row["day"],
+                    "trades": row["trades"],
+                    "profit_loss": row["profit_loss"],
+                }
+                for row in by_date
+            ],
+        }
+
+        if by_trader:
+            summary["by_trader"] = list(
+                rollups.values("trader_id", "trader__email", "trader__full_name")
+                .annotate(
+                    trades=Sum("trade_count"),
+                    profit_loss=Sum("profit_loss"),
+                )
+                .order_by("-profit_loss")
+            )
+
+        return summary
+
+
+class DeskPositionService:
+    @staticmethod
+    def record(trades, sign=1):
+        """Fold trades into desk positions; ``sign=-1`` removes them again."""
+        zero = Decimal("0")
+        buckets = defaultdict(
+            lambda: {
+                "trade_count": 0,
+                "quantity": zero,
+                "ngn_flow": zero,
+                "buy_quantity": zero,
+                "buy_amount_ngn": zero,
+            }
+        )
+
+        for trade in trades:
+            bucket = buckets[(trade.desk_id, trade.asset_id)]
+            bucket["trade_count"] += 1
+            if trade.side == "buy":
+                bucket["quantity"] += trade.amount_crypto
+                bucket["ngn_flow"] -= trade.amount_ngn
+                bucket["buy_quantity"] += trade.amount_crypto
+                bucket["buy_amount_ngn"] += trade.amount_ngn
+            else:
+                bucket["quantity"] -= trade.amount_crypto
+                bucket["ngn_flow"] += trade.amount_ngn
+
+        now = timezone.now()
+        for (desk_id, asset_id), bucket in buckets.items():
+            key = {"desk_id": desk_id, "asset_id": asset_id}
+            increments = {field: value * sign for field, value in bucket.items()}
+
+            if sign > 0:
+                increment_or_create(
+                    DeskPosition,
+                    key,
+                    increments,
+                    {"updated_at": now},
+                )
+                continue
+
+            positions = DeskPosition.objects.filter(**key)
+            positions.update(
+                **{
+                    field: F(field) + amount
+                    for field, amount in increments.items()
+                },
+                updated_at=now,
+            )
+            positions.filter(trade_count__lte=0).delete()
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild():
+        DeskPosition.objects.all().delete()
+
+        rows = (
+            Trade.objects
+            .values("desk_id", "asset_id")
+            .annotate(
+                trade_count=Count("id"),
+                bought=Sum("amount_crypto", filter=Q(side="buy")),
+                sold=Sum("amount_crypto", filter=Q(side="sell")),
+                paid=Sum("amount_ngn", filter=Q(side="buy")),
+                received=Sum("amount_ngn", filter=Q(side="sell")),
+            )
+            .order_by()
+        )
+
+        zero = Decimal("0")
+        positions = [
+            DeskPosition(
+                desk_id=row["desk_id"],
+                asset_id=row["asset_id"],
+                trade_count=row["trade_count"],
+                quantity=(row["bought"] or zero) - (row["sold"] or zero),
+                ngn_flow=(row["received"] or zero) - (row["paid"] or zero),
+                buy_quantity=row["bought"] or zero,
+                buy_amount_ngn=row["paid"] or zero,
+            )
+            for row in rows
+        ]
+        DeskPosition.objects.bulk_create(positions, batch_size=1000)
+        return len(positions)
+
+
+class CostBasisService:
+    REPLAY_BATCH_SIZE = 2000
+
+    @staticmethod
+    def record(trades):
+        """
+        Apply newly inserted trades to their (desk, asset) positions.
+
+        The position row is locked for the rest of the transaction, so
+        concurrent bookings on the same asset are matched one at a time.
+        A trade dated before one already applied has to queue ahead of
+        later lots, so its position is replayed instead.
+        """
+        groups = defaultdict(list)
+        for trade in sorted(trades, key=lambda trade: (trade.trade_date, trade.pk)):
+            groups[(trade.desk_id, trade.asset_id)].append(trade)
+
+        for (desk_id, asset_id), group in groups.items():
+            position, created = CostBasisPosition.objects.get_or_create(
+                desk_id=desk_id,
+                asset_id=asset_id,
+                defaults={"method": settings.COST_BASIS_METHOD},
+            )
+            position = (
+                CostBasisPosition.objects
+                .select_for_update()
+                .get(pk=position.pk)
+            )
+
+            applied = Trade.objects.filter(
+                desk_id=desk_id,
+                asset_id=asset_id,
+            ).exclude(pk__in=[trade.pk for trade in group])
+            has_history = created and applied.exists()
+            backdated = (
+                not created
+                and applied.filter(trade_date__gt=group[0].trade_date).exists()
+            )
+
+            if position.is_stale or has_history or backdated:
+                # The replay reads the trades table, which already
+                # includes this group.
+                CostBasisService.replay_position(desk_id, asset_id)
+                continue
+
+            lots = DatabaseLots(position)
+            for trade in group:
+                apply_trade(
+                    position,
+                    lots,
+                    trade.pk,
+                    trade.side,
+                    trade.amount_crypto,
+                    trade.amount_ngn,
+                    trade.trade_date,
+                )
+            position.save()
+
+    @staticmethod
+    def mark_stale(trades):
+        # A deleted trade may sit anywhere in the lot queue, so the
+        # position is replayed from history the next time it is touched.
+        for desk_id, asset_id in {(t.desk_id, t.asset_id) for t in trades}:
+            CostBasisPosition.objects.filter(
+                desk_id=desk_id,
+                asset_id=asset_id,
+            ).update(is_stale=True)
+
+    @staticmethod
+    def replay(trades, method, batch_size=REPLAY_BATCH_SIZE):
+        """
+        Replay ``trades`` in (trade_date, id) order in a single streaming pass.
+
+        Returns ``{(desk_id, asset_id): (position, lots)}`` with unsaved
+        positions; only open lots are kept in memory.
+        """
+        books = {}
+        rows = (
+            trades
+            .order_by("trade_date", "id")
+            .values_list(
+                "id",
+                "desk_id",
+                "asset_id",
+                "side",
+                "amount_crypto",
+                "amount_ngn",
+                "trade_date",
+            )
+            .iterator(chunk_size=batch_size)
+        )
+
+        for (
+            trade_id,
+            desk_id,
+            asset_id,
+            side,
+            quantity,
+            amount_ngn,
+            trade_date,
+        ) in rows:
+            key = (desk_id, asset_id)
+            if key not in books:
+                books[key] = (
+                    CostBasisPosition(
+                        desk_id=desk_id,
+                        asset_id=asset_id,
+                        method=method,
+                    ),
+                    MemoryLots(),
+                )
+            position, lots = books[key]
+            apply_trade(
+                position,
+                lots,
+                trade_id,
+                side,
+                quantity,
+                amount_ngn,
+                trade_date,
+            )
+
+        return books
+
+    @staticmethod
+    def write(books, batch_size=REPLAY_BATCH_SIZE):
+        positions = [position for position, _ in books.values()]
+        CostBasisPosition.objects.bulk_create(positions, batch_size=batch_size)
+
+        CostBasisLot.objects.bulk_create(
+            (
+                CostBasisLot(
+                    position=position,
+                    trade_id=lot.trade_id,
+                    trade_date=lot.trade_date,
+                    quantity=lot.quantity,
+                    unit_cost=lot.unit_cost,
+                )
+                for position, lots in books.values()
+                for lot in lots.lots
+            ),
+            batch_size=batch_size,
+        )
+        return len(positions)
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild_desk(desk_id, method=None, batch_size=REPLAY_BATCH_SIZE):
+        method = method or settings.COST_BASIS_METHOD
+        books = CostBasisService.replay(
+            Trade.objects.filter(desk_id=desk_id),
+            method,
+            batch_size,
+        )
+        CostBasisPosition.objects.filter(desk_id=desk_id).delete()
+        return CostBasisService.write(books, batch_size)
+
+    @staticmethod
+    @transaction.atomic
+    def replay_position(desk_id, asset_id):
+        positions = CostBasisPosition.objects.filter(
+            desk_id=desk_id,
+            asset_id=asset_id,
+        )
+        method = (
+            positions.values_list("method", flat=True).first()
+            or settings.COST_BASIS_METHOD
+        )
+        books = CostBasisService.replay(
+            Trade.objects.filter(desk_id=desk_id, asset_id=asset_id),
+            method,
+        )
+        positions.delete()
+        return CostBasisService.write(books)
+
+    @staticmethod
+    @transaction.atomic
+    def replay_stale(positions):
+        """Replay the stale positions among ``positions``; returns how many."""
+        stale = positions.filter(is_stale=True).select_for_update()
+        count = 0
+        for desk_id, asset_id in stale.values_list("desk_id", "asset_id"):
+            count += CostBasisService.replay_position(desk_id, asset_id)
+        return count
+
+
+class CandleService:
+    REBUILD_BATCH_SIZE = 2000
+
+    @staticmethod
+    def bars_for(trades):
+        """Merge trades into one bar per (desk, asset, interval, bucket)."""
+        bars = {}
+        for trade in sorted(trades, key=lambda trade: trade.pk):
+            bar = Bar.from_trade(
+                trade.trade_date,
+                trade.rate,
+                trade.amount_crypto,
+                trade.amount_ngn,
+            )
+            for interval in INTERVALS:
+                key = (
+                    trade.desk_id,
+                    trade.asset_id,
+                    interval,
+                    bucket_start(trade.trade_date, interval),
+                )
+                if key in bars:
+                    bars[key].merge(bar)
+                else:
+                    bars[key] = bar.copy()
+        return bars
+
+    @staticmethod
+    def record(trades):
+        """
+        Merge new trades into their candles at every interval.
+
+        Each bucket is one UPDATE whose CASE/GREATEST/LEAST expressions
+        merge against the stored row, so concurrent writers cannot clobber
+        each other's high, low or volume.
+        """
+        for (desk_id, asset_id, interval, bucket), bar in (
+            CandleService.bars_for(trades).items()
+        ):
+            update_or_insert(
+                TradeCandle,
+                {
+                    "desk_id": desk_id,
+                    "asset_id": asset_id,
+                    "interval": interval,
+                    "bucket": bucket,
+                },
+                {
+                    "open": Case(
+                        When(open_at__gt=bar.open_at, then=Value(bar.open)),
+                        default=F("open"),
+                    ),
+                    "open_at": Least(F("open_at"), Value(bar.open_at)),
+                    "high": Greatest(F("high"), Value(bar.high)),
+                    "low": Least(F("low"), Value(bar.low)),
+                    "close": Case(
+                        When(close_at__lte=bar.close_at, then=Value(bar.close)),
+                        default=F("close"),
+                    ),
+                    "close_at": Greatest(F("close_at"), Value(bar.close_at)),
+                    "volume": F("volume") + bar.volume,
+                    "volume_ngn": F("volume_ngn") + bar.volume_ngn,
+                    "trade_count": F("trade_count") + bar.trade_count,
+                },
+                vars(bar),
+            )
+
+    @staticmethod
+    def recompute(trades):
+        """Rebuild the buckets touched by deleted trades from what is left."""
+        keys = {
+            (
+                trade.desk_id,
+                trade.asset_id,
+                interval,
+                bucket_start(trade.trade_date, interval),
+            )
+            for trade in trades
+            for interval in INTERVALS
+        }
+
+        for desk_id, asset_id, interval, bucket in keys:
+            lookup = {
+                "desk_id": desk_id,
+                "asset_id": asset_id,
+                "interval": interval,
+                "bucket": bucket,
+            }
+            TradeCandle.objects.filter(**lookup).delete()
+
+            remaining = CandleService.bars_for(
+                Trade.objects.filter(
+                    desk_id=desk_id,
+                    asset_id=asset_id,
+                    trade_date__gte=bucket,
+                    trade_date__lt=bucket + INTERVAL_LENGTHS[interval],
+                ).only(
+                    "id",
+                    "desk_id",
+                    "asset_id",
+                    "trade_date",
+                    "rate",
+                    "amount_crypto",
+                    "amount_ngn",
+                )
+            )
+            bar = remaining.get((desk_id, asset_id, interval, bucket))
+            if bar is not None:
+                TradeCandle.objects.create(**lookup, **vars(bar))
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(batch_size=REBUILD_BATCH_SIZE):
+        """
+        Rebuild every candle in one pass over the trades.
+
+        Trades only feed the 1m bars; each finished bar is rolled up into
+        the next interval, so no GROUP BY per interval is needed.
+        """
+        TradeCandle.objects.all().delete()
+
+        rows = (
+            Trade.objects
+            .order_by("desk_id", "asset_id", "trade_date", "id")
+            .values_list(
+                "desk_id",
+                "asset_id",
+                "trade_date",
+                "rate",
+                "amount_crypto",
+                "amount_ngn",
+            )
+            .iterator(chunk_size=batch_size)
+        )
+        candles = fold_candles(
+            ((desk_id, asset_id), *values)
+            for desk_id, asset_id, *values in rows
+        )
+
+        created = 0
+        batch = []
+        for (desk_id, asset_id), interval, bucket, bar in candles:
+            batch.append(
+                TradeCandle(
+                    desk_id=desk_id,
+                    asset_id=asset_id,
+                    interval=interval,
+                    bucket=bucket,
+                    **vars(bar),
+                )
+            )
+            if len(batch) >= batch_size:
+                TradeCandle.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+
+        if batch:
+            TradeCandle.objects.bulk_create(batch)
+            created += len(batch)
+
+        return created
+
+
+class ExportJobService:
+    PROGRESS_INTERVAL = 2.0
+
+    @staticmethod
+    def get_queryset(job):
+        if job.scope == "desk":
+            trades = Trade.objects.filter(desk_id=job.desk_id)
+        else:
+            trades = Trade.objects.filter(trader_id=job.requested_by_id)
+
+        return TradeFilter(job.filters, queryset=trades).qs.order_by("-trade_date")
+
+    @staticmethod
+    def iter_chunks(job, trades, progress):
+        """Yield the encoded export of ``trades`` in ``job.format`` as bytes."""
+        desk = job.scope == "desk"
+
+        if job.format in (ExportJob.FORMAT_PARQUET, ExportJob.FORMAT_ARROW):
+            return iter_trade_arrow(
+                trades,
+                job.format,
+                with_trader=desk,
+                progress=progress,
+            )
+
+        if desk:
+            columns, header = DESK_CSV_COLUMNS, DESK_CSV_HEADER
+        else:
+            columns, header = CSV_COLUMNS, CSV_HEADER
+
+        chunks = iter_trade_csv(trades, columns, header, progress=progress)
+        if job.format == ExportJob.FORMAT_CSV_GZIP:
+            return iter_gzip(chunks)
+        return (chunk.encode("utf-8") for chunk in chunks)
+
+    @staticmethod
+    def run(job):
+        """
+        Write the export to a temporary file, then hand it to storage.
+
+        Progress is saved at most every ``PROGRESS_INTERVAL`` seconds; each
+        save doubles as the worker heartbeat.
+        """
+        trades = ExportJobService.get_queryset(job)
+        heartbeat(job, rows_total=trades.count(), rows_written=0)
+
+        rows_written = 0
+        last_saved = time.monotonic()
+
+        def progress(rows):
+            nonlocal rows_written, last_saved
+            rows_written = rows
+            if time.monotonic() - last_saved >= ExportJobService.PROGRESS_INTERVAL:
+                heartbeat(job, rows_written=rows)
+                last_saved = time.monotonic()
+
+        chunks = ExportJobService.iter_chunks(job, trades, progress)
+        extension = FILE_EXTENSIONS.get(job.format, job.format)
+
+        with tempfile.TemporaryFile() as output:
+            for chunk in chunks:
+                output.write(chunk)
+
+            size = output.tell()
+            output.seek(0)
+            job.file.save(
+                f"trades-{job.pk}.{extension}",
+                File(output),
+                save=False,
+            )
+
+        complete_job(
+            job,
+            file=job.file.name,
+            rows_written=rows_written,
+            size=size,
+        )
@@ -0,0 +1,41 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .assets import asset_cache
+from .models import Asset, Trade
+from .services import TradeService
+
+
+# Sent once per bulk insert with ``trader`` and the list of ``trades``;
+# bulk_create bypasses post_save, so per-trade receivers never fire.
+trades_bulk_created = Signal()
+
+
+@receiver(pre_save, sender=Trade)
+def trade_saving(sender, instance, raw, **kwargs):
+    if instance._state.adding and not raw:
+        TradeService.assign_sync_seqs([instance])
+
+
+@receiver(post_save, sender=Trade)
+def trade_saved(sender, instance, created, **kwargs):
+    if created:
+        TradeService.record_created([instance])
+
+
+@receiver(post_delete, sender=Trade)
+def trade_deleted(sender, instance, **kwargs):
+    TradeService.record_deleted([instance])
+
+
+@receiver(post_save, sender=Asset)
+def asset_saved(sender, instance, created, raw, **kwargs):
+    # New symbols cannot be stale anywhere; the creating path caches them.
+    if not created and not raw:
+        transaction.on_commit(asset_cache.invalidate)
+
+
+@receiver(post_delete, sender=Asset)
+def asset_deleted(sender, instance, **kwargs):
+    transaction.on_commit(asset_cache.invalidate)
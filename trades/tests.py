@@ -1,3 +1,1948 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import tempfile
+from base64 import urlsafe_b64encode
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal, ROUND_HALF_UP
+from io import StringIO
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.throttling import UserRateThrottle
+
+from users.models import Desk, User
+from .assets import AssetCache, asset_cache
+from .checks import check_asset_cache_backend
+from .columnar import (
+    FORMAT_ARROW,
+    FORMAT_PARQUET,
+    LabelDictionary,
+    iter_trade_arrow,
+    trade_schema,
+)
+from .exports import CSV_HEADER
+from .cost_basis import MemoryLots, apply_trade
+from .filters import TradeFilter
+from .metrics import trade_metrics
+from .models import (
+    Asset,
+    CostBasisPosition,
+    ExportJob,
+    Trade,
+    TradeCandle,
+    TradeDailyRollup,
+)
+from .serializers import (
+    DeskTradeListSerializer,
+    PnLSummarySerializer,
+    TradeCandleSerializer,
+    TradeListSerializer,
+)
+from .services import (
+    ROLLUP_KEY_FIELDS,
+    CostBasisService,
+    TradeRollupService,
+    TradeService,
+    TradeSyncService,
+)
+
+
+def create_trade(trader, asset, trade_date, **overrides):
+    fields = {
+        "trader": trader,
+        "desk": trader.desk,
+        "asset": asset,
+        "side": "buy",
+        "trade_type": "spot",
+        "amount_crypto": Decimal("0.10000000"),
+        "amount_ngn": Decimal("100.00"),
+        "rate": Decimal("1000.00"),
+        "trade_date": trade_date,
+    }
+    fields.update(overrides)
+    return Trade.objects.create(**fields)
+
+
+class TradeFilterIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.desk = Desk.objects.create(name="Index Desk")
+        cls.trader = User.objects.create_user(
+            email="index@otcbook.com",
+            password="password",
+            full_name="Index Trader",
+            role="trader",
+            desk=cls.desk,
+        )
+        cls.btc = Asset.objects.create(symbol="BTC")
+        cls.usdt = Asset.objects.create(symbol="USDT")
+
+        now = timezone.now()
+        for hours in range(0, 24 * 20, 7):
+            # Only sells are profitable; keeping them rare gives the profit
+            # filters something for trade_trader_pnl_idx to narrow.
+            create_trade(
+                cls.trader,
+                cls.btc if hours % 2 else cls.usdt,
+                now - timedelta(hours=hours),
+                side="sell" if hours % 5 == 0 else "buy",
+                amount_ngn=Decimal("100.00") + hours,
+            )
+
+    def filtered(self, **params):
+        return TradeFilter(
+            params,
+            queryset=Trade.objects.filter(trader=self.trader),
+        ).qs
+
+    def assertUsesIndex(self, queryset, *index_names):
+        if connection.vendor == "postgresql":
+            # Tiny test tables would otherwise always be seq-scanned, or
+            # read through any index on trader and then sorted, or joined
+            # to the asset lookup without using asset_id order.
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE trades_trade, trades_asset")
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute("SET LOCAL enable_sort = off")
+                cursor.execute("SET LOCAL enable_nestloop = off")
+                cursor.execute("SET LOCAL enable_hashjoin = off")
+        plan = queryset.explain()
+        self.assertTrue(
+            any(name in plan for name in index_names),
+            f"Expected one of {index_names} in plan:\n{plan}",
+        )
+
+    def test_default_listing_uses_trader_date_index(self):
+        self.assertUsesIndex(self.filtered(), "trade_trader_date_idx")
+
+    def test_date_range_uses_trader_date_index(self):
+        today = timezone.now().date()
+        queryset = self.filtered(
+            start_date=str(today - timedelta(days=5)),
+            end_date=str(today),
+        )
+        self.assertUsesIndex(queryset, "trade_trader_date_idx")
+
+    def test_date_presets_use_trader_date_index(self):
+        for preset in ("today", "week", "month", "year"):
+            with self.subTest(preset=preset):
+                self.assertUsesIndex(
+                    self.filtered(date_preset=preset),
+                    "trade_trader_date_idx",
+                )
+
+    def test_asset_filter_uses_index(self):
+        self.assertUsesIndex(
+            self.filtered(asset="btc"),
+            "trade_trader_date_idx",
+            "trade_trader_asset_idx",
+        )
+        self.assertUsesIndex(
+            self.filtered(asset="btc").order_by(),
+            "trade_trader_asset_idx",
+        )
+
+    def test_profit_filters_use_trader_pnl_index(self):
+        self.assertUsesIndex(
+            self.filtered(is_profitable="true").order_by(),
+            "trade_trader_pnl_idx",
+        )
+        self.assertUsesIndex(
+            self.filtered(min_profit="10").order_by(),
+            "trade_trader_pnl_idx",
+        )
+
+    def test_desk_date_range_uses_desk_date_index(self):
+        queryset = Trade.objects.filter(
+            desk=self.desk,
+            trade_date__gte=timezone.now() - timedelta(days=3),
+        )
+        self.assertUsesIndex(queryset, "trade_desk_date_idx")
+
+    def test_date_filters_match_date_cast_lookups(self):
+        trades = Trade.objects.filter(trader=self.trader)
+        today = timezone.now().date()
+
+        for days in (0, 1, 6, 19):
+            start = today - timedelta(days=days)
+            with self.subTest(start=start):
+                self.assertQuerySetEqual(
+                    self.filtered(start_date=str(start), end_date=str(today)),
+                    trades.filter(
+                        trade_date__date__gte=start,
+                        trade_date__date__lte=today,
+                    ),
+                    ordered=False,
+                )
+
+        self.assertQuerySetEqual(
+            self.filtered(date_preset="today"),
+            trades.filter(trade_date__date=today),
+            ordered=False,
+        )
+
+
+def reference_metrics(trades):
+    """Straightforward Decimal implementation used to check trade_metrics."""
+    cent = Decimal("0.01")
+    ratio = Decimal("0.0001")
+    trades = sorted(trades, key=lambda trade: (trade.trade_date, trade.id))
+    pnls = [trade.profit_loss for trade in trades]
+    wins = [pnl for pnl in pnls if pnl > 0]
+    losses = [pnl for pnl in pnls if pnl < 0]
+
+    equity = peak = drawdown = Decimal("0.00")
+    streak = longest = 0
+    for pnl in pnls:
+        equity += pnl
+        peak = max(peak, equity)
+        drawdown = max(drawdown, peak - equity)
+        streak = streak + 1 if pnl < 0 else 0
+        longest = max(longest, streak)
+
+    assets = {}
+    for trade in trades:
+        row = assets.setdefault(
+            trade.asset.symbol,
+            {"trades": 0, "volume": Decimal("0"), "volume_ngn": Decimal("0")},
+        )
+        row["trades"] += 1
+        row["volume"] += trade.amount_crypto
+        row["volume_ngn"] += trade.amount_ngn
+
+    def quantize(value, places):
+        return value.quantize(places, rounding=ROUND_HALF_UP)
+
+    return {
+        "total_trades": len(pnls),
+        "winning_trades": len(wins),
+        "losing_trades": len(losses),
+        "win_rate": quantize(Decimal(len(wins)) / len(pnls), ratio),
+        "total_profit_loss": sum(pnls),
+        "gross_profit": sum(wins),
+        "gross_loss": -sum(losses),
+        "average_win": quantize(sum(wins) / len(wins), cent),
+        "average_loss": quantize(sum(losses) / len(losses), cent),
+        "profit_factor": quantize(sum(wins) / -sum(losses), ratio),
+        "max_drawdown": drawdown,
+        "longest_losing_streak": longest,
+        "by_asset": {
+            symbol: {
+                "trades": row["trades"],
+                "volume": row["volume"],
+                "volume_ngn": row["volume_ngn"],
+                "vwap": quantize(row["volume_ngn"] / row["volume"], cent),
+            }
+            for symbol, row in assets.items()
+        },
+    }
+
+
+class TradeMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.desk = Desk.objects.create(name="Metrics Desk")
+        cls.trader = User.objects.create_user(
+            email="metrics@otcbook.com",
+            password="password",
+            full_name="Metrics Trader",
+            role="trader",
+            desk=cls.desk,
+        )
+        assets = [
+            Asset.objects.create(symbol=symbol)
+            for symbol in ("BTC", "USDT", "ETH")
+        ]
+
+        start = timezone.now() - timedelta(days=30)
+        for index in range(120):
+            # Rates swing around amount_ngn / amount_crypto so trades win,
+            # lose and break even in irregular runs.
+            swing = Decimal((index * 37) % 23 - 11) * Decimal("3.17")
+            create_trade(
+                cls.trader,
+                assets[index % 3],
+                start + timedelta(hours=index * 5),
+                side="sell" if index % 4 else "buy",
+                amount_crypto=Decimal("0.12345678") * (index % 7 + 1),
+                amount_ngn=Decimal("1234.56") * (index % 7 + 1),
+                rate=Decimal("10000.00") + swing * 100,
+            )
+
+    def setUp(self):
+        # Request throttle counters live in the cache.
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def test_matches_reference_implementation(self):
+        trades = Trade.objects.filter(trader=self.trader).select_related("asset")
+        expected = reference_metrics(trades)
+        actual = trade_metrics(trades)
+
+        by_asset = {
+            row.pop("asset"): row
+            for row in actual.pop("by_asset")
+        }
+        self.assertEqual(by_asset, expected.pop("by_asset"))
+        self.assertEqual(actual, expected)
+
+    def test_endpoint_honours_trade_filter(self):
+        response = self.client.get("/trades/metrics/", {"asset": "btc"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total_trades"], 40)
+        self.assertEqual(
+            [row["asset"] for row in response.json()["by_asset"]],
+            ["BTC"],
+        )
+
+    def test_desk_scope_requires_desk_role(self):
+        response = self.client.get("/trades/metrics/", {"scope": "desk"})
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_volume_past_the_int64_satoshi_range(self):
+        # Scaled by 1e8 these amounts no longer fit a bigint.
+        shib = Asset.objects.create(symbol="SHIB")
+        for amount in (Decimal("123456789012.5"), Decimal("99999999999.25")):
+            create_trade(
+                self.trader,
+                shib,
+                timezone.now(),
+                amount_crypto=amount,
+                amount_ngn=Decimal("2500000.00"),
+                rate=Decimal("0.02"),
+            )
+
+        actual = trade_metrics(Trade.objects.filter(asset=shib))
+
+        self.assertEqual(
+            actual["by_asset"],
+            [
+                {
+                    "asset": "SHIB",
+                    "trades": 2,
+                    "volume": Decimal("223456789011.75000000"),
+                    "volume_ngn": Decimal("5000000.00"),
+                    "vwap": Decimal("0.00"),
+                },
+            ],
+        )
+
+
+class TradeListRenderingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.desk = Desk.objects.create(name="Render Desk \u2028")
+        cls.trader = User.objects.create_user(
+            email="render@otcbook.com",
+            password="password",
+            full_name="Render Trader",
+            role="desk_owner",
+            desk=cls.desk,
+        )
+        btc = Asset.objects.create(symbol="BTC")
+
+        now = timezone.now().replace(microsecond=120034)
+        for index in range(25):
+            create_trade(
+                cls.trader,
+                btc,
+                now - timedelta(hours=index, microseconds=index * 7),
+                side="sell" if index % 2 else "buy",
+                amount_crypto=Decimal("0.00000001") * (index + 1) * 12345,
+                amount_ngn=Decimal("1000.05") * (index + 1),
+                rate=Decimal("99999.99"),
+            )
+
+    def setUp(self):
+        # Request throttle counters live in the cache.
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def stock_render(self, serializer_class, queryset):
+        data = serializers.ListSerializer(queryset, child=serializer_class()).data
+        return JSONRenderer().render(data)
+
+    def test_fast_path_matches_stock_output(self):
+        trades = Trade.objects.filter(trader=self.trader).order_by("-trade_date")
+
+        for path, serializer_class in (
+            ("/trades/list/", TradeListSerializer),
+            ("/trades/desk/list/", DeskTradeListSerializer),
+        ):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.content,
+                    self.stock_render(serializer_class, trades),
+                )
+
+    def test_paginated_pages_keep_instance_path(self):
+        response = self.client.get("/trades/list/", {"page_size": 10})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 10)
+        self.assertIsNotNone(response.json()["next"])
+
+
+class TradeBulkCreateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="Bulk Desk")
+        cls.trader = User.objects.create_user(
+            email="bulk@otcbook.com",
+            password="password",
+            full_name="Bulk Trader",
+            role="trader",
+            desk=desk,
+        )
+        Asset.objects.create(symbol="BTC")
+
+    def setUp(self):
+        # Assets cached by earlier tests were rolled back with them, and
+        # request throttle counters live in the cache.
+        cache.clear()
+        asset_cache.invalidate()
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def payload(self, index):
+        return {
+            "asset": "btc" if index % 2 else "ETH",
+            "side": "sell" if index % 3 else "buy",
+            "trade_type": "otc",
+            "amount_crypto": "0.12345678",
+            "amount_ngn": f"{150000 + index}.50",
+            "rate": "1250000.00",
+            "trade_date": f"2025-01-{index % 28 + 1:02d}T10:00:00.123456Z",
+        }
+
+    def test_bulk_rows_match_single_creates(self):
+        response = self.client.post(
+            "/trades/bulk/",
+            [self.payload(index) for index in range(30)],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        ids = [trade["id"] for trade in response.json()]
+        trades = Trade.objects.in_bulk(ids)
+        self.assertEqual(len(trades), 30)
+
+        for index, trade_id in enumerate(ids):
+            trade = trades[trade_id]
+            expected = Trade(
+                amount_crypto=trade.amount_crypto,
+                amount_ngn=Decimal(self.payload(index)["amount_ngn"]),
+                rate=Decimal("1250000.00"),
+                side=self.payload(index)["side"],
+            )
+            self.assertEqual(trade.amount_ngn, expected.amount_ngn)
+            self.assertEqual(trade.profit_loss, expected.calculate_pnl())
+            self.assertEqual(trade.trade_date.microsecond, 123456)
+            self.assertEqual(trade.sync_seq, index + 1)
+            self.assertIsNotNone(trade.created_at)
+
+        # Ids drawn for the batch must not be handed out again.
+        later = create_trade(
+            self.trader,
+            Asset.objects.get(symbol="BTC"),
+            timezone.now(),
+        )
+        self.assertGreater(later.pk, max(ids))
+
+
+class ExportJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="Export Desk")
+        cls.trader = User.objects.create_user(
+            email="export@otcbook.com",
+            password="password",
+            full_name="Export Trader",
+            role="trader",
+            desk=desk,
+        )
+        btc = Asset.objects.create(symbol="BTC")
+
+        now = timezone.now()
+        for index in range(12):
+            create_trade(
+                cls.trader,
+                btc,
+                now - timedelta(days=index),
+                side="sell" if index % 2 else "buy",
+                amount_ngn=Decimal("100.00") + index,
+            )
+
+    def setUp(self):
+        # Request throttle counters live in the cache.
+        cache.clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def export(self, export_format, **filters):
+        response = self.client.post(
+            "/trades/exports/",
+            {"format": export_format, "filters": filters},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["id"]
+
+        call_command("run_export_jobs", "--once", stdout=StringIO(), stderr=StringIO())
+
+        job = self.client.get(f"/trades/exports/{job_id}/").json()
+        self.assertEqual(job["status"], ExportJob.STATUS_COMPLETED)
+        self.assertEqual(job["progress"], 1.0)
+
+        response = self.client.get(job["download_url"])
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content)
+        self.assertEqual(job["size"], len(content))
+        return job, content
+
+    def test_csv_and_gzip_exports(self):
+        job, content = self.export("csv", side="buy")
+        _, compressed = self.export("csv.gz", side="buy")
+
+        self.assertEqual(job["rows_total"], 6)
+        self.assertEqual(job["rows_written"], 6)
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(rows[0], CSV_HEADER)
+        self.assertEqual([row[4] for row in rows[1:]], ["BUY"] * 6)
+        self.assertEqual(gzip.decompress(compressed), content)
+
+    def test_parquet_export(self):
+        job, content = self.export("parquet")
+
+        table = pq.read_table(io.BytesIO(content))
+        self.assertEqual(job["rows_written"], 12)
+        self.assertEqual(table.num_rows, 12)
+        self.assertEqual(
+            table.column("id").to_pylist(),
+            list(
+                Trade.objects.order_by("-trade_date").values_list("id", flat=True)
+            ),
+        )
+
+    def test_download_before_completion_is_not_found(self):
+        job_id = self.client.post(
+            "/trades/exports/",
+            {"format": "csv"},
+            format="json",
+        ).json()["id"]
+
+        response = self.client.get(f"/trades/exports/{job_id}/download/")
+
+        self.assertEqual(response.status_code, 404)
+
+
+def reference_pnl_summary(trades):
+    """The P&L payload as it was computed from trades before the rollup."""
+    aggregates = trades.aggregate(
+        total_trades=Count("id"),
+        total_profit_loss=Sum("profit_loss"),
+        total_buy_volume=Sum("amount_ngn", filter=Q(side="buy")),
+        total_sell_volume=Sum("amount_ngn", filter=Q(side="sell")),
+    )
+    for key in aggregates:
+        if aggregates[key] is None:
+            aggregates[key] = Decimal("0.00")
+
+    by_asset = (
+        trades.values("asset__symbol")
+        .annotate(trades=Count("id"), profit_loss=Sum("profit_loss"))
+        .order_by("-profit_loss")
+    )
+    by_desk = (
+        trades.values("desk__name")
+        .annotate(trades=Count("id"), profit_loss=Sum("profit_loss"))
+        .order_by("-profit_loss")
+    )
+    by_date = (
+        trades.values("trade_date__date")
+        .annotate(trades=Count("id"), profit_loss=Sum("profit_loss"))
+        .order_by("trade_date__date")
+    )
+
+    return PnLSummarySerializer({
+        **aggregates,
+        "by_asset": list(by_asset),
+        "by_desk": list(by_desk),
+        "by_date": list(by_date),
+    }).data
+
+
+def to_cents(data):
+    """
+    Round rendered amounts to the columns' two places; SQLite sums
+    decimals as floats, so the trade aggregates may be off by 1e-12.
+    """
+    if isinstance(data, dict):
+        return {key: to_cents(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [to_cents(value) for value in data]
+    if isinstance(data, float):
+        return round(data, 2)
+    return data
+
+
+# Lagos is UTC+1, so trades either side of UTC midnight land on different
+# local days than their UTC dates.
+@override_settings(TIME_ZONE="Africa/Lagos")
+class TradePnLRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="PnL Desk")
+        other_desk = Desk.objects.create(name="PnL Branch")
+        cls.trader = User.objects.create_user(
+            email="pnl@otcbook.com",
+            password="password",
+            full_name="PnL Trader",
+            role="trader",
+            desk=desk,
+        )
+        assets = [
+            Asset.objects.create(symbol=symbol)
+            for symbol in ("BTC", "USDT", "ETH")
+        ]
+
+        midnight = datetime(2025, 3, 10, tzinfo=dt_timezone.utc)
+        offsets = [
+            timedelta(minutes=minutes)
+            for minutes in (-90, -61, -59, -1, 0, 1, 59, 61, 23 * 60 + 1)
+        ] + [timedelta(days=days, hours=13) for days in range(-5, 5)]
+
+        for index, offset in enumerate(offsets):
+            create_trade(
+                cls.trader,
+                assets[index % 3],
+                midnight + offset,
+                desk=other_desk if index % 4 == 0 else desk,
+                side="sell" if index % 3 else "buy",
+                amount_crypto=Decimal("0.12345678") * (index + 1),
+                amount_ngn=Decimal("1234.57") * (index + 1),
+                rate=Decimal("10000.00") + Decimal("123.45") * (index % 7 - 3),
+            )
+
+    def setUp(self):
+        # Request throttle counters and cached summaries live in the cache.
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def assertMatchesTrades(self):
+        response = self.client.get("/trades/pnl/")
+
+        self.assertEqual(response.status_code, 200)
+        expected = reference_pnl_summary(Trade.objects.filter(trader=self.trader))
+        self.assertEqual(
+            to_cents(response.json()),
+            to_cents(json.loads(JSONRenderer().render(expected))),
+        )
+        return response.json()
+
+    def test_summary_matches_trade_aggregates(self):
+        summary = self.assertMatchesTrades()
+
+        # The trades straddling midnight are split over local days.
+        self.assertIn("2025-03-09", [row["trade_date__date"] for row in summary["by_date"]])
+        self.assertEqual(summary["total_trades"], 19)
+        self.assertEqual(len(summary["by_desk"]), 2)
+
+    def test_rebuild_keeps_summary(self):
+        self.assertMatchesTrades()
+
+        created = TradeRollupService.rebuild()
+        cache.clear()
+
+        self.assertEqual(created, TradeDailyRollup.objects.count())
+        self.assertMatchesTrades()
+
+    def test_rebuild_command_matches_incremental_rows(self):
+        fields = (*ROLLUP_KEY_FIELDS, "trade_count", "profit_loss", "amount_ngn")
+        incremental = set(TradeDailyRollup.objects.values_list(*fields))
+
+        call_command("rebuild_trade_rollups", "--batch-size", "4", stdout=StringIO())
+
+        self.assertEqual(set(TradeDailyRollup.objects.values_list(*fields)), incremental)
+
+
+class CostBasisTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.desk = Desk.objects.create(name="Cost Basis Desk")
+        cls.trader = User.objects.create_user(
+            email="costbasis@otcbook.com",
+            password="password",
+            full_name="Cost Basis Trader",
+            role="trader",
+            desk=cls.desk,
+        )
+        cls.assets = [
+            Asset.objects.create(symbol=symbol)
+            for symbol in ("BTC", "USDT")
+        ]
+
+    def book(self, method, trades):
+        position = CostBasisPosition(method=method)
+        lots = MemoryLots()
+        for trade_id, (side, quantity, amount_ngn) in enumerate(trades, 1):
+            apply_trade(
+                position,
+                lots,
+                trade_id,
+                side,
+                Decimal(quantity),
+                Decimal(amount_ngn),
+            )
+        return position, [
+            (lot.trade_id, lot.quantity, lot.unit_cost) for lot in lots.lots
+        ]
+
+    def assertPosition(self, position, quantity, cost_basis, realized_pnl):
+        self.assertEqual(
+            (position.quantity, position.cost_basis, position.realized_pnl),
+            (Decimal(quantity), Decimal(cost_basis), Decimal(realized_pnl)),
+        )
+
+    def test_fifo_consumes_oldest_lot_first(self):
+        position, lots = self.book(
+            CostBasisPosition.FIFO,
+            [("buy", "1", "100"), ("buy", "2", "260"), ("sell", "2", "300")],
+        )
+
+        # 1 @ 100 and 1 of the 2 @ 130 are sold at 150.
+        self.assertPosition(position, "1", "130", "70")
+        self.assertEqual(lots, [(2, Decimal("1"), Decimal("130"))])
+
+    def test_fifo_flips_long_short_long(self):
+        position, lots = self.book(
+            CostBasisPosition.FIFO,
+            [
+                ("buy", "1", "100"),
+                ("buy", "2", "260"),
+                ("sell", "2", "300"),
+                # Closes the last long lot at a loss, then opens 2 short.
+                ("sell", "3", "360"),
+            ],
+        )
+        self.assertPosition(position, "-2", "240", "60")
+        self.assertEqual(lots, [(4, Decimal("2"), Decimal("120"))])
+
+        position, lots = self.book(
+            CostBasisPosition.FIFO,
+            [
+                ("buy", "1", "100"),
+                ("buy", "2", "260"),
+                ("sell", "2", "300"),
+                ("sell", "3", "360"),
+                # Covers the short 20 under its price, then opens 1 long.
+                ("buy", "3", "300"),
+            ],
+        )
+        self.assertPosition(position, "1", "100", "100")
+        self.assertEqual(lots, [(5, Decimal("1"), Decimal("100"))])
+
+    def test_weighted_average(self):
+        position, lots = self.book(
+            CostBasisPosition.AVERAGE,
+            [
+                ("buy", "1", "100"),
+                ("buy", "2", "260"),
+                # Average cost is 120.
+                ("sell", "2", "300"),
+                ("sell", "3", "270"),
+                # Short 2 at an average of 90.
+                ("buy", "1", "80"),
+            ],
+        )
+
+        self.assertPosition(position, "-1", "90", "40")
+        self.assertEqual(lots, [])
+
+    def create_history(self):
+        start = timezone.now() - timedelta(days=10)
+        for index in range(60):
+            # Runs of buys and sells long enough to flip the position.
+            side = "buy" if index // 7 % 2 == 0 else "sell"
+            quantity = Decimal("0.12345678") * (index % 5 + 1)
+            rate = Decimal(1000 + index * 37 % 91) + Decimal("0.33")
+            trade_date = start + timedelta(hours=index)
+            if index % 9 == 4:
+                # Booked late, behind trades dated after it.
+                trade_date -= timedelta(hours=30)
+            create_trade(
+                self.trader,
+                self.assets[index % 2],
+                trade_date,
+                side=side,
+                amount_crypto=quantity,
+                amount_ngn=(quantity * rate).quantize(Decimal("0.01")),
+                rate=rate,
+            )
+
+    def stored_books(self):
+        return {
+            (position.desk_id, position.asset_id): (
+                position.method,
+                position.quantity,
+                position.cost_basis,
+                position.realized_pnl,
+                [
+                    (lot.trade_id, lot.quantity, lot.unit_cost)
+                    for lot in position.lots.order_by("trade_date", "trade_id")
+                ],
+            )
+            for position in CostBasisPosition.objects.filter(desk=self.desk)
+        }
+
+    def assertIncrementalMatchesReplay(self, method):
+        self.create_history()
+        incremental = self.stored_books()
+
+        replayed = {
+            key: (
+                position.method,
+                position.quantity,
+                position.cost_basis,
+                position.realized_pnl,
+                [(lot.trade_id, lot.quantity, lot.unit_cost) for lot in lots.lots],
+            )
+            for key, (position, lots) in CostBasisService.replay(
+                Trade.objects.filter(desk=self.desk),
+                method,
+            ).items()
+        }
+        self.assertEqual(len(incremental), 2)
+        self.assertTrue(all(book[3] for book in incremental.values()))
+        self.assertEqual(incremental, replayed)
+
+        call_command(
+            "rebuild_cost_basis",
+            "--desk",
+            str(self.desk.pk),
+            "--method",
+            method,
+            stdout=StringIO(),
+        )
+        self.assertEqual(self.stored_books(), incremental)
+
+    def test_backdated_buy_is_matched_first(self):
+        monday = timezone.now() - timedelta(days=7)
+        btc = self.assets[0]
+
+        def book(days, side, amount_ngn):
+            return create_trade(
+                self.trader,
+                btc,
+                monday + timedelta(days=days),
+                side=side,
+                amount_crypto=Decimal("1"),
+                amount_ngn=Decimal(amount_ngn),
+            )
+
+        wednesday = book(2, "buy", "100.00")
+        thursday = book(3, "buy", "200.00")
+        book(4, "sell", "300.00")
+        # Monday's buy is booked after Friday's sale, which it came before.
+        book(0, "buy", "50.00")
+
+        self.assertEqual(
+            self.stored_books(),
+            {
+                (self.desk.pk, btc.pk): (
+                    CostBasisPosition.FIFO,
+                    Decimal("2"),
+                    Decimal("300"),
+                    Decimal("250.00"),
+                    [
+                        (wednesday.pk, Decimal("1"), Decimal("100")),
+                        (thursday.pk, Decimal("1"), Decimal("200")),
+                    ],
+                ),
+            },
+        )
+
+    def test_incremental_fifo_matches_replay(self):
+        self.assertIncrementalMatchesReplay(CostBasisPosition.FIFO)
+
+    @override_settings(COST_BASIS_METHOD=CostBasisPosition.AVERAGE)
+    def test_incremental_average_matches_replay(self):
+        self.assertIncrementalMatchesReplay(CostBasisPosition.AVERAGE)
+
+
+class TradeKeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="Keyset Desk")
+        cls.trader = User.objects.create_user(
+            email="keyset@otcbook.com",
+            password="password",
+            full_name="Keyset Trader",
+            role="trader",
+            desk=desk,
+        )
+        btc = Asset.objects.create(symbol="BTC")
+
+        start = timezone.now() - timedelta(days=10)
+        for index in range(40):
+            # Few distinct amounts and rates, and pairs of trades at the
+            # same instant, so every ordering has runs of ties.
+            create_trade(
+                cls.trader,
+                btc,
+                start + timedelta(hours=index // 2),
+                side="sell" if index % 3 else "buy",
+                amount_ngn=Decimal("100.00") * (index % 4 + 1),
+                rate=Decimal("900.00") + Decimal("50.00") * (index % 5),
+            )
+
+    def setUp(self):
+        # Walking every page in several orders exceeds the 10/min user
+        # throttle, and assets cached by earlier tests were rolled back.
+        asset_cache.invalidate()
+        self.enterContext(
+            mock.patch.object(UserRateThrottle, "allow_request", return_value=True)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def expected_ids(self, *ordering):
+        tiebreak = "-id" if ordering[-1].startswith("-") else "id"
+        return list(
+            Trade.objects
+            .filter(trader=self.trader)
+            .order_by(*ordering, tiebreak)
+            .values_list("id", flat=True)
+        )
+
+    def get_page(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def walk(self, ordering, page_size=7):
+        page = self.get_page(
+            "/trades/list/",
+            {"ordering": ordering, "page_size": page_size},
+        )
+        self.assertIsNone(page["previous"])
+        pages = [page]
+        while page["next"]:
+            page = self.get_page(page["next"])
+            pages.append(page)
+
+        backwards = [page]
+        while page["previous"]:
+            page = self.get_page(page["previous"])
+            backwards.append(page)
+
+        forward_ids = [trade["id"] for page in pages for trade in page["results"]]
+        backward_ids = [
+            trade["id"]
+            for page in reversed(backwards)
+            for trade in page["results"]
+        ]
+        return forward_ids, backward_ids
+
+    def test_walks_every_ordering_without_gaps(self):
+        for ordering in (
+            "-trade_date",
+            "amount_ngn",
+            "-profit_loss",
+            "-amount_ngn,rate,-trade_date",
+        ):
+            with self.subTest(ordering=ordering):
+                expected = self.expected_ids(*ordering.split(","))
+                forward, backward = self.walk(ordering)
+
+                self.assertEqual(forward, expected)
+                self.assertEqual(backward, expected)
+
+    def test_page_size_is_capped(self):
+        trader = User.objects.create_user(
+            email="keyset-cap@otcbook.com",
+            password="password",
+            full_name="Keyset Cap Trader",
+            role="trader",
+            desk=self.trader.desk,
+        )
+        TradeService.bulk_create_trades(
+            trader,
+            [
+                {
+                    "asset": "BTC",
+                    "side": "buy",
+                    "trade_type": "spot",
+                    "amount_crypto": Decimal("0.10000000"),
+                    "amount_ngn": Decimal("100.00"),
+                    "rate": Decimal("1000.00"),
+                    "trade_date": timezone.now() - timedelta(minutes=index),
+                }
+                for index in range(510)
+            ],
+        )
+        self.client.force_authenticate(trader)
+
+        page = self.get_page("/trades/list/", {"page_size": 1000})
+
+        self.assertEqual(len(page["results"]), 500)
+        self.assertIsNotNone(page["next"])
+
+    def test_bad_cursors_are_not_found(self):
+        page = self.get_page(
+            "/trades/list/",
+            {"ordering": "amount_ngn", "page_size": 5},
+        )
+        cursor = parse_qs(urlparse(page["next"]).query)["cursor"][0]
+        forged = urlsafe_b64encode(
+            b'{"k":["trade_date","id"],"v":["yesterday","1"]}'
+        ).decode("ascii")
+
+        for params in (
+            # A cursor for another ordering.
+            {"ordering": "-trade_date", "cursor": cursor},
+            {"cursor": cursor[:-3] + "xyz"},
+            {"cursor": "not-a-cursor"},
+            {"cursor": forged},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get("/trades/list/", params)
+                self.assertEqual(response.status_code, 404)
+
+    def test_without_cursor_or_page_size_returns_every_trade(self):
+        response = self.client.get("/trades/list/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.json(), list)
+        # Only trade_date orders the legacy list, so ties come in any order.
+        self.assertCountEqual(
+            [trade["id"] for trade in response.json()],
+            self.expected_ids("-trade_date"),
+        )
+
+
+class TradeSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="Sync Desk")
+        cls.trader, cls.other = [
+            User.objects.create_user(
+                email=f"{name}@otcbook.com",
+                password="password",
+                full_name=f"{name.title()} Trader",
+                role="trader",
+                desk=desk,
+            )
+            for name in ("sync", "sync-other")
+        ]
+        cls.btc = Asset.objects.create(symbol="BTC")
+
+        now = timezone.now()
+        cls.trades = [
+            create_trade(cls.trader, cls.btc, now - timedelta(hours=index))
+            for index in range(7)
+        ]
+        create_trade(cls.other, cls.btc, now)
+
+    def setUp(self):
+        # Request throttle counters live in the cache.
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params["since"] = since
+        return self.client.get("/trades/sync/", params)
+
+    def test_full_sync_pages_in_insert_order(self):
+        ids = []
+        response = self.sync(limit=3)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids += [trade["id"] for trade in response.json()["trades"]]
+            if not response.json()["has_more"]:
+                break
+            response = self.sync(response.json()["next_token"], limit=3)
+
+        self.assertEqual(ids, [trade.pk for trade in self.trades])
+
+    def test_since_returns_only_newer_trades(self):
+        token = self.sync().json()["next_token"]
+
+        backdated = create_trade(
+            self.trader,
+            self.btc,
+            timezone.now() - timedelta(days=90),
+        )
+        newest = create_trade(self.trader, self.btc, timezone.now())
+        create_trade(self.other, self.btc, timezone.now())
+
+        response = self.sync(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [trade["id"] for trade in response.json()["trades"]],
+            [backdated.pk, newest.pk],
+        )
+
+        response = self.sync(response.json()["next_token"])
+        self.assertEqual(response.json()["trades"], [])
+        self.assertFalse(response.json()["has_more"])
+
+    def test_token_of_another_user_is_rejected(self):
+        token = TradeSyncService.encode_token(self.other, 1)
+
+        response = self.sync(token)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.sync("garbage").status_code, 400)
+
+    def test_token_older_than_a_deletion_must_resync(self):
+        token = self.sync(limit=2).json()["next_token"]
+        self.trades[-1].delete()
+
+        response = self.sync(token)
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.json()["resync"])
+
+        # A full resync returns a token past the floor that keeps working.
+        response = self.sync()
+        self.assertEqual(len(response.json()["trades"]), 6)
+        self.assertEqual(self.sync(response.json()["next_token"]).status_code, 200)
+
+
+class TradeConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="ETag Desk")
+        cls.trader = User.objects.create_user(
+            email="etag@otcbook.com",
+            password="password",
+            full_name="ETag Trader",
+            role="trader",
+            desk=desk,
+        )
+        cls.btc = Asset.objects.create(symbol="BTC")
+        create_trade(cls.trader, cls.btc, timezone.now())
+
+    def setUp(self):
+        # Request throttle counters live in the cache.
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def test_unchanged_book_returns_not_modified(self):
+        for path in ("/trades/list/", "/trades/pnl/", "/trades/export/csv/"):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                etag = response["ETag"]
+
+                response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+
+    def test_new_trade_changes_etag(self):
+        response = self.client.get("/trades/list/")
+        etag = response["ETag"]
+        self.assertEqual(len(response.json()), 1)
+
+        create_trade(self.trader, self.btc, timezone.now())
+
+        response = self.client.get("/trades/list/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_etag_varies_with_query(self):
+        first = self.client.get("/trades/list/")
+        filtered = self.client.get("/trades/list/", {"side": "sell"})
+
+        self.assertNotEqual(first["ETag"], filtered["ETag"])
+        response = self.client.get(
+            "/trades/list/",
+            {"side": "sell"},
+            HTTP_IF_NONE_MATCH=first["ETag"],
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class PnLCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="PnL Cache Desk")
+        cls.trader = User.objects.create_user(
+            email="pnl-cache@otcbook.com",
+            password="password",
+            full_name="PnL Cache Trader",
+            role="trader",
+            desk=desk,
+        )
+        cls.admin = User.objects.create_superuser(
+            email="pnl-admin@otcbook.com",
+            password="password",
+            full_name="PnL Admin",
+        )
+        cls.btc = Asset.objects.create(symbol="BTC")
+        create_trade(cls.trader, cls.btc, timezone.now(), side="sell")
+
+    def setUp(self):
+        # Request throttle counters and cached summaries live in the cache.
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def test_hit_until_a_trade_is_logged(self):
+        first = self.client.get("/trades/pnl/")
+        second = self.client.get("/trades/pnl/")
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.json(), first.json())
+
+        create_trade(
+            self.trader,
+            self.btc,
+            timezone.now(),
+            side="sell",
+            amount_ngn=Decimal("250.00"),
+        )
+
+        third = self.client.get("/trades/pnl/")
+        self.assertEqual(third["X-Cache"], "MISS")
+        self.assertEqual(third.json()["total_trades"], 2)
+        self.assertEqual(
+            Decimal(third.json()["total_sell_volume"]),
+            Decimal(first.json()["total_sell_volume"]) + Decimal("250.00"),
+        )
+
+    def test_filters_are_cached_separately(self):
+        self.client.get("/trades/pnl/")
+
+        response = self.client.get("/trades/pnl/", {"side": "buy"})
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["total_trades"], 0)
+
+    def test_stats_count_hits_and_misses(self):
+        for _ in range(3):
+            self.client.get("/trades/pnl/")
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get("/trades/pnl/cache-stats/")
+
+        self.assertEqual(
+            response.json(),
+            {"hits": 2, "misses": 1, "hit_rate": 0.6667},
+        )
+
+
+class TradeCandleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="Candle Desk")
+        cls.trader = User.objects.create_user(
+            email="candles@otcbook.com",
+            password="password",
+            full_name="Candle Trader",
+            role="trader",
+            desk=desk,
+        )
+        cls.btc = Asset.objects.create(symbol="BTC")
+        cls.hour = datetime(2025, 1, 1, 10, tzinfo=dt_timezone.utc)
+
+        # Booked out of time order: the earliest trade comes second and the
+        # lowest rate comes last but is not the close.
+        for minute, rate in ((30, "100.00"), (10, "90.00"), (50, "120.00"), (20, "80.00")):
+            create_trade(
+                cls.trader,
+                cls.btc,
+                cls.hour + timedelta(minutes=minute),
+                rate=Decimal(rate),
+            )
+        create_trade(cls.trader, cls.btc, cls.hour + timedelta(hours=1, minutes=5))
+
+    def setUp(self):
+        # Request throttle counters live in the cache.
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def candles(self):
+        return set(
+            TradeCandle.objects.values_list(
+                "desk_id",
+                "asset_id",
+                "interval",
+                "bucket",
+                "open",
+                "high",
+                "low",
+                "close",
+                "open_at",
+                "close_at",
+                "volume",
+                "volume_ngn",
+                "trade_count",
+            )
+        )
+
+    def test_out_of_order_trades_merge_into_bar(self):
+        response = self.client.get("/trades/candles/", {"asset": "btc"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "bucket": "2025-01-01T10:00:00Z",
+                    "open": "90.00",
+                    "high": "120.00",
+                    "low": "80.00",
+                    "close": "120.00",
+                    "volume": "0.40000000",
+                    "volume_ngn": "400.00",
+                    "trade_count": 4,
+                },
+                {
+                    "bucket": "2025-01-01T11:00:00Z",
+                    "open": "1000.00",
+                    "high": "1000.00",
+                    "low": "1000.00",
+                    "close": "1000.00",
+                    "volume": "0.10000000",
+                    "volume_ngn": "100.00",
+                    "trade_count": 1,
+                },
+            ],
+        )
+
+    def test_rows_match_stock_serializer(self):
+        candles = TradeCandle.objects.filter(interval="5m").order_by("bucket")
+
+        response = self.client.get(
+            "/trades/candles/",
+            {"asset": "btc", "interval": "5m", "limit": 3},
+        )
+
+        self.assertEqual(
+            response.content,
+            JSONRenderer().render(
+                serializers.ListSerializer(
+                    list(candles)[-3:],
+                    child=TradeCandleSerializer(),
+                ).data
+            ),
+        )
+
+    def test_incremental_candles_match_rebuild(self):
+        incremental = self.candles()
+
+        call_command("rebuild_trade_candles", "--batch-size", "3", stdout=StringIO())
+
+        # Five 1m and 5m bars, two hours, one day.
+        self.assertEqual(len(incremental), 5 + 5 + 2 + 1)
+        self.assertEqual(self.candles(), incremental)
+
+
+class DeskPositionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="Position Desk")
+        cls.owner, cls.trader = [
+            User.objects.create_user(
+                email=f"{role}@positions.otcbook.com",
+                password="password",
+                full_name=f"Position {role.title()}",
+                role=role,
+                desk=desk,
+            )
+            for role in ("desk_owner", "trader")
+        ]
+        outsider = User.objects.create_user(
+            email="outsider@positions.otcbook.com",
+            password="password",
+            full_name="Position Outsider",
+            role="trader",
+            desk=Desk.objects.create(name="Other Position Desk"),
+        )
+        btc = Asset.objects.create(symbol="BTC")
+        usdt = Asset.objects.create(symbol="USDT")
+
+        now = timezone.now()
+        for user, asset, side, quantity, amount_ngn in (
+            (cls.owner, btc, "buy", "1", "100.00"),
+            (cls.trader, btc, "buy", "2", "260.00"),
+            (cls.trader, btc, "sell", "2", "300.00"),
+            (cls.trader, usdt, "buy", "10", "15000.00"),
+            (cls.owner, usdt, "sell", "4", "6400.00"),
+            (outsider, btc, "buy", "5", "500.00"),
+        ):
+            create_trade(
+                user,
+                asset,
+                now,
+                side=side,
+                amount_crypto=Decimal(quantity),
+                amount_ngn=Decimal(amount_ngn),
+            )
+
+    def setUp(self):
+        # Request throttle counters live in the cache.
+        cache.clear()
+        self.client = APIClient()
+
+    def test_positions_for_whole_desk(self):
+        self.client.force_authenticate(self.owner)
+
+        response = self.client.get("/trades/positions/")
+
+        self.assertEqual(response.status_code, 200)
+        for row in response.json():
+            row.pop("updated_at")
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "asset": "BTC",
+                    "quantity": "1.00000000",
+                    "ngn_flow": "-60.00",
+                    "average_cost": "120.00",
+                    "buy_quantity": "3.00000000",
+                    "buy_amount_ngn": "360.00",
+                    # FIFO: 1 @ 100 and 1 @ 130 sold at 150.
+                    "cost_basis": "130.00000000",
+                    "realized_pnl": "70.00",
+                    "trade_count": 3,
+                },
+                {
+                    "asset": "USDT",
+                    "quantity": "6.00000000",
+                    "ngn_flow": "-8600.00",
+                    "average_cost": "1500.00",
+                    "buy_quantity": "10.00000000",
+                    "buy_amount_ngn": "15000.00",
+                    "cost_basis": "9000.00000000",
+                    "realized_pnl": "400.00",
+                    "trade_count": 2,
+                },
+            ],
+        )
+
+    def test_stale_positions_are_replayed_on_read(self):
+        self.client.force_authenticate(self.owner)
+        position = CostBasisPosition.objects.filter(
+            desk=self.owner.desk,
+            asset__symbol="BTC",
+        )
+        Trade.objects.get(trader=self.owner, asset__symbol="BTC").delete()
+        self.assertTrue(position.get().is_stale)
+
+        response = self.client.get("/trades/positions/")
+
+        self.assertEqual(response.status_code, 200)
+        btc = response.json()[0]
+        # Only the 2 @ 130 sold at 150 are left.
+        self.assertEqual(btc["cost_basis"], "0.00000000")
+        self.assertEqual(btc["realized_pnl"], "40.00")
+        self.assertFalse(position.get().is_stale)
+
+    def test_traders_are_forbidden(self):
+        self.client.force_authenticate(self.trader)
+
+        response = self.client.get("/trades/positions/")
+
+        self.assertEqual(response.status_code, 403)
+
+
+class DeskScopeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="Scope Desk")
+        cls.manager, cls.trader, cls.other_trader = [
+            User.objects.create_user(
+                email=f"{name}@scope.otcbook.com",
+                password="password",
+                full_name=f"Scope {name.title()}",
+                role=role,
+                desk=desk,
+            )
+            for name, role in (
+                ("manager", "manager"),
+                ("trader", "trader"),
+                ("other", "trader"),
+            )
+        ]
+        outsider = User.objects.create_user(
+            email="outsider@scope.otcbook.com",
+            password="password",
+            full_name="Scope Outsider",
+            role="desk_owner",
+            desk=Desk.objects.create(name="Other Scope Desk"),
+        )
+        cls.btc = Asset.objects.create(symbol="BTC")
+
+        now = timezone.now()
+        cls.desk_trades = [
+            create_trade(
+                trader,
+                cls.btc,
+                now - timedelta(hours=index),
+                side="sell",
+                rate=Decimal("1000.00") + index * 10,
+            )
+            for index, trader in enumerate(
+                [cls.trader] * 3 + [cls.other_trader] * 2 + [cls.manager]
+            )
+        ]
+        create_trade(outsider, cls.btc, now)
+
+    def setUp(self):
+        # Request throttle counters live in the cache.
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def test_traders_are_forbidden(self):
+        self.client.force_authenticate(self.trader)
+
+        for path in (
+            "/trades/desk/list/",
+            "/trades/desk/pnl/",
+            "/trades/desk/export/csv/",
+            "/trades/desk/export/parquet/",
+        ):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path).status_code, 403)
+
+    def test_list_covers_desk_members_only(self):
+        response = self.client.get("/trades/desk/list/")
+
+        self.assertEqual(
+            {trade["id"] for trade in response.json()},
+            {trade.pk for trade in self.desk_trades},
+        )
+
+        response = self.client.get("/trades/desk/list/", {"trader": self.other_trader.pk})
+        self.assertEqual(
+            {trade["trader"] for trade in response.json()},
+            {self.other_trader.email},
+        )
+        self.assertEqual(len(response.json()), 2)
+
+    def test_pnl_groups_by_trader(self):
+        response = self.client.get("/trades/desk/pnl/")
+
+        self.assertEqual(response.json()["total_trades"], 6)
+        by_trader = {
+            row["trader__email"]: (row["trades"], Decimal(str(row["profit_loss"])))
+            for row in response.json()["by_trader"]
+        }
+        self.assertEqual(
+            by_trader,
+            {
+                trader.email: (
+                    len(trades),
+                    sum(trade.profit_loss for trade in trades),
+                )
+                for trader, trades in (
+                    (self.trader, self.desk_trades[:3]),
+                    (self.other_trader, self.desk_trades[3:5]),
+                    (self.manager, self.desk_trades[5:]),
+                )
+            },
+        )
+
+    def test_csv_export_adds_trader_column(self):
+        response = self.client.get("/trades/desk/export/csv/")
+
+        rows = list(csv.reader(io.StringIO(
+            b"".join(response.streaming_content).decode()
+        )))
+        self.assertEqual(rows[0][:3], ["Trade ID", "Trader", "Trade Date"])
+        self.assertEqual(
+            sorted(row[1] for row in rows[1:]),
+            sorted(trade.trader.email for trade in self.desk_trades),
+        )
+
+    def test_new_member_trade_invalidates_desk_etag(self):
+        etag = self.client.get("/trades/desk/list/")["ETag"]
+
+        create_trade(self.other_trader, self.btc, timezone.now())
+
+        response = self.client.get("/trades/desk/list/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 7)
+
+
+class TradeColumnarExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name="Columnar Desk")
+        cls.owner = User.objects.create_user(
+            email="columnar@otcbook.com",
+            password="password",
+            full_name="Columnar Owner",
+            role="desk_owner",
+            desk=desk,
+        )
+        assets = [
+            Asset.objects.create(symbol=symbol)
+            for symbol in ("BTC", "USDT")
+        ]
+
+        now = timezone.now().replace(microsecond=654321)
+        for index in range(9):
+            create_trade(
+                cls.owner,
+                assets[index % 2],
+                now - timedelta(days=index),
+                side="sell" if index % 3 else "buy",
+                trade_type="otc" if index % 2 else "spot",
+                amount_crypto=Decimal("0.00000001") + Decimal("1.2345678") * index,
+                amount_ngn=Decimal("98765432.10") * (index + 1),
+                rate=Decimal("1000.00") + Decimal("0.01") * index,
+            )
+
+    def setUp(self):
+        # Request throttle counters live in the cache.
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def download(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return io.BytesIO(b"".join(response.streaming_content))
+
+    def expected_rows(self):
+        return [
+            {
+                "id": trade.id,
+                "trade_date": trade.trade_date,
+                "asset": trade.asset.symbol,
+                "desk": trade.desk.name,
+                "side": trade.side,
+                "trade_type": trade.trade_type,
+                "amount_crypto": trade.amount_crypto,
+                "amount_ngn": trade.amount_ngn,
+                "rate": trade.rate,
+                "profit_loss": trade.profit_loss,
+            }
+            for trade in Trade.objects.select_related("asset", "desk")
+        ]
+
+    def test_parquet_schema_and_values(self):
+        table = pq.read_table(self.download("/trades/export/parquet/"))
+
+        schema = table.schema.remove_metadata()
+        self.assertEqual(schema, trade_schema())
+        for name in ("asset", "desk", "side", "trade_type"):
+            self.assertEqual(
+                schema.field(name).type,
+                pa.dictionary(pa.int32(), pa.string()),
+            )
+        for name in ("amount_ngn", "rate", "profit_loss"):
+            self.assertEqual(schema.field(name).type, pa.decimal128(18, 2))
+        self.assertEqual(schema.field("amount_crypto").type, pa.decimal128(20, 8))
+        self.assertEqual(table.to_pylist(), self.expected_rows())
+
+    def test_arrow_stream_matches_parquet(self):
+        stream = pa.ipc.open_stream(self.download("/trades/export/arrow/"))
+        table = stream.read_all()
+
+        self.assertEqual(table.schema, trade_schema())
+        self.assertEqual(table.to_pylist(), self.expected_rows())
+
+    def test_desk_export_adds_trader_dictionary(self):
+        table = pq.read_table(self.download("/trades/desk/export/parquet/"))
+
+        self.assertEqual(
+            table.schema.remove_metadata(),
+            trade_schema(with_trader=True),
+        )
+        trader = table.column("trader").combine_chunks()
+        self.assertEqual(trader.dictionary.to_pylist(), [self.owner.email])
+        self.assertEqual(trader.to_pylist(), [self.owner.email] * 9)
+
+    def test_amounts_past_the_int64_satoshi_range(self):
+        # Scaled by 1e8 this amount no longer fits a bigint.
+        create_trade(
+            self.owner,
+            Asset.objects.create(symbol="SHIB"),
+            timezone.now(),
+            amount_crypto=Decimal("123456789012.5"),
+            amount_ngn=Decimal("2500000.00"),
+            rate=Decimal("0.02"),
+        )
+
+        table = pq.read_table(self.download("/trades/export/parquet/"))
+
+        self.assertEqual(table.to_pylist(), self.expected_rows())
+        self.assertIn(
+            Decimal("123456789012.50000000"),
+            table.column("amount_crypto").to_pylist(),
+        )
+
+    def export_with_late_trade(self, export_format):
+        build = LabelDictionary.__init__
+
+        def book_after_desks(dictionary, model, field, ids):
+            build(dictionary, model, field, ids)
+            if model is Desk:
+                # Lands between the dictionary queries and the export cursor.
+                desk = Desk.objects.create(name="Late Desk")
+                trader = User.objects.create_user(
+                    email="late@otcbook.com",
+                    password="password",
+                    full_name="Late Trader",
+                    role="trader",
+                    desk=desk,
+                )
+                create_trade(
+                    trader,
+                    Asset.objects.create(symbol="SOL"),
+                    timezone.now() - timedelta(days=30),
+                )
+
+        with mock.patch.object(LabelDictionary, "__init__", book_after_desks):
+            return io.BytesIO(b"".join(iter_trade_arrow(
+                Trade.objects.order_by("-trade_date"),
+                export_format,
+                batch_size=4,
+            )))
+
+    def assert_late_trade_labelled(self, table):
+        rows = table.to_pylist()
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows, self.expected_rows())
+        self.assertEqual(rows[-1]["desk"], "Late Desk")
+        self.assertEqual(rows[-1]["asset"], "SOL")
+
+    def test_arrow_stream_labels_trades_booked_mid_export(self):
+        data = self.export_with_late_trade(FORMAT_ARROW)
+        self.assert_late_trade_labelled(pa.ipc.open_stream(data).read_all())
+
+    def test_parquet_labels_trades_booked_mid_export(self):
+        data = self.export_with_late_trade(FORMAT_PARQUET)
+        self.assert_late_trade_labelled(pq.read_table(data))
+
+
+def legacy_trade_csv(trades):
+    """The CSV the export view built in memory before it was streamed."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for trade in trades.select_related("asset", "desk").order_by("-trade_date"):
+        writer.writerow([
+            trade.id,
+            trade.trade_date,
+            trade.asset.symbol,
+            trade.desk.name,
+            trade.side.upper(),
+            trade.trade_type,
+            trade.amount_crypto,
+            trade.amount_ngn,
+            trade.rate,
+            trade.profit_loss,
+        ])
+    return buffer.getvalue().encode("utf-8")
+
+
+class TradeCSVExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        desk = Desk.objects.create(name='Export "Lagos", Desk')
+        cls.trader = User.objects.create_user(
+            email="csv@otcbook.com",
+            password="password",
+            full_name="CSV Trader",
+            role="trader",
+            desk=desk,
+        )
+        # Assets cached by earlier tests were rolled back with them.
+        asset_cache.invalidate()
+        Asset.objects.create(symbol="BTC")
+
+        now = timezone.now().replace(microsecond=123456)
+        TradeService.bulk_create_trades(
+            cls.trader,
+            [
+                {
+                    "asset": "BTC",
+                    "side": "sell" if index % 3 else "buy",
+                    "trade_type": "otc",
+                    "amount_crypto": Decimal("0.12345678") * (index % 9 + 1),
+                    "amount_ngn": Decimal("150000.50") + index,
+                    "rate": Decimal("1250000.00"),
+                    "trade_date": now - timedelta(minutes=index),
+                }
+                for index in range(60)
+            ],
+        )
+
+    def setUp(self):
+        # Request throttle counters live in the cache.
+        cache.clear()
+        # Small flushes so the export streams in several chunks.
+        self.enterContext(mock.patch("trades.exports.FLUSH_BYTES", 1024))
+        self.client = APIClient()
+        self.client.force_authenticate(self.trader)
+
+    def test_stream_matches_legacy_export(self):
+        response = self.client.get("/trades/export/csv/")
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(
+            response["Content-Disposition"],
+            'attachment; filename="trades.csv"',
+        )
+        chunks = [chunk for chunk in response.streaming_content]
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(
+            b"".join(chunks),
+            legacy_trade_csv(Trade.objects.filter(trader=self.trader)),
+        )
+
+    def test_gzip_matches_legacy_export(self):
+        response = self.client.get("/trades/export/csv/", {"gzip": "true"})
+
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertEqual(
+            response["Content-Disposition"],
+            'attachment; filename="trades.csv.gz"',
+        )
+        self.assertEqual(
+            gzip.decompress(b"".join(response.streaming_content)),
+            legacy_trade_csv(Trade.objects.filter(trader=self.trader)),
+        )
+
+    def test_filters_apply_to_export(self):
+        response = self.client.get("/trades/export/csv/", {"side": "buy"})
+
+        self.assertEqual(
+            b"".join(response.streaming_content),
+            legacy_trade_csv(
+                Trade.objects.filter(trader=self.trader, side="buy")
+            ),
+        )
+
+
+class AssetCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.btc = Asset.objects.create(symbol="BTC", name="Bitcoin")
+        Asset.objects.create(symbol="USDT", name="Tether")
+
+    def setUp(self):
+        # Assets cached by earlier tests were rolled back with them.
+        asset_cache.invalidate()
+
+    def test_hits_skip_the_database(self):
+        asset_cache.get_many(["BTC"])
+
+        with self.assertNumQueries(0):
+            assets = asset_cache.get_many(["BTC", "USDT", "ETH"])
+
+        self.assertEqual(sorted(assets), ["BTC", "USDT"])
+        self.assertEqual(assets["BTC"].pk, self.btc.pk)
+        self.assertEqual(assets["BTC"].name, "Bitcoin")
+
+    def test_save_invalidates_on_commit(self):
+        asset_cache.get_many(["BTC"])
+
+        self.btc.name = "Bitcoin Core"
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.btc.save()
+
+        # Other connections cannot see the change until it commits.
+        self.assertEqual(asset_cache.get_many(["BTC"])["BTC"].name, "Bitcoin")
+        for callback in callbacks:
+            callback()
+        self.assertEqual(asset_cache.get_many(["BTC"])["BTC"].name, "Bitcoin Core")
+
+    def test_delete_invalidates_on_commit(self):
+        asset_cache.get_many(["BTC"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.btc.delete()
+
+        self.assertEqual(asset_cache.get_many(["BTC"]), {})
+
+    def test_other_workers_reload_after_invalidation(self):
+        # A second cache instance stands in for another worker process
+        # sharing the Django cache.
+        worker = AssetCache(maxsize=10)
+        self.assertEqual(worker.get_many(["BTC"])["BTC"].name, "Bitcoin")
+
+        self.btc.name = "Wrapped Bitcoin"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.btc.save()
+
+        self.assertEqual(worker.get_many(["BTC"])["BTC"].name, "Wrapped Bitcoin")
+
+    def test_generation_is_checked_once_per_interval(self):
+        worker = AssetCache(maxsize=10, check_interval=30)
+        clock = self.enterContext(mock.patch("trades.assets.time.monotonic"))
+        clock.return_value = 1000.0
+        worker.get_many(["BTC"])
+
+        self.btc.name = "Wrapped Bitcoin"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.btc.save()
+
+        clock.return_value = 1029.0
+        with self.assertNumQueries(0):
+            self.assertEqual(worker.get_many(["BTC"])["BTC"].name, "Bitcoin")
+        clock.return_value = 1030.0
+        self.assertEqual(worker.get_many(["BTC"])["BTC"].name, "Wrapped Bitcoin")
+
+    def test_deploy_check_requires_shared_cache(self):
+        self.assertEqual(
+            [error.id for error in check_asset_cache_backend(None)],
+            ["trades.E001"],
+        )
+        with self.settings(ASSET_CACHE_SIZE=0):
+            self.assertEqual(check_asset_cache_backend(None), [])
+
+        with tempfile.TemporaryDirectory() as location:
+            shared = {
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": location,
+                }
+            }
+            with self.settings(CACHES=shared):
+                self.assertEqual(check_asset_cache_backend(None), [])
+
+    def test_created_symbols_are_cached_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            asset = asset_cache.get_or_create("SOL")
+
+        self.assertTrue(asset.is_custom)
+        with self.assertNumQueries(0):
+            self.assertEqual(asset_cache.get_or_create("SOL").pk, asset.pk)
@@ -1,16 +1,78 @@
 from django.urls import path
 from .views import (
     TradeCreateView,
+    TradeBulkCreateView,
     TradeListView,
     TradeDetailView,
+    TradeSyncView,
     TradePnLView,
+    TradePnLCacheStatsView,
+    TradeMetricsView,
+    DeskPositionListView,
+    TradeCandleListView,
     TradeExportCSVView,
+    TradeExportArrowView,
+    ExportJobListCreateView,
+    ExportJobDetailView,
+    ExportJobDownloadView,
+    DeskTradeListView,
+    DeskPnLView,
+    DeskTradeExportCSVView,
+    DeskTradeExportArrowView,
 )
 
 urlpatterns = [
     path("create/", TradeCreateView.as_view(), name="trade-create"),
+    path("bulk/", TradeBulkCreateView.as_view(), name="trade-bulk-create"),
     path("list/", TradeListView.as_view(), name="trade-list"),
+    path("sync/", TradeSyncView.as_view(), name="trade-sync"),
     path("<int:pk>/", TradeDetailView.as_view(), name="trade-detail"),
     path("pnl/", TradePnLView.as_view(), name="trade-pnl"),
+    path(
+        "pnl/cache-stats/",
+        TradePnLCacheStatsView.as_view(),
+        name="trade-pnl-cache-stats",
+    ),
+    path("metrics/", TradeMetricsView.as_view(), name="trade-metrics"),
+    path("positions/", DeskPositionListView.as_view(), name="desk-positions"),
+    path("candles/", TradeCandleListView.as_view(), name="trade-candles"),
     path("export/csv/", TradeExportCSVView.as_view(), name="trade-export-csv"),
+    path(
+        "export/parquet/",
+        TradeExportArrowView.as_view(export_format="parquet"),
+        name="trade-export-parquet",
+    ),
+    path(
+        "export/arrow/",
+        TradeExportArrowView.as_view(export_format="arrow"),
+        name="trade-export-arrow",
+    ),
+    path("exports/", ExportJobListCreateView.as_view(), name="trade-export-jobs"),
+    path(
+        "exports/<int:pk>/",
+        ExportJobDetailView.as_view(),
+        name="trade-export-job",
+    ),
+    path(
+        "exports/<int:pk>/download/",
+        ExportJobDownloadView.as_view(),
+        name="trade-export-job-download",
+    ),
+    path("desk/list/", DeskTradeListView.as_view(), name="desk-trade-list"),
+    path("desk/pnl/", DeskPnLView.as_view(), name="desk-trade-pnl"),
+    path(
+        "desk/export/csv/",
+        DeskTradeExportCSVView.as_view(),
+        name="desk-trade-export-csv",
+    ),
+    path(
+        "desk/export/parquet/",
+        DeskTradeExportArrowView.as_view(export_format="parquet"),
+        name="desk-trade-export-parquet",
+    ),
+    path(
+        "desk/export/arrow/",
+        DeskTradeExportArrowView.as_view(export_format="arrow"),
+        name="desk-trade-export-arrow",
+    ),
 ]
@@ -1,21 +1,59 @@
-from rest_framework import generics, permissions, filters as drf_filters
+from rest_framework import generics, permissions, serializers, status, filters as drf_filters
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, Count, Q
-from django.http import HttpResponse
-from decimal import Decimal
-import csv
-
-from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter
+from django.db.models import OuterRef, Subquery
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+
+from drf_spectacular.utils import (
+    extend_schema,
+    extend_schema_view,
+    OpenApiExample,
+    OpenApiParameter,
+)
 
-from .models import Trade
+from .models import (
+    Trade,
+    TradeCandle,
+    TradeDailyRollup,
+    DeskPosition,
+    CostBasisPosition,
+    ExportJob,
+)
 from .serializers import (
     TradeSerializer,
     TradeListSerializer,
+    DeskTradeListSerializer,
     PnLSummarySerializer,
+    TradeMetricsSerializer,
+    DeskPositionSerializer,
+    TradeCandleSerializer,
+    ExportJobSerializer,
+)
+from .filters import TradeFilter, TradeRollupFilter, TradeCandleFilter
+from .pagination import TradeKeysetPagination
+from .exports import (
+    CSV_COLUMNS,
+    CSV_HEADER,
+    DESK_CSV_COLUMNS,
+    DESK_CSV_HEADER,
+    iter_trade_csv,
+    iter_gzip,
 )
-from .filters import TradeFilter
+from .columnar import CONTENT_TYPES, FILE_EXTENSIONS, iter_trade_arrow
+from .metrics import trade_metrics
+from .permissions import DESK_SCOPE_ROLES, IsDeskManager
+from .services import (
+    CostBasisService,
+    TradeService,
+    TradeRollupService,
+    TradeSyncService,
+    desk_book_key,
+)
+from .caching import trade_book_condition, PnLCache
+from common.views import ReplicaReadMixin
 
 
 
@@ -55,9 +93,51 @@ class TradeCreateView(generics.CreateAPIView):
 
 
 
+class TradeBulkCreateView(generics.GenericAPIView):
+    serializer_class = TradeSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    max_batch_size = 1000
+
+    @extend_schema(
+        summary="Bulk Create Trades",
+        description=(
+            "Create up to 1000 trades for the authenticated user in one "
+            "request. The batch is validated and stored atomically."
+        ),
+        request=TradeSerializer(many=True),
+        responses={201: TradeSerializer(many=True), 400: dict},
+        tags=["Trades"],
+    )
+    def post(self, request):
+        if not request.user.desk:
+            raise serializers.ValidationError(
+                "User is not assigned to a desk."
+            )
+
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=self.max_batch_size,
+        )
+        serializer.is_valid(raise_exception=True)
+
+        trades = TradeService.bulk_create_trades(
+            request.user,
+            serializer.validated_data,
+        )
+
+        return Response(
+            self.get_serializer(trades, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+
 class TradeListView(generics.ListAPIView):
     serializer_class = TradeListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TradeKeysetPagination
 
     filter_backends = [
         DjangoFilterBackend,
@@ -74,16 +154,27 @@ class TradeListView(generics.ListAPIView):
 
     @extend_schema(
         summary="List Trades",
-        description="Retrieve all trades belonging to the authenticated user.",
+        description=(
+            "Retrieve all trades belonging to the authenticated user. "
+            "Pass `page_size` or `cursor` to switch to keyset pagination; "
+            "follow the returned `next`/`previous` links to move between pages."
+        ),
         parameters=[
             OpenApiParameter(name="side", description="Filter by buy or sell"),
             OpenApiParameter(name="asset", description="Filter by asset ID"),
             OpenApiParameter(name="desk", description="Filter by desk ID"),
             OpenApiParameter(name="ordering", description="Order results"),
+            OpenApiParameter(name="cursor", description="Opaque page cursor"),
+            OpenApiParameter(
+                name="page_size",
+                type=int,
+                description="Trades per page (max 500)",
+            ),
         ],
         responses={200: TradeListSerializer(many=True)},
         tags=["Trades"],
     )
+    @method_decorator(trade_book_condition)
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
@@ -96,6 +187,65 @@ class TradeListView(generics.ListAPIView):
 
 
 
+class TradeSyncView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 500
+    max_limit = 1000
+
+    @extend_schema(
+        summary="Sync Trades",
+        description=(
+            "Return trades logged since `since`, oldest first, with a new "
+            "token to pass on the next call. Omit `since` for a full sync. "
+            "A 410 response means the token is too old and the client must "
+            "discard its copy and resync from scratch."
+        ),
+        parameters=[
+            OpenApiParameter(name="since", description="Token from the previous sync"),
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                description="Maximum trades to return (max 1000)",
+            ),
+        ],
+        responses={200: dict, 400: dict, 410: dict},
+        tags=["Trades"],
+    )
+    def get(self, request):
+        try:
+            limit = min(
+                int(request.query_params.get("limit", self.default_limit)),
+                self.max_limit,
+            )
+        except ValueError:
+            limit = self.default_limit
+        limit = max(limit, 1)
+
+        try:
+            trades, last_seq, has_more = TradeSyncService.changes_since(
+                request.user,
+                request.query_params.get("since"),
+                limit=limit,
+            )
+        except TradeSyncService.InvalidToken:
+            return Response(
+                {"detail": "Invalid sync token."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except TradeSyncService.TokenExpired:
+            return Response(
+                {"detail": "Sync token is too old. Perform a full resync.", "resync": True},
+                status=status.HTTP_410_GONE,
+            )
+
+        return Response({
+            "trades": TradeListSerializer(trades, many=True).data,
+            "next_token": TradeSyncService.encode_token(request.user, last_seq),
+            "has_more": has_more,
+        })
+
+
+
 class TradeDetailView(generics.RetrieveAPIView):
     serializer_class = TradeSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -118,107 +268,461 @@ class TradeDetailView(generics.RetrieveAPIView):
 
 
 
-class TradePnLView(APIView):
+class TradePnLView(ReplicaReadMixin, generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = TradeRollupFilter
+    by_trader = False
 
     @extend_schema(
         summary="Profit & Loss Summary",
-        description="Returns aggregated profit and loss statistics.",
+        description=(
+            "Returns aggregated profit and loss statistics. Results are "
+            "cached per user until the next trade is logged; the `X-Cache` "
+            "header reports HIT or MISS."
+        ),
         responses={200: PnLSummarySerializer},
         tags=["Trades"],
     )
+    @method_decorator(trade_book_condition)
     def get(self, request):
-        trades = Trade.objects.filter(trader=request.user)
+        data, hit = PnLCache.get_or_set(request, self.build_summary)
 
-        aggregates = trades.aggregate(
-            total_trades=Count("id"),
-            total_profit_loss=Sum("profit_loss"),
-            total_buy_volume=Sum("amount_ngn", filter=Q(side="buy")),
-            total_sell_volume=Sum("amount_ngn", filter=Q(side="sell")),
+        response = Response(data)
+        response["X-Cache"] = "HIT" if hit else "MISS"
+        return response
+
+    def build_summary(self):
+        rollups = self.filter_queryset(self.get_queryset())
+        payload = TradeRollupService.pnl_summary(
+            rollups,
+            by_trader=self.by_trader,
         )
+        return dict(PnLSummarySerializer(payload).data)
+
+    def get_queryset(self):
+        return TradeDailyRollup.objects.filter(trader=self.request.user)
 
-        for key in aggregates:
-            if aggregates[key] is None:
-                aggregates[key] = Decimal("0.00")
 
-        by_asset = (
-            trades.values("asset__symbol")
-            .annotate(trades=Count("id"), profit_loss=Sum("profit_loss"))
-            .order_by("-profit_loss")
-        )
 
-        by_desk = (
-            trades.values("desk__name")
-            .annotate(trades=Count("id"), profit_loss=Sum("profit_loss"))
-            .order_by("-profit_loss")
+class TradePnLCacheStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(
+        summary="P&L Cache Statistics",
+        description="Hit and miss counters for the P&L summary cache.",
+        responses={200: dict},
+        tags=["Trades"],
+    )
+    def get(self, request):
+        return Response(PnLCache.stats())
+
+
+
+class TradeMetricsView(ReplicaReadMixin, generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = TradeFilter
+
+    @extend_schema(
+        summary="Trading Performance Metrics",
+        description=(
+            "Win rate, average win/loss, profit factor, max drawdown, longest "
+            "losing streak and per-asset VWAP. Accepts the trade list filters; "
+            "desk owners and managers may pass `scope=desk` for the whole desk."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="scope",
+                type=str,
+                enum=["user", "desk"],
+                description="Whose trades to analyse (default: user)",
+            ),
+        ],
+        responses={200: TradeMetricsSerializer, 403: dict},
+        tags=["Trades"],
+    )
+    def get(self, request):
+        trades = self.filter_queryset(self.get_queryset())
+        return Response(TradeMetricsSerializer(trade_metrics(trades)).data)
+
+    def get_queryset(self):
+        user = self.request.user
+
+        if self.request.query_params.get("scope") == "desk":
+            if user.role not in DESK_SCOPE_ROLES or not user.desk_id:
+                raise PermissionDenied(
+                    "Only desk owners and managers can view desk metrics."
+                )
+            return Trade.objects.filter(desk_id=user.desk_id)
+
+        return Trade.objects.filter(trader=user)
+
+
+
+class DeskPositionListView(generics.ListAPIView):
+    serializer_class = DeskPositionSerializer
+    permission_classes = [IsDeskManager]
+    pagination_class = None
+
+    @extend_schema(
+        summary="Desk Positions",
+        description=(
+            "Current inventory per asset for the user's desk: net crypto "
+            "quantity, net NGN flow, average buy cost and the FIFO / average "
+            "cost basis with realized P&L."
+        ),
+        responses={200: DeskPositionSerializer(many=True), 403: dict},
+        tags=["Trades"],
+    )
+    def get(self, request, *args, **kwargs):
+        # Positions a deletion left stale are rebuilt before they are shown.
+        CostBasisService.replay_stale(
+            CostBasisPosition.objects.filter(desk_id=request.user.desk_id)
         )
+        return super().get(request, *args, **kwargs)
 
-        by_date = (
-            trades.values("trade_date__date")
-            .annotate(trades=Count("id"), profit_loss=Sum("profit_loss"))
-            .order_by("trade_date__date")
+    def get_queryset(self):
+        cost_basis = CostBasisPosition.objects.filter(
+            desk=OuterRef("desk"),
+            asset=OuterRef("asset"),
         )
+        return (
+            DeskPosition.objects
+            .filter(desk_id=self.request.user.desk_id)
+            .select_related("asset")
+            .annotate(
+                cost_basis=Subquery(cost_basis.values("cost_basis")[:1]),
+                realized_pnl=Subquery(cost_basis.values("realized_pnl")[:1]),
+            )
+            .order_by("asset__symbol")
+        )
+
+
+
+class TradeCandleListView(generics.ListAPIView):
+    serializer_class = TradeCandleSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = TradeCandleFilter
 
-        payload = {
-            "total_trades": aggregates["total_trades"],
-            "total_profit_loss": aggregates["total_profit_loss"],
-            "total_buy_volume": aggregates["total_buy_volume"],
-            "total_sell_volume": aggregates["total_sell_volume"],
-            "by_asset": list(by_asset),
-            "by_desk": list(by_desk),
-            "by_date": list(by_date),
-        }
+    default_limit = 500
+    max_limit = 10000
 
-        return Response(PnLSummarySerializer(payload).data)
+    @extend_schema(
+        summary="Rate Candles",
+        description=(
+            "OHLC candles of the desk's executed rates for one asset, with "
+            "crypto and NGN volume. Returns the latest `limit` candles "
+            "(default 500, max 10000) before `end`."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                description="Number of candles (max 10000)",
+            ),
+        ],
+        responses={200: TradeCandleSerializer(many=True)},
+        tags=["Trades"],
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+
+        # Newest first so the slice keeps the latest candles. The list
+        # serializer reads the rows as tuples; building model instances
+        # dominated the response time for a year of 1h candles.
+        candles = (
+            self.filter_queryset(self.get_queryset())
+            .order_by("-bucket")[:limit]
+        )
+        data = self.get_serializer(candles, many=True).data
+        return Response(data[::-1])
+
+    def get_queryset(self):
+        return TradeCandle.objects.filter(desk_id=self.request.user.desk_id)
 
 
 
-class TradeExportCSVView(APIView):
+class TradeExportCSVView(ReplicaReadMixin, generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = TradeFilter
+
+    csv_columns = CSV_COLUMNS
+    csv_header = CSV_HEADER
 
     @extend_schema(
         summary="Export Trades CSV",
-        description="Download all user trades as a CSV file.",
+        description=(
+            "Stream user trades as a CSV file. Accepts the same filters as "
+            "the trade list; pass `gzip=true` for a gzip-compressed download."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="gzip",
+                type=bool,
+                description="Compress the CSV on the fly",
+            ),
+        ],
         responses={200: None},
         tags=["Trades"],
     )
+    @method_decorator(trade_book_condition)
     def get(self, request):
-        trades = (
+        trades = self.filter_queryset(self.get_queryset())
+        chunks = iter_trade_csv(trades, self.csv_columns, self.csv_header)
+        filename = "trades.csv"
+        content_type = "text/csv"
+
+        if request.query_params.get("gzip", "").lower() in ("1", "true"):
+            chunks = iter_gzip(chunks)
+            filename = "trades.csv.gz"
+            content_type = "application/gzip"
+
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+        return response
+
+    def get_queryset(self):
+        return (
             Trade.objects
-            .filter(trader=request.user)
-            .select_related("asset", "desk")
+            .filter(trader=self.request.user)
             .order_by("-trade_date")
         )
 
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="trades.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow([
-            "Trade ID",
-            "Trade Date",
-            "Asset",
-            "Desk",
-            "Side",
-            "Trade Type",
-            "Crypto Amount",
-            "NGN Amount",
-            "Rate",
-            "Profit/Loss",
-        ])
-
-        for trade in trades:
-            writer.writerow([
-                trade.id,
-                trade.trade_date,
-                trade.asset.symbol,
-                trade.desk.name,
-                trade.side.upper(),
-                trade.trade_type,
-                trade.amount_crypto,
-                trade.amount_ngn,
-                trade.rate,
-                trade.profit_loss,
-            ])
 
+class TradeExportArrowView(ReplicaReadMixin, generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = TradeFilter
+
+    export_format = None
+    with_trader = False
+
+    @extend_schema(
+        summary="Export Trades for Analytics",
+        description=(
+            "Stream user trades as Parquet (`export/parquet/`) or an Arrow "
+            "IPC stream (`export/arrow/`) with decimal and timestamp types "
+            "and dictionary-encoded asset, desk, side and trade type. "
+            "Accepts the same filters as the trade list."
+        ),
+        responses={200: None},
+        tags=["Trades"],
+    )
+    @method_decorator(trade_book_condition)
+    def get(self, request):
+        trades = self.filter_queryset(self.get_queryset())
+        chunks = iter_trade_arrow(trades, self.export_format, self.with_trader)
+        filename = f"trades.{FILE_EXTENSIONS[self.export_format]}"
+
+        response = StreamingHttpResponse(
+            chunks,
+            content_type=CONTENT_TYPES[self.export_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+        return response
+
+    def get_queryset(self):
+        return (
+            Trade.objects
+            .filter(trader=self.request.user)
+            .order_by("-trade_date")
+        )
+
+
+
+class ExportJobListCreateView(generics.ListCreateAPIView):
+    serializer_class = ExportJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        summary="List Export Jobs",
+        description="Background trade exports requested by the user.",
+        responses={200: ExportJobSerializer(many=True)},
+        tags=["Trades"],
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    @extend_schema(
+        summary="Create Export Job",
+        description=(
+            "Queue a trade export for the background worker. `filters` takes "
+            "the trade list filters; poll the job for progress and download "
+            "the file from `download_url` once completed."
+        ),
+        request=ExportJobSerializer,
+        responses={202: ExportJobSerializer, 400: dict},
+        examples=[
+            OpenApiExample(
+                "Desk export for 2025",
+                value={
+                    "format": "csv.gz",
+                    "scope": "desk",
+                    "filters": {
+                        "start_date": "2025-01-01",
+                        "end_date": "2025-12-31",
+                    },
+                },
+            )
+        ],
+        tags=["Trades"],
+    )
+    def post(self, request, *args, **kwargs):
+        response = super().post(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
         return response
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(requested_by=self.request.user)
+
+
+class ExportJobDetailView(generics.RetrieveAPIView):
+    serializer_class = ExportJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        summary="Get Export Job",
+        description="Status and progress of a background trade export.",
+        responses={200: ExportJobSerializer, 404: dict},
+        tags=["Trades"],
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(requested_by=self.request.user)
+
+
+class ExportJobDownloadView(ExportJobDetailView):
+    @extend_schema(
+        summary="Download Export",
+        description="Download the file of a completed export job.",
+        responses={200: None, 404: dict},
+        tags=["Trades"],
+    )
+    def get(self, request, *args, **kwargs):
+        job = self.get_object()
+
+        if job.status != ExportJob.STATUS_COMPLETED or not job.file:
+            raise NotFound("Export is not ready.")
+
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=True,
+            filename=job.file.name.rsplit("/", 1)[-1],
+        )
+
+
+
+class DeskScopeMixin:
+    """
+    Scope a trades view to the requesting owner's or manager's whole desk.
+
+    Conditional GETs and the P&L cache then version on the desk's book, so
+    any member's booking invalidates them.
+    """
+
+    permission_classes = [IsDeskManager]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        request.trade_book_key = desk_book_key(request.user.desk_id)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="List Desk Trades",
+        description=(
+            "Trades of every member of the user's desk, for desk owners and "
+            "managers. Pass `trader` to narrow to one member; pagination "
+            "works as on the trade list."
+        ),
+        responses={200: DeskTradeListSerializer(many=True), 403: dict},
+    )
+)
+class DeskTradeListView(DeskScopeMixin, TradeListView):
+    serializer_class = DeskTradeListSerializer
+
+    def get_queryset(self):
+        return (
+            Trade.objects
+            .filter(desk_id=self.request.user.desk_id)
+            .select_related("asset", "desk", "trader")
+        )
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Desk Profit & Loss Summary",
+        description=(
+            "P&L for the whole desk with a per-trader breakdown, for desk "
+            "owners and managers. Cached until any member logs a trade."
+        ),
+        responses={200: PnLSummarySerializer, 403: dict},
+    )
+)
+class DeskPnLView(DeskScopeMixin, TradePnLView):
+    by_trader = True
+
+    def get_queryset(self):
+        return TradeDailyRollup.objects.filter(
+            desk_id=self.request.user.desk_id,
+        )
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Export Desk Trades CSV",
+        description=(
+            "Stream the whole desk's trades as CSV, with a Trader column. "
+            "Accepts the trade list filters and `gzip=true`."
+        ),
+        responses={200: None, 403: dict},
+    )
+)
+class DeskTradeExportCSVView(DeskScopeMixin, TradeExportCSVView):
+    csv_columns = DESK_CSV_COLUMNS
+    csv_header = DESK_CSV_HEADER
+
+    def get_queryset(self):
+        return (
+            Trade.objects
+            .filter(desk_id=self.request.user.desk_id)
+            .order_by("-trade_date")
+        )
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Export Desk Trades for Analytics",
+        description=(
+            "Stream the whole desk's trades as Parquet or an Arrow IPC "
+            "stream, with a dictionary-encoded trader column. Accepts the "
+            "trade list filters."
+        ),
+        responses={200: None, 403: dict},
+    )
+)
+class DeskTradeExportArrowView(DeskScopeMixin, TradeExportArrowView):
+    with_trader = True
+
+    def get_queryset(self):
+        return (
+            Trade.objects
+            .filter(desk_id=self.request.user.desk_id)
+            .order_by("-trade_date")
+        )